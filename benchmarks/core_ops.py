@@ -0,0 +1,435 @@
+"""Замер основных операций над синтетическими таблицами.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.core_ops [--rows 1000 100000 ...]
+        [--layout rows|columnar] [--format json|binary]
+        [--codec none|zlib|lzma]
+        [--output results.json] [--baseline old.json] [--threshold 0.1]
+
+Для каждого размера таблицы (от 10^3 до 10^7 строк; столбцы —
+по одному каждого типа из VALID_TYPES) в отдельном процессе
+замеряются вставка, выборка по ID и по обычному столбцу,
+обновление, удаление, сохранение и загрузка: пропускная
+способность, перцентили задержки одной операции и пиковый RSS
+процесса. Операции engine_* выполняют те же вставку, выборку
+по ID, обновление и удаление командами через execute_command
+над сохранённой таблицей в TableStore — с разбором команды,
+журналом изменений, кешем и выводом. Результаты печатаются таблицей и при --output
+записываются в JSON. С --baseline результаты сравниваются
+с прошлым запуском: если пропускная способность какой-либо
+операции упала больше чем на threshold, код возврата — 1.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from src.primitive_db.columnar import ColumnarTable
+from src.primitive_db.constants import (
+    CODECS,
+    ID_COLUMN,
+    INDEX_KINDS,
+    LAYOUTS,
+    TABLE_FORMATS,
+    VALID_TYPES,
+)
+from src.primitive_db.decorators import create_cacher, set_auto_confirm
+from src.primitive_db.engine import execute_command
+from src.primitive_db.indexes import build_index, build_sorted_index
+from src.primitive_db.store import TableStore
+from src.primitive_db.table import Table
+from src.primitive_db.utils import compact_table_data, save_metadata
+
+TABLE_NAME = "bench"
+COLUMNS = {
+    ID_COLUMN: "int",
+    **{f"{col_type}_col": col_type for col_type in sorted(VALID_TYPES)},
+}
+OPERATIONS = (
+    "insert",
+    "save",
+    "load",
+    "select_id",
+    "select_column",
+    "update",
+    "delete",
+    "engine_insert",
+    "engine_select",
+    "engine_update",
+    "engine_delete",
+)
+
+# Сколько задержек отдельных операций хранить для перцентилей:
+# при большем числе операций замеряется каждая k-я
+LATENCY_SAMPLES = 10_000
+
+_GENERATORS = {
+    "int": lambda rng: rng.randrange(1_000_000),
+    "str": lambda rng: f"s{rng.randrange(100_000)}",
+    "bool": lambda rng: rng.random() < 0.5,
+}
+
+
+def make_record(rng):
+    """Случайная запись без ID по схеме COLUMNS."""
+    return {
+        name: _GENERATORS[col_type](rng)
+        for name, col_type in COLUMNS.items()
+        if name != ID_COLUMN
+    }
+
+
+def literal(value):
+    """Значение в синтаксисе команд (см. parser.py)."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return f'"{value}"'
+    return str(value)
+
+
+def bench_engine(rows, options, rng):
+    """Замерить команды через execute_command над таблицей на диске.
+
+    Таблица уже сохранена в текущем каталоге; команды выполняются
+    так же, как в REPL: store.command() вокруг каждой, сброс
+    журнала по политике хранилища. Вывод команд отбрасывается.
+    """
+    column = options["column"]
+    col_type = COLUMNS[column]
+    store = TableStore()
+    cache_result = create_cacher()
+    ids = [rng.randrange(1, rows + 1) for _ in range(options["ops"])]
+    delete_ids = rng.sample(range(1, rows + 1), min(rows, options["deletes"]))
+
+    def run(command):
+        with store.command():
+            execute_command(command, store, cache_result)
+
+    def insert(i):
+        values = ", ".join(
+            literal(value) for value in make_record(rng).values()
+        )
+        run(f"insert into {TABLE_NAME} values ({values})")
+
+    def update(i):
+        value = literal(_GENERATORS[col_type](rng))
+        run(f"update {TABLE_NAME} set {column} = {value} where ID = {ids[i]}")
+
+    results = {}
+    set_auto_confirm(True)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(
+            devnull
+        ):
+            results["engine_insert"] = run_op(insert, options["ops"])
+            results["engine_select"] = run_op(
+                lambda i: run(f"select from {TABLE_NAME} where ID = {ids[i]}"),
+                options["ops"],
+            )
+            results["engine_update"] = run_op(update, options["ops"])
+            results["engine_delete"] = run_op(
+                lambda i: run(
+                    f"delete from {TABLE_NAME} where ID = {delete_ids[i]}"
+                ),
+                len(delete_ids),
+            )
+    finally:
+        set_auto_confirm(False)
+        store.close()
+    return results
+
+
+def percentile(values, fraction):
+    """Перцентиль отсортированного списка (ближайший ранг)."""
+    if not values:
+        return None
+    rank = min(len(values) - 1, max(0, round(fraction * len(values)) - 1))
+    return values[rank]
+
+
+def summarize(count, seconds, latencies, units=1):
+    """Сводка замера: пропускная способность и задержки в мс.
+
+    units — сколько строк обрабатывает одна операция (для
+    сохранения и загрузки пропускная способность — в строках).
+    """
+    latencies = sorted(latencies)
+    return {
+        "count": count,
+        "seconds": seconds,
+        "ops_per_sec": count * units / seconds if seconds else None,
+        "latency_ms": {
+            name: percentile(latencies, fraction) * 1000
+            for name, fraction in (
+                ("p50", 0.5),
+                ("p90", 0.9),
+                ("p99", 0.99),
+                ("max", 1.0),
+            )
+        }
+        if latencies
+        else None,
+    }
+
+
+def run_op(op, count, units=1):
+    """Выполнить op(i) для i в range(count) и вернуть сводку."""
+    step = max(1, count // LATENCY_SAMPLES)
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for i in range(count):
+        if i % step:
+            op(i)
+            continue
+        op_start = clock()
+        op(i)
+        latencies.append(clock() - op_start)
+    return summarize(count, clock() - start, latencies, units)
+
+
+def peak_rss():
+    """Пиковый RSS текущего процесса в байтах (None без resource)."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS — байты
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def bench_size(rows, options):
+    """Замерить все операции на таблице из rows строк.
+
+    Выполняется в отдельном процессе, чтобы пиковый RSS
+    относился к таблице одного размера. Файлы таблицы пишутся
+    во временный каталог.
+    """
+    rng = random.Random(options["seed"])
+    column = options["column"]
+    layout, table_format = options["layout"], options["format"]
+    codec = options["codec"]
+    if codec != "none":
+        table_format = "binary"
+    cls = ColumnarTable if layout == "columnar" else Table
+    table = cls(COLUMNS)
+    results = {}
+
+    results["insert"] = run_op(
+        lambda i: table.insert(make_record(rng)), rows
+    )
+    if options["index"] == "hash":
+        table.indexes[column] = build_index(table, column)
+    elif options["index"] == "sorted":
+        table.sorted_indexes[column] = build_sorted_index(table, column)
+
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.chdir(tmpdir)
+        try:
+            save_metadata(
+                "db_meta.json",
+                {
+                    TABLE_NAME: {
+                        "columns": COLUMNS,
+                        "next_id": table.next_id,
+                        "layout": layout,
+                        "format": table_format,
+                        "codec": codec,
+                    }
+                },
+            )
+            binary_columns = COLUMNS if table_format == "binary" else None
+            results["save"] = run_op(
+                lambda i: compact_table_data(
+                    TABLE_NAME, table.to_records(), binary_columns, 0, codec
+                ),
+                options["repeat"],
+                units=rows,
+            )
+            results["load"] = run_op(
+                lambda i: TableStore().get_table(TABLE_NAME),
+                options["repeat"],
+                units=rows,
+            )
+            results.update(bench_engine(rows, options, rng))
+        finally:
+            os.chdir(workdir)
+
+    ids = [rng.randrange(1, rows + 1) for _ in range(options["ops"])]
+    results["select_id"] = run_op(
+        lambda i: table.get(ids[i]), options["ops"]
+    )
+
+    values = [
+        _GENERATORS[COLUMNS[column]](rng) for _ in range(options["scans"])
+    ]
+    results["select_column"] = run_op(
+        lambda i: sum(1 for _ in table.scan(("cmp", "=", column, values[i]))),
+        options["scans"],
+    )
+
+    def update(i):
+        record = table.get(ids[i])
+        table.update(record, {column: _GENERATORS[COLUMNS[column]](rng)})
+
+    results["update"] = run_op(update, options["ops"])
+
+    delete_ids = rng.sample(range(1, rows + 1), min(rows, options["deletes"]))
+    results["delete"] = run_op(
+        lambda i: table.delete([delete_ids[i]]), len(delete_ids)
+    )
+    return {"rows": rows, "peak_rss_bytes": peak_rss(), "operations": results}
+
+
+def compare(results, baseline, threshold):
+    """Сравнить с базовым запуском; вернуть список регрессий.
+
+    Регрессия — падение ops_per_sec больше чем на threshold
+    (доля) для операции и размера, которые есть в обоих запусках.
+    """
+    old_runs = {run["rows"]: run for run in baseline["results"]}
+    regressions = []
+    print(f"\nСравнение с базовым запуском (порог {threshold:.0%}):")
+    print(f"{'строк':>10} {'операция':>14} {'было':>12} {'стало':>12} {'изм.':>8}")
+    for run in results:
+        old_run = old_runs.get(run["rows"])
+        if old_run is None:
+            continue
+        for name, stats in run["operations"].items():
+            old_stats = old_run["operations"].get(name)
+            if not old_stats or not old_stats["ops_per_sec"]:
+                continue
+            old, new = old_stats["ops_per_sec"], stats["ops_per_sec"]
+            change = new / old - 1
+            mark = ""
+            if change < -threshold:
+                mark = "  регрессия"
+                regressions.append((run["rows"], name, change))
+            print(
+                f"{run['rows']:>10} {name:>14} {old:>12.0f} "
+                f"{new:>12.0f} {change:>+8.1%}{mark}"
+            )
+    return regressions
+
+
+def print_results(results):
+    """Напечатать результаты таблицей."""
+    print(
+        f"{'строк':>10} {'операция':>14} {'оп./с':>12} "
+        f"{'p50, мс':>10} {'p99, мс':>10}"
+    )
+    for run in results:
+        for name in OPERATIONS:
+            stats = run["operations"][name]
+            latency = stats["latency_ms"] or {}
+            print(
+                f"{run['rows']:>10} {name:>14} {stats['ops_per_sec']:>12.0f} "
+                f"{latency.get('p50', 0):>10.4f} {latency.get('p99', 0):>10.4f}"
+            )
+        rss = run["peak_rss_bytes"]
+        if rss is not None:
+            print(f"{run['rows']:>10} {'пиковый RSS':>14} {rss / 2**20:>9.1f} МБ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="rows")
+    parser.add_argument(
+        "--format", choices=sorted(TABLE_FORMATS), default="json"
+    )
+    parser.add_argument(
+        "--codec",
+        choices=sorted(CODECS),
+        default="none",
+        help="кодек сжатия снимка (кроме none — бинарный формат)",
+    )
+    parser.add_argument(
+        "--column",
+        choices=[name for name in COLUMNS if name != ID_COLUMN],
+        default="int_col",
+        help="столбец для выборки и обновления",
+    )
+    parser.add_argument(
+        "--index", choices=["none", *sorted(INDEX_KINDS)], default="none"
+    )
+    parser.add_argument("--ops", type=int, default=1000)
+    parser.add_argument("--scans", type=int, default=5)
+    parser.add_argument("--deletes", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="файл для результатов в JSON")
+    parser.add_argument("--baseline", help="JSON прошлого запуска")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    options = {
+        "layout": args.layout,
+        "format": args.format,
+        "codec": args.codec,
+        "column": args.column,
+        "index": args.index,
+        "ops": args.ops,
+        "scans": args.scans,
+        "deletes": args.deletes,
+        "repeat": args.repeat,
+        "seed": args.seed,
+    }
+    results = []
+    for rows in args.rows:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            results.append(executor.submit(bench_size, rows, options).result())
+    print_results(results)
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **options,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты записаны в {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        differs = [
+            name
+            for name, value in options.items()
+            if baseline["meta"].get(name) != value
+        ]
+        if differs:
+            print(
+                "\nВнимание: параметры базового запуска отличаются: "
+                + ", ".join(differs)
+            )
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nРегрессий: {len(regressions)}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
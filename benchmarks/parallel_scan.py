@@ -0,0 +1,120 @@
+"""Замер параллельного сканирования при разном числе процессов.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.parallel_scan [--rows N] [--layout rows|columnar]
+
+Строит синтетическую таблицу, выполняет одно и то же условие
+последовательным scan и через пул из 1, 2, 4, ... процессов
+и печатает время и ускорение относительно scan. Большая таблица
+сама переходит на пул (см. use_parallel), поэтому scan для
+сравнения выполняется с PARALLEL_WORKERS = 1.
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from src.primitive_db import parallel
+from src.primitive_db.columnar import ColumnarTable
+from src.primitive_db.constants import PARALLEL_CHUNK_SIZE
+from src.primitive_db.parallel import parallel_positions
+from src.primitive_db.table import Table
+
+COLUMNS = {"ID": "int", "name": "str", "age": "int", "active": "bool"}
+
+# Условие без индексов: полный перебор таблицы
+WHERE = (
+    "or",
+    ("and", ("cmp", ">", "age", 30), ("cmp", "=", "active", True)),
+    ("cmp", "=", "name", "user_7"),
+)
+
+
+def make_table(rows, layout):
+    """Сгенерировать таблицу из rows случайных записей."""
+    cls = ColumnarTable if layout == "columnar" else Table
+    table = cls(COLUMNS)
+    rng = random.Random(42)
+    for _ in range(rows):
+        table.insert(
+            {
+                "name": f"user_{rng.randrange(1000)}",
+                "age": rng.randrange(18, 80),
+                "active": rng.random() < 0.5,
+            }
+        )
+    return table
+
+
+@contextmanager
+def serial_scans():
+    """Отключить переход scan на пул процессов на время блока."""
+    workers = parallel.PARALLEL_WORKERS
+    parallel.PARALLEL_WORKERS = 1
+    try:
+        yield
+    finally:
+        parallel.PARALLEL_WORKERS = workers
+
+
+def measure(func, repeat):
+    """Лучшее время из repeat запусков."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def worker_counts(limit):
+    """1, 2, 4, ... до limit включительно."""
+    count = 1
+    while count < limit:
+        yield count
+        count *= 2
+    yield limit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument(
+        "--layout", choices=("rows", "columnar"), default="rows"
+    )
+    parser.add_argument("--chunk", type=int, default=PARALLEL_CHUNK_SIZE)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    table = make_table(args.rows, args.layout)
+    with serial_scans():
+        expected = [
+            table.positions[record["ID"]] for record in table.scan(WHERE)
+        ]
+        serial = measure(
+            lambda: sum(1 for _ in table.scan(WHERE)), args.repeat
+        )
+    print(f"Строк: {args.rows}, представление: {args.layout}")
+    print(f"{'процессов':>10} {'время, с':>10} {'ускорение':>10}")
+    print(f"{'scan':>10} {serial:>10.3f} {1:>10.2f}")
+
+    for workers in worker_counts(args.max_workers):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            def run():
+                return parallel_positions(
+                    table, WHERE, args.chunk, executor=executor
+                )
+            if run() != expected:
+                raise SystemExit("Результат не совпадает со scan.")
+            elapsed = measure(run, args.repeat)
+        print(f"{workers:>10} {elapsed:>10.3f} {serial / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Агрегаты count, sum, avg, min, max с группировкой.
+
+Агрегаты считаются за один проход: состояние каждой группы
+хранится в словаре по ключу — кортежу значений столбцов
+group by. Строки идут пачками значений только нужных
+столбцов: без условия — прямо из массивов столбцов
+(column_slice), с условием — из перебора по where.
+Некоторые запросы без условия отвечаются по индексам вовсе
+без прохода по таблице (см. index_aggregate).
+
+Агрегат задаётся парой (функция, столбец), как в разборе select:
+функция None — столбец группировки, столбец None — count(*).
+Значения None (отсутствующие) агрегаты пропускают.
+"""
+
+from itertools import islice
+
+from src.primitive_db import metrics
+from src.primitive_db.constants import SCAN_CHUNK_SIZE
+
+
+def _present(values):
+    """Значения без отсутствующих (None)."""
+    if None in values:
+        return [value for value in values if value is not None]
+    return values
+
+
+def _count(state, values):
+    return state + len(_present(values))
+
+
+def _sum(state, values):
+    return state + sum(_present(values))
+
+
+def _avg(state, values):
+    values = _present(values)
+    return state[0] + sum(values), state[1] + len(values)
+
+
+def _min(state, values):
+    values = _present(values)
+    if not values:
+        return state
+    low = min(values)
+    return low if state is None or low < state else state
+
+
+def _max(state, values):
+    values = _present(values)
+    if not values:
+        return state
+    high = max(values)
+    return high if state is None or high > state else state
+
+
+def _avg_result(state):
+    total, count = state
+    return total / count if count else None
+
+
+# функция → (учёт пачки значений, начальное состояние, итог)
+_FUNCTIONS = {
+    "count": (_count, 0, None),
+    "sum": (_sum, 0, None),
+    "avg": (_avg, (0, 0), _avg_result),
+    "min": (_min, None, None),
+    "max": (_max, None, None),
+}
+
+
+def needed_columns(items, group_by):
+    """Столбцы, значения которых нужны для агрегатов, без повторов."""
+    columns = list(group_by)
+    columns += [column for func, column in items if func and column]
+    return list(dict.fromkeys(columns))
+
+
+def source_chunks(table, where_clause, columns, scan):
+    """Пачки значений columns для строк, подходящих под условие.
+
+    Пачка — (число строк, {столбец: список значений}). Без
+    условия значения берутся по SCAN_CHUNK_SIZE строк через
+    column_slice — у колоночной таблицы прямо из массивов, без
+    записей-словарей. С условием записи перебирает scan(table,
+    where_clause), который использует ID, индексы и пул процессов.
+    """
+    if where_clause is None:
+        for start in range(0, len(table), SCAN_CHUNK_SIZE):
+            size = min(SCAN_CHUNK_SIZE, len(table) - start)
+            metrics.count("rows_scanned", size)
+            yield size, table.column_slice(
+                columns, start, start + SCAN_CHUNK_SIZE
+            )
+        return
+    records = iter(scan(table, where_clause))
+    while batch := list(islice(records, SCAN_CHUNK_SIZE)):
+        yield len(batch), {
+            column: [record.get(column) for record in batch]
+            for column in columns
+        }
+
+
+def _group_positions(chunk, group_by):
+    """Позиции строк пачки по ключам групп."""
+    if len(group_by) == 1:
+        keys = zip(chunk[group_by[0]])
+    else:
+        keys = zip(*(chunk[column] for column in group_by))
+    positions = {}
+    for pos, key in enumerate(keys):
+        if key in positions:
+            positions[key].append(pos)
+        else:
+            positions[key] = [pos]
+    return positions
+
+
+def aggregate(chunks, items, group_by):
+    """Посчитать агрегаты за один проход по пачкам строк.
+
+    chunks — пачки из source_chunks. Строки пачки раскладываются
+    по группам, и каждый агрегат учитывает значения группы
+    целиком встроенными sum, min и max. Возвращает словарь
+    ключ группы → список значений агрегатов в порядке items
+    (для столбцов группировки — None). Без group by результат
+    всегда содержит одну группу с ключом ().
+    """
+    specs = [
+        (func, column) for func, column in items if func is not None
+    ]
+    initials = [_FUNCTIONS[func][1] for func, _ in specs]
+    groups = {}
+    if not group_by:
+        groups[()] = list(initials)
+    for size, chunk in chunks:
+        if group_by:
+            members = _group_positions(chunk, group_by)
+        else:
+            members = {(): None}
+        for key, positions in members.items():
+            state = groups.get(key)
+            if state is None:
+                state = groups[key] = list(initials)
+            for n, (func, column) in enumerate(specs):
+                if column is None:
+                    state[n] += size if positions is None else len(positions)
+                    continue
+                values = chunk[column]
+                if positions is not None:
+                    values = [values[pos] for pos in positions]
+                state[n] = _FUNCTIONS[func][0](state[n], values)
+    return {key: _finish(state, items) for key, state in groups.items()}
+
+
+def _finish(state, items):
+    """Итоговые значения агрегатов группы в порядке items."""
+    values = iter(state)
+    result = []
+    for func, _ in items:
+        if func is None:
+            result.append(None)
+            continue
+        value = next(values)
+        finish = _FUNCTIONS[func][2]
+        result.append(finish(value) if finish else value)
+    return result
+
+
+def index_aggregate(table, items, group_by):
+    """Ответить на запрос без условия по индексам, не читая строк.
+
+    Поддерживаются count(*) без группировки, min и max по
+    столбцам с упорядоченным индексом и count(*) с группировкой
+    по одному столбцу с хеш-индексом. Возвращает результат
+    в виде aggregate() или None, если индексов недостаточно.
+    """
+    if not group_by:
+        values = []
+        for func, column in items:
+            if func == "count" and column is None:
+                values.append(len(table))
+            elif func in ("min", "max") and column in table.sorted_indexes:
+                values.append(_index_edge(table, column, func == "max"))
+            else:
+                return None
+        return {(): values}
+
+    if len(group_by) != 1 or group_by[0] not in table.indexes:
+        return None
+    if any(
+        func is not None and (func, column) != ("count", None)
+        for func, column in items
+    ):
+        return None
+    index = table.indexes[group_by[0]]
+    return {
+        (value,): [None if func is None else len(ids) for func, _ in items]
+        for value, ids in index.items()
+        if ids
+    }
+
+
+def _index_edge(table, column, largest):
+    """Наименьшее (или наибольшее) значение столбца по индексу."""
+    index = table.sorted_indexes[column]
+    for record_id in index.irange(reverse=largest):
+        return table.get(record_id)[column]
+    return None
@@ -0,0 +1,302 @@
+"""Компактный бинарный формат файла таблицы.
+
+Структура файла (все числа little-endian):
+
+    MAGIC (4 байта) | длина заголовка (u32) | заголовок (JSON)
+    | выравнивание до 8 байт | блоки столбцов
+
+Заголовок хранит схему таблицы из db_meta.json, версию схемы
+(см. alter_table), число строк и смещения блоков относительно
+начала области данных. Столбцы
+int хранятся как int64, bool — по байту на значение, str —
+массивом смещений (u64, n + 1 штук) и кучей байтов UTF-8.
+
+Файл открывается через mmap: заголовок читается без чтения
+столбцов (так работает info), а столбец декодируется целиком
+прямо из отображения, без промежуточной копии его байтов
+(BinaryTableFile.column). Хранилище держит таблицы в памяти,
+поэтому при загрузке декодируются все столбцы: колоночная
+таблица — без промежуточных записей-словарей.
+
+Сжатый файл (версия формата 2, см. compress) хранит столбцы
+в кодировках из модуля compression, а каждый блок сжат кодеком
+таблицы; в заголовке — кодек, кодировки столбцов и размер данных
+без сжатия (raw_size).
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from src.primitive_db.compression import (
+    choose_encoding,
+    compress_block,
+    decode_delta,
+    decode_dict,
+    decode_rle,
+    decompress_block,
+    encode_delta,
+    encode_dict,
+    encode_rle,
+)
+from src.primitive_db.constants import FILE_ENCODING
+
+MAGIC = b"PDBT"
+FORMAT_VERSION = 1
+COMPRESSED_FORMAT_VERSION = 2
+
+_PREFIX = struct.Struct("<4sI")
+_INT = struct.Struct("<q")
+
+
+def _align(size):
+    """Округлить размер вверх до кратного 8."""
+    return (size + 7) & ~7
+
+
+def _to_le(values):
+    """Привести массив к порядку байтов little-endian."""
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _encode_strings(values):
+    """Закодировать строки в массив смещений и кучу байтов."""
+    encoded = [v.encode(FILE_ENCODING) for v in values]
+    offsets = array("Q", [0])
+    total = 0
+    for item in encoded:
+        total += len(item)
+        offsets.append(total)
+    return [_to_le(offsets).tobytes(), b"".join(encoded)]
+
+
+def _encode_column(col_type, values):
+    """Закодировать значения столбца в список блоков байтов."""
+    if col_type == "int":
+        return [_to_le(array("q", values)).tobytes()]
+    if col_type == "bool":
+        return [bytes(1 if v else 0 for v in values)]
+    return _encode_strings(values)
+
+
+def _encode_compressed(name, col_type, values):
+    """Закодировать столбец для сжатого файла.
+
+    Возвращает (блоки байтов до сжатия, [кодировка, тип массива
+    номеров или None], размер столбца в несжатом файле).
+    """
+    encoding = choose_encoding(name, col_type, values)
+    size = len(values)
+    if encoding == "plain":
+        parts = _encode_column(col_type, values)
+        return parts, [encoding, None], sum(map(len, parts))
+    if encoding == "delta":
+        codes = encode_delta(values)
+        parts, raw_size = [], size * _INT.size
+    elif encoding == "rle":
+        codes = encode_rle(values)
+        parts, raw_size = [], size
+    else:
+        dictionary, codes, counts = encode_dict(values)
+        parts = _encode_strings(dictionary)
+        heap = sum(
+            len(value.encode(FILE_ENCODING)) * count
+            for value, count in zip(dictionary, counts)
+        )
+        raw_size = (size + 1) * 8 + heap
+    parts.append(_to_le(codes).tobytes())
+    return parts, [encoding, codes.typecode], raw_size
+
+
+def write_table(f, columns, records, schema_version=0, codec=None):
+    """Записать таблицу в открытый на запись бинарный файл.
+
+    columns — схема {столбец: тип}, records — список записей,
+    schema_version — версия схемы, в которой они записаны,
+    codec — кодек сжатия (zlib, lzma; None или "none" — без
+    сжатия). Значение int вне int64 — ValueError.
+    """
+    if codec == "none":
+        codec = None
+    blocks = {}
+    encodings = {}
+    raw_size = 0
+    payload = []
+    offset = 0
+    for name, col_type in columns.items():
+        values = [r[name] for r in records]
+        try:
+            if codec is None:
+                parts = _encode_column(col_type, values)
+                raw_size += sum(map(len, parts))
+            else:
+                parts, encodings[name], size = _encode_compressed(
+                    name, col_type, values
+                )
+                parts = [compress_block(codec, part) for part in parts]
+                raw_size += size
+        except OverflowError:
+            raise ValueError(
+                f'Значение столбца "{name}" вне диапазона int64.'
+            ) from None
+        spans = []
+        for part in parts:
+            spans.append([offset, len(part)])
+            padding = _align(len(part)) - len(part)
+            payload.append(part + b"\0" * padding)
+            offset += len(part) + padding
+        blocks[name] = spans
+
+    header = {
+        "version": FORMAT_VERSION,
+        "columns": columns,
+        "schema_version": schema_version,
+        "rows": len(records),
+        "blocks": blocks,
+    }
+    if codec is not None:
+        header.update(
+            version=COMPRESSED_FORMAT_VERSION,
+            codec=codec,
+            encodings=encodings,
+            raw_size=raw_size,
+        )
+    header = json.dumps(header, ensure_ascii=False).encode(FILE_ENCODING)
+    prefix = _PREFIX.pack(MAGIC, len(header)) + header
+    prefix += b"\0" * (_align(len(prefix)) - len(prefix))
+
+    f.write(prefix)
+    for part in payload:
+        f.write(part)
+
+
+def _int_array(typecode, data):
+    """Массив целых типа typecode из байтов little-endian."""
+    values = array(typecode)
+    values.frombytes(data)
+    return _to_le(values)
+
+
+def _decode_strings(offsets, heap):
+    """Декодировать строки из массива смещений и кучи байтов.
+
+    heap может быть memoryview: строки декодируются из него
+    без копирования кучи.
+    """
+    offsets = _int_array("Q", offsets)
+    return [
+        str(heap[offsets[i]:offsets[i + 1]], FILE_ENCODING)
+        for i in range(len(offsets) - 1)
+    ]
+
+
+def _decode_column(col_type, parts):
+    """Декодировать столбец из блоков байтов несжатого формата."""
+    if col_type == "int":
+        return _int_array("q", parts[0])
+    if col_type == "bool":
+        return bytearray(parts[0])
+    return _decode_strings(*parts)
+
+
+class BinaryTableFile:
+    """Таблица в бинарном файле, открытая через mmap.
+
+    Декодирует столбцы по одному (column) или все записи сразу
+    (records). Используется как контекстный менеджер. codec —
+    кодек сжатого файла или None, raw_size — размер данных
+    столбцов без сжатия, stored_size — размер их блоков в файле
+    (без заголовка и выравнивания).
+    """
+
+    def __init__(self, filepath):
+        self._file = open(filepath, "rb")
+        try:
+            self._mm = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Файл {filepath} пуст.") from None
+        magic, header_len = _PREFIX.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Файл {filepath} не является таблицей.")
+        start = _PREFIX.size
+        header = json.loads(
+            self._mm[start:start + header_len].decode(FILE_ENCODING)
+        )
+        self.columns = header["columns"]
+        self.schema_version = header.get("schema_version", 0)
+        self._rows = header["rows"]
+        self._data_start = _align(start + header_len)
+        self._blocks = {
+            name: [(self._data_start + off, size) for off, size in spans]
+            for name, spans in header["blocks"].items()
+        }
+        self.codec = header.get("codec")
+        self._encodings = header.get("encodings", {})
+        self.stored_size = sum(
+            size for spans in self._blocks.values() for _, size in spans
+        )
+        self.raw_size = header.get("raw_size") or self.stored_size
+
+    def __len__(self):
+        return self._rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Закрыть отображение и файл."""
+        self._mm.close()
+        self._file.close()
+
+    def column(self, name):
+        """Декодировать столбец целиком.
+
+        int → array('q'), bool → bytearray, str → список строк.
+        Блоки берутся из отображения через memoryview, без копий.
+        """
+        with memoryview(self._mm) as view:
+            parts = [view[off:off + size] for off, size in self._blocks[name]]
+            try:
+                return self._decode(name, parts)
+            finally:
+                # Иначе отображение нельзя будет закрыть
+                for part in parts:
+                    part.release()
+
+    def _decode(self, name, parts):
+        """Декодировать столбец name из его блоков."""
+        col_type = self.columns[name]
+        if self.codec is None:
+            return _decode_column(col_type, parts)
+        parts = [decompress_block(self.codec, part) for part in parts]
+        encoding, typecode = self._encodings[name]
+        if encoding == "plain":
+            return _decode_column(col_type, parts)
+        codes = _int_array(typecode, parts[-1])
+        if encoding == "delta":
+            return decode_delta(codes)
+        if encoding == "rle":
+            return decode_rle(codes)
+        return decode_dict(_decode_strings(*parts[:2]), codes)
+
+    def records(self):
+        """Декодировать все записи, разбирая каждый столбец целиком."""
+        names = list(self.columns)
+        values = []
+        for name in names:
+            column = self.column(name)
+            if self.columns[name] == "bool":
+                column = [bool(v) for v in column]
+            values.append(column)
+        return [dict(zip(names, row)) for row in zip(*values)]
@@ -0,0 +1,129 @@
+"""Клиент сервера базы данных с пулом соединений.
+
+Пример:
+
+    from src.primitive_db.client import Client
+
+    with Client(port=7433) as db:
+        print(db.execute("select * from users where age > 18"))
+        db.pipeline([
+            'insert into users values ("Anna", 30, true)',
+            'insert into users values ("Ivan", 25, false)',
+        ])
+
+Клиент можно использовать из нескольких потоков: каждый вызов
+берёт свободное соединение из пула (или открывает новое, пока
+их меньше pool_size) и возвращает его после ответа.
+"""
+
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+
+from src.primitive_db.constants import (
+    CLIENT_POOL_SIZE,
+    CLIENT_TIMEOUT,
+    PIPELINE_WINDOW,
+    SERVER_HOST,
+    SERVER_PORT,
+)
+from src.primitive_db.protocol import encode_frame, recv_frame
+
+
+class CommandError(Exception):
+    """Сервер отказался выполнять команду."""
+
+
+class Client:
+    """Пул соединений с сервером и отправка команд."""
+
+    def __init__(
+        self,
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        socket_path=None,
+        pool_size=CLIENT_POOL_SIZE,
+        timeout=CLIENT_TIMEOUT,
+    ):
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _connect(self):
+        if self.socket_path is not None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            return sock
+        return socket.create_connection(
+            (self.host, self.port), timeout=self.timeout
+        )
+
+    @contextmanager
+    def _connection(self):
+        """Взять соединение из пула на время одного обмена.
+
+        Соединение, на котором произошла ошибка, закрывается,
+        а не возвращается в пул.
+        """
+        self._slots.acquire()
+        try:
+            try:
+                sock = self._idle.get_nowait()
+            except queue.Empty:
+                sock = self._connect()
+            try:
+                yield sock
+            except BaseException:
+                sock.close()
+                raise
+            self._idle.put(sock)
+        finally:
+            self._slots.release()
+
+    def pipeline(self, commands):
+        """Выполнить команды по одному соединению без ожидания ответов.
+
+        Запросы отправляются окнами по PIPELINE_WINDOW штук, затем
+        читаются ответы окна. Возвращает список выводов команд
+        в порядке запросов; если сервер отказал хотя бы в одной
+        команде, после чтения всех ответов — CommandError.
+        """
+        commands = list(commands)
+        responses = []
+        with self._connection() as sock:
+            for start in range(0, len(commands), PIPELINE_WINDOW):
+                window = commands[start:start + PIPELINE_WINDOW]
+                sock.sendall(
+                    b"".join(
+                        encode_frame({"command": command})
+                        for command in window
+                    )
+                )
+                responses.extend(recv_frame(sock) for _ in window)
+        errors = [r["error"] for r in responses if "error" in r]
+        if errors:
+            raise CommandError(errors[0])
+        return [response["output"] for response in responses]
+
+    def execute(self, command):
+        """Выполнить одну команду и вернуть её вывод."""
+        return self.pipeline([command])[0]
+
+    def close(self):
+        """Закрыть свободные соединения пула."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,331 @@
+"""Колоночное представление таблицы на массивах.
+
+Каждый столбец хранится отдельно: int — в array('q'), bool —
+в bytearray (один байт на значение), str — кодами в array('I')
+со словарём-пулом строк. Записи-словари собираются только для
+строк, которые действительно нужны запросу.
+"""
+
+from array import array
+
+from src.primitive_db import metrics
+from src.primitive_db.constants import (
+    ID_COLUMN,
+    INT_MAX,
+    INT_MIN,
+    SCAN_CHUNK_SIZE,
+)
+from src.primitive_db.parallel import parallel_scan, use_parallel
+from src.primitive_db.query import (
+    OPERATORS,
+    compile_condition,
+    condition_columns,
+    conjuncts,
+)
+from src.primitive_db.schema import filled_column
+from src.primitive_db.table import BaseTable
+
+
+def _select(values, positions, op, value):
+    """Отобрать позиции, где values[pos] op value.
+
+    Несравнимые типы дают пустой результат для <, <=, >, >=.
+    """
+    compare = OPERATORS[op]
+    try:
+        return [pos for pos in positions if compare(values[pos], value)]
+    except TypeError:
+        return []
+
+
+class _IntColumn:
+    """Столбец int на array('q')."""
+
+    def __init__(self):
+        self.data = array("q")
+
+    def check(self, value):
+        """Проверить, что значение помещается в int64."""
+        if not INT_MIN <= value <= INT_MAX:
+            raise ValueError(f"Значение {value} вне диапазона int64.")
+
+    def append(self, value):
+        self.data.append(value)
+
+    def load(self, values):
+        self.data = values
+
+    def get(self, pos):
+        return self.data[pos]
+
+    def slice(self, start, stop):
+        return self.data[start:stop]
+
+    def set(self, pos, value):
+        self.data[pos] = value
+
+    def matches(self, positions, op, value):
+        return _select(self.data, positions, op, value)
+
+    def keep(self, first, positions):
+        tail = array("q", (self.data[pos] for pos in positions))
+        del self.data[first:]
+        self.data.extend(tail)
+
+
+class _BoolColumn:
+    """Столбец bool на bytearray: 1 — True, 0 — False."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def check(self, value):
+        """Любое значение сохраняется как 0 или 1."""
+
+    def append(self, value):
+        self.data.append(1 if value else 0)
+
+    def load(self, values):
+        self.data = values
+
+    def get(self, pos):
+        return bool(self.data[pos])
+
+    def slice(self, start, stop):
+        return [bool(v) for v in self.data[start:stop]]
+
+    def set(self, pos, value):
+        self.data[pos] = 1 if value else 0
+
+    def matches(self, positions, op, value):
+        return _select(self.data, positions, op, value)
+
+    def keep(self, first, positions):
+        tail = bytearray(self.data[pos] for pos in positions)
+        del self.data[first:]
+        self.data.extend(tail)
+
+
+class _StrColumn:
+    """Столбец str: коды в array('I') и общий пул строк."""
+
+    def __init__(self):
+        self.codes = array("I")
+        self.pool = []
+        self.lookup = {}
+
+    def _code(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.pool)
+            self.pool.append(value)
+            self.lookup[value] = code
+        return code
+
+    def check(self, value):
+        """Любое значение попадает в пул строк."""
+
+    def append(self, value):
+        self.codes.append(self._code(value))
+
+    def load(self, values):
+        self.codes = array("I", map(self._code, values))
+
+    def get(self, pos):
+        return self.pool[self.codes[pos]]
+
+    def slice(self, start, stop):
+        pool = self.pool
+        return [pool[code] for code in self.codes[start:stop]]
+
+    def set(self, pos, value):
+        self.codes[pos] = self._code(value)
+
+    def matches(self, positions, op, value):
+        codes = self.codes
+        if op in ("=", "!=") and isinstance(value, str):
+            code = self.lookup.get(value, -1)
+            return _select(codes, positions, op, code)
+        pool = self.pool
+        compare = OPERATORS[op]
+        try:
+            return [
+                pos for pos in positions
+                if compare(pool[codes[pos]], value)
+            ]
+        except TypeError:
+            return []
+
+    def keep(self, first, positions):
+        tail = array("I", (self.codes[pos] for pos in positions))
+        del self.codes[first:]
+        self.codes.extend(tail)
+
+
+_COLUMN_TYPES = {"int": _IntColumn, "bool": _BoolColumn, "str": _StrColumn}
+
+
+class ColumnarTable(BaseTable):
+    """Таблица в колоночном представлении.
+
+    Предоставляет тот же интерфейс, что и Table: поиск по ID
+    и индексам, insert/update/delete, итерацию по записям.
+    Схема берётся из metadata[table]["columns"].
+    """
+
+    def __init__(self, columns, rows=None, next_id=1):
+        super().__init__(columns, next_id)
+        self.columns = {
+            name: _COLUMN_TYPES[col_type]()
+            for name, col_type in self.schema.items()
+        }
+        for record in rows or ():
+            self._append(record)
+        self.next_id = max(self.next_id, max(self.positions, default=0) + 1)
+
+    @classmethod
+    def from_columns(cls, columns, column_data, next_id=1):
+        """Собрать таблицу из готовых столбцов без записей-словарей.
+
+        column_data — {столбец: значения}: array('q') для int,
+        bytearray для bool, последовательность строк для str
+        (как их возвращает BinaryTableFile.column).
+        """
+        table = cls(columns, next_id=next_id)
+        for name, column in table.columns.items():
+            column.load(column_data[name])
+        ids = table.columns[ID_COLUMN].data
+        table.positions = {record_id: pos for pos, record_id in enumerate(ids)}
+        table.next_id = max(next_id, max(ids, default=0) + 1)
+        return table
+
+    def _row(self, pos):
+        """Собрать запись-словарь для строки на позиции pos."""
+        return {
+            name: column.get(pos) for name, column in self.columns.items()
+        }
+
+    def _append(self, record):
+        """Дописать запись в конец массивов столбцов.
+
+        Значения проверяются до изменения массивов: иначе ошибка
+        в середине оставила бы ID без строки.
+        """
+        for name, column in self.columns.items():
+            column.check(record[name])
+        self.positions[record[ID_COLUMN]] = len(self.positions)
+        for name, column in self.columns.items():
+            column.append(record[name])
+
+    def to_records(self):
+        """Вернуть все записи списком словарей (для сохранения)."""
+        return list(self)
+
+    def _alter_values(self, change):
+        """Добавить, удалить или переименовать массив столбца."""
+        op, name = change["op"], change["column"]
+        if op == "add":
+            column = _COLUMN_TYPES[change["type"]]()
+            column.load(
+                filled_column(change["type"], change["default"], len(self))
+            )
+            self.columns[name] = column
+        elif op == "drop":
+            del self.columns[name]
+        else:
+            self.columns = {
+                (change["to"] if key == name else key): column
+                for key, column in self.columns.items()
+            }
+
+    def column_slice(self, names, start, stop):
+        """Значения столбцов names для строк [start, stop)."""
+        return {
+            name: self.columns[name].slice(start, stop) for name in names
+        }
+
+    def scan(self, where_clause=None):
+        """Лениво выдавать записи, соответствующие условию.
+
+        Позиции обрабатываются пачками по SCAN_CHUNK_SIZE. Если
+        условие — цепочка сравнений через AND, каждое сравнение
+        проверяется прямо по массиву столбца; иначе для строки
+        собираются только упомянутые в условии столбцы. Записи-
+        словари строятся только для подошедших строк. Полный
+        перебор большой таблицы идёт в пуле процессов (см. модуль
+        parallel). Просмотренные строки учитываются в rows_scanned
+        по пачкам.
+        """
+        if any(
+            col not in self.columns
+            for col in condition_columns(where_clause)
+        ):
+            return
+        parts = conjuncts(where_clause)
+        vectorized = all(part[0] == "cmp" for part in parts)
+        if not vectorized:
+            predicate = compile_condition(where_clause)
+            used = condition_columns(where_clause)
+        positions = self._candidate_positions(where_clause)
+        if positions is None and use_parallel(self, where_clause):
+            yield from parallel_scan(self, where_clause)
+            return
+        if positions is None:
+            positions = range(len(self))
+        for start in range(0, len(positions), SCAN_CHUNK_SIZE):
+            chunk = positions[start:start + SCAN_CHUNK_SIZE]
+            metrics.count("rows_scanned", len(chunk))
+            if vectorized:
+                for _, op, col, val in parts:
+                    chunk = self.columns[col].matches(chunk, op, val)
+                    if not chunk:
+                        break
+            else:
+                chunk = [
+                    pos for pos in chunk
+                    if predicate({
+                        col: self.columns[col].get(pos) for col in used
+                    })
+                ]
+            for pos in chunk:
+                yield self._row(pos)
+
+    def insert(self, record):
+        """Добавить запись, присвоив ей следующий ID."""
+        record = {ID_COLUMN: self.next_id, **record}
+        self._append(record)
+        self.next_id += 1
+        self._index_add(record)
+        return record
+
+    def update(self, record, changes):
+        """Изменить значения записи и обновить индексы."""
+        if ID_COLUMN in changes:
+            raise ValueError(f"Столбец {ID_COLUMN} нельзя изменять.")
+        for col, val in changes.items():
+            self.columns[col].check(val)
+        pos = self.positions[record[ID_COLUMN]]
+        for col, val in changes.items():
+            self.columns[col].set(pos, val)
+        self._index_remove(record)
+        record.update(changes)
+        self._index_add(record)
+
+    def delete(self, ids):
+        """Удалить записи по ID, уплотнив массивы столбцов."""
+        ids = {i for i in ids if i in self.positions}
+        if not ids:
+            return
+        removed = {self.positions.pop(i) for i in ids}
+        first = min(removed)
+        for pos in sorted(removed):
+            self._index_remove(self._row(pos))
+        keep = [
+            pos for pos in range(first, len(self) + len(removed))
+            if pos not in removed
+        ]
+        for column in self.columns.values():
+            column.keep(first, keep)
+        id_column = self.columns[ID_COLUMN]
+        for pos in range(first, len(self)):
+            self.positions[id_column.get(pos)] = pos
@@ -0,0 +1,130 @@
+"""Кодирование столбцов и сжатие блоков бинарного файла таблицы.
+
+Сжатый бинарный снимок (см. binfmt) хранит каждый столбец
+в кодировке, подобранной по его типу и значениям:
+
+- "delta" — столбец ID: разности соседних значений, которые
+  при обычной нумерации почти все равны 1;
+- "rle" — столбцы bool: длины серий одинаковых значений;
+- "dict" — столбцы str с небольшим числом различных значений
+  (не больше DICT_MAX_RATIO от числа строк): словарь значений
+  и номер значения для каждой строки;
+- "plain" — остальные столбцы, как в несжатом файле.
+
+Целые числа кодировок (разности, длины серий, номера) хранятся
+в самом узком подходящем типе массива. Затем каждый блок
+сжимается кодеком таблицы: zlib или lzma.
+"""
+
+import lzma
+import re
+import zlib
+from array import array
+from collections import Counter
+from itertools import accumulate, chain
+from operator import sub
+
+from src.primitive_db.constants import DICT_MAX_RATIO, ID_COLUMN, ZLIB_LEVEL
+
+# Кодек → (сжать, распаковать)
+_CODECS = {
+    "zlib": (lambda data: zlib.compress(data, ZLIB_LEVEL), zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+# Серия одинаковых байтов столбца bool (0 или 1)
+_RUN = re.compile(rb"\x00+|\x01+")
+
+# Типы массивов по возрастанию ширины
+_SIGNED = "bhiq"
+_UNSIGNED = "BHIQ"
+
+
+def compress_block(codec, data):
+    """Сжать блок байтов кодеком codec."""
+    return _CODECS[codec][0](data)
+
+
+def decompress_block(codec, data):
+    """Распаковать блок байтов, сжатый кодеком codec."""
+    return _CODECS[codec][1](data)
+
+
+def narrow_array(values, signed=True):
+    """Массив целых в самом узком типе, вмещающем все значения."""
+    low, high = min(values, default=0), max(values, default=0)
+    for typecode in _SIGNED if signed else _UNSIGNED:
+        bits = array(typecode).itemsize * 8
+        if signed:
+            fits = -(1 << (bits - 1)) <= low and high < 1 << (bits - 1)
+        else:
+            fits = high < 1 << bits
+        if fits:
+            return array(typecode, values)
+    return array("q" if signed else "Q", values)
+
+
+def choose_encoding(name, col_type, values):
+    """Подобрать кодировку столбца: delta, rle, dict или plain."""
+    if name == ID_COLUMN:
+        return "delta"
+    if col_type == "bool":
+        return "rle"
+    if col_type == "str" and values:
+        if len(set(values)) <= DICT_MAX_RATIO * len(values):
+            return "dict"
+    return "plain"
+
+
+def encode_delta(values):
+    """Разности соседних значений (первое — от нуля)."""
+    return narrow_array(list(map(sub, values, chain((0,), values))))
+
+
+def decode_delta(deltas):
+    """Восстановить значения из разностей: array('q')."""
+    return array("q", accumulate(deltas))
+
+
+def encode_rle(values):
+    """Длины серий bool-значений, начиная с серии False.
+
+    Первая серия может быть пустой, если столбец начинается
+    с True; дальше серии чередуются.
+    """
+    data = bytes(1 if v else 0 for v in values)
+    runs = list(map(len, _RUN.findall(data)))
+    if data[:1] == b"\x01":
+        runs.insert(0, 0)
+    return narrow_array(runs, signed=False)
+
+
+def decode_rle(runs):
+    """Восстановить столбец bool из длин серий: bytearray."""
+    column = bytearray()
+    fill = b"\0"
+    for length in runs:
+        column += fill * length
+        fill = b"\1" if fill == b"\0" else b"\0"
+    return column
+
+
+def encode_dict(values):
+    """Словарь различных значений и номер значения каждой строки.
+
+    Возвращает (словарь — список строк в порядке первого
+    появления, номера — массив, число вхождений каждого значения).
+    """
+    numbers = {}
+    codes = [numbers.setdefault(value, len(numbers)) for value in values]
+    counts = Counter(codes)
+    return (
+        list(numbers),
+        narrow_array(codes, signed=False),
+        [counts[code] for code in range(len(numbers))],
+    )
+
+
+def decode_dict(dictionary, codes):
+    """Восстановить столбец str по словарю и номерам."""
+    return list(map(dictionary.__getitem__, codes))
@@ -9,15 +9,150 @@ DATA_DIR = "data"
 # Расширение файлов данных
 DATA_FILE_EXT = ".json"
 
+# Расширение файлов данных в бинарном формате
+BINARY_FILE_EXT = ".bin"
+
+# Форматы файла данных таблицы на диске
+TABLE_FORMATS = {"json", "binary"}
+DEFAULT_FORMAT = "json"
+
+# Кодеки сжатия снимка таблицы: "none" — без сжатия, "zlib"
+# и "lzma" — сжатый бинарный формат (см. команду compress)
+CODECS = {"none", "zlib", "lzma"}
+DEFAULT_CODEC = "none"
+ZLIB_LEVEL = 6
+
+# Столбец str сжатой таблицы кодируется словарём, если различных
+# значений в нём не больше этой доли от числа строк
+DICT_MAX_RATIO = 0.5
+
+# Расширение журнала операций таблицы (JSON Lines)
+LOG_FILE_EXT = ".log"
+
+# Расширение файла хеш-индексов таблицы
+INDEX_FILE_EXT = ".index.json"
+
+# Размер журнала в байтах, после которого он сворачивается в снимок
+LOG_COMPACT_SIZE = 1024 * 1024
+
 # Кодировка файлов
 FILE_ENCODING = "utf-8"
 
+# Файлы пишутся во временный <файл>.tmp и атомарно заменяют
+# старый; .dropped — файлы удаляемой таблицы до фиксации удаления
+TEMP_FILE_SUFFIX = ".tmp"
+DROPPED_FILE_SUFFIX = ".dropped"
+
+# Уровень надёжности записи на диск:
+# "none" — не форсировать запись, её выполнит ОС;
+# "flush" — передавать данные ОС после каждой записи
+# (переживает падение процесса);
+# "fsync" — дожидаться записи на диск через fsync
+# (переживает отключение питания)
+DURABILITY_LEVELS = {"none", "flush", "fsync"}
+DURABILITY = "fsync"
+
+# Файл метрик команд в формате JSON Lines (None — не писать;
+# задаётся также флагом --metrics) и сколько строк профиля
+# выводит команда profile
+METRICS_FILE = None
+PROFILE_TOP = 20
+
+# Межпроцессные блокировки: файл <таблица>.lock в DATA_DIR
+# и db_meta.json.lock; сколько секунд ждать блокировку,
+# занятую другим процессом
+LOCK_FILE_EXT = ".lock"
+LOCK_TIMEOUT = 10
+
 # Поддерживаемые типы данных
 VALID_TYPES = {"int", "str", "bool"}
 
+# Диапазон значений int: колоночное представление и бинарный
+# формат хранят их как int64
+INT_MIN = -(2**63)
+INT_MAX = 2**63 - 1
+
+# Значение по умолчанию для столбца, добавленного alter_table
+# без default: им заполняются уже существующие записи
+DEFAULT_VALUES = {"int": 0, "str": "", "bool": False}
+
+# Агрегатные функции select и типы столбцов, по которым
+# считаются sum и avg (bool — как 0 и 1)
+AGGREGATE_FUNCTIONS = {"count", "sum", "avg", "min", "max"}
+NUMERIC_TYPES = {"int", "bool"}
+
+# Представления таблицы в памяти:
+# "rows" — список записей-словарей,
+# "columnar" — отдельный массив на каждый столбец
+LAYOUTS = {"rows", "columnar"}
+DEFAULT_LAYOUT = "rows"
+
+# Размер пачки строк при колоночном сканировании
+SCAN_CHUNK_SIZE = 4096
+
+# Размер пачки строк при импорте: проверка типов, вставка
+# и запись в журнал выполняются один раз на пачку
+IMPORT_BATCH_SIZE = 10_000
+
+# Форматы файлов импорта и экспорта
+TRANSFER_FORMATS = {"csv", "jsonl"}
+
+# Экспорт: записей в пачке и размер буфера записи файла (байт)
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_BUFFER_SIZE = 1024 * 1024
+
+# Параллельное сканирование: таблицы от PARALLEL_THRESHOLD строк
+# фильтруются пачками по PARALLEL_CHUNK_SIZE в пуле процессов.
+# PARALLEL_WORKERS = None — по числу ядер, 1 — без пула.
+PARALLEL_THRESHOLD = 200_000
+PARALLEL_CHUNK_SIZE = 50_000
+PARALLEL_WORKERS = None
+
+# Виды индексов: хеш (равенство) и упорядоченный (диапазоны, order by)
+INDEX_KINDS = {"hash", "sorted"}
+DEFAULT_INDEX_KIND = "hash"
+
+# Типы столбцов, для которых можно создать упорядоченный индекс
+SORTED_INDEX_TYPES = {"int", "str"}
+
+# Размер блока упорядоченного индекса
+SORTED_BLOCK_SIZE = 512
+
 # Столбец-идентификатор (добавляется автоматически)
 ID_COLUMN = "ID"
 ID_TYPE = "int"
 
+# Число строк в одной странице вывода select
+DISPLAY_PAGE_SIZE = 50
+
+# Максимальное число строк результата, которое кладётся в кэш
+CACHE_MAX_ROWS = 1000
+
+# Ограничения кэша select: число результатов и их примерный
+# суммарный размер в байтах (при превышении вытесняются давние)
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_BYTES = 16 * 1024 * 1024
+
 # Приглашение командной строки
 PROMPT_TEXT = ">>>Введите команду: "
+
+# Политика сброса изменений на диск:
+# "command" — после каждой команды,
+# "interval" — не чаще, чем раз в FLUSH_INTERVAL_MS миллисекунд,
+# "exit" — только при выходе из программы
+FLUSH_POLICIES = {"command", "interval", "exit"}
+FLUSH_POLICY = "command"
+FLUSH_INTERVAL_MS = 1000
+
+# Режим сервера: адрес по умолчанию, число потоков для выполнения
+# команд и предельный размер кадра протокола (байт)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 7433
+SERVER_WORKERS = 8
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+# Клиент: размер пула соединений, тайм-аут сокета (с) и сколько
+# запросов отправляется подряд до чтения ответов
+CLIENT_POOL_SIZE = 4
+CLIENT_TIMEOUT = 30
+PIPELINE_WINDOW = 64
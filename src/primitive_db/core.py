@@ -1,57 +1,76 @@
 """Основная логика работы с таблицами и данными."""
 
+import heapq
+import os
+import pstats
+import sys
+from itertools import islice
+
 from prettytable import PrettyTable
 
-from src.primitive_db.constants import ID_COLUMN, ID_TYPE, VALID_TYPES
+from src.primitive_db import metrics
+from src.primitive_db.aggregate import (
+    aggregate,
+    index_aggregate,
+    needed_columns,
+    source_chunks,
+)
+from src.primitive_db.constants import (
+    CODECS,
+    DEFAULT_CODEC,
+    DEFAULT_FORMAT,
+    DEFAULT_INDEX_KIND,
+    DEFAULT_LAYOUT,
+    DEFAULT_VALUES,
+    DISPLAY_PAGE_SIZE,
+    ID_COLUMN,
+    ID_TYPE,
+    IMPORT_BATCH_SIZE,
+    INDEX_KINDS,
+    LAYOUTS,
+    NUMERIC_TYPES,
+    PROFILE_TOP,
+    SORTED_INDEX_TYPES,
+    TABLE_FORMATS,
+    VALID_TYPES,
+)
 from src.primitive_db.decorators import (
     confirm_action,
     handle_db_errors,
     log_time,
 )
-
-
-def _validate_type(value, expected_type):
-    """Проверить соответствие значения ожидаемому типу."""
-    if expected_type == "int":
-        return isinstance(value, int) and not isinstance(value, bool)
-    if expected_type == "str":
-        return isinstance(value, str)
-    if expected_type == "bool":
-        return isinstance(value, bool)
-    return False
-
-
-def _generate_id(table_data):
-    """Сгенерировать новый уникальный ID."""
-    if not table_data:
-        return 1
-    return max(record[ID_COLUMN] for record in table_data) + 1
-
-
-def _filter_records(table_data, where_clause):
-    """Отфильтровать записи по условию where."""
-    results = []
-    for record in table_data:
-        match = all(
-            col in record and record[col] == val
-            for col, val in where_clause.items()
-        )
-        if match:
-            results.append(record)
-    return results
+from src.primitive_db.indexes import build_index, build_sorted_index
+from src.primitive_db.join import (
+    join_records,
+    qualify,
+    resolve_column,
+    split_condition,
+)
+from src.primitive_db.parser import aggregate_label
+from src.primitive_db.query import validate_condition
+from src.primitive_db.schema import compile_schema
+from src.primitive_db.transfer import read_rows, write_rows
 
 
 @handle_db_errors
-def create_table(metadata, table_name, columns):
+def create_table(metadata, table_name, columns, codec=DEFAULT_CODEC):
     """Создать новую таблицу с указанными столбцами.
 
     Автоматически добавляет столбец ID:int в начало.
     Проверяет уникальность имени и корректность типов.
+    codec — кодек сжатия снимка (см. compress_table).
     """
     if table_name in metadata:
         print(f'Ошибка: Таблица "{table_name}" уже существует.')
         return metadata
 
+    if codec not in CODECS:
+        print(
+            f"Некорректное значение: {codec}. "
+            "Попробуйте снова."
+        )
+        return metadata
+
     parsed_columns = {ID_COLUMN: ID_TYPE}
 
     for col_def in columns:
@@ -78,6 +97,8 @@ def create_table(metadata, table_name, columns):
         parsed_columns[col_name] = col_type
 
     metadata[table_name] = {"columns": parsed_columns}
+    if codec != DEFAULT_CODEC:
+        metadata[table_name].update(format="binary", codec=codec)
 
     cols_str = ", ".join(
         f"{name}:{typ}" for name, typ in parsed_columns.items()
@@ -108,6 +129,64 @@ def drop_table(metadata, table_name):
     return metadata
 
 
+@confirm_action("удаление столбца")
+def _confirm_drop_column():
+    """Запросить подтверждение удаления столбца."""
+    return True
+
+
+@handle_db_errors
+def alter_table(metadata, table_name, change):
+    """Проверить изменение схемы таблицы (alter_table).
+
+    change — результат parse_alter_args: добавить столбец
+    (add, без default — значение по умолчанию типа из
+    DEFAULT_VALUES), удалить (drop, с подтверждением) или
+    переименовать (rename). Возвращает изменение с номером
+    новой версии схемы для TableStore.alter_table или None.
+    Сами метаданные здесь не меняются.
+    """
+    if table_name not in metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return None
+
+    columns = metadata[table_name]["columns"]
+    op, column = change["op"], change["column"]
+    if column == ID_COLUMN or change.get("to") == ID_COLUMN:
+        raise ValueError(f"Столбец {ID_COLUMN} нельзя изменять.")
+    if op == "add":
+        if column in columns:
+            raise ValueError(f'Столбец "{column}" уже существует.')
+        col_type = change["type"]
+        if col_type not in VALID_TYPES:
+            raise ValueError(f"Некорректный тип: {col_type}.")
+        if change["default"] is None:
+            change = {**change, "default": DEFAULT_VALUES[col_type]}
+        error = compile_schema({column: col_type}).check_rows(
+            [[change["default"]]]
+        )
+        if error is not None:
+            raise ValueError(error)
+    elif column not in columns:
+        raise ValueError(f'Столбец "{column}" не существует.')
+    elif op == "rename" and change["to"] in columns:
+        raise ValueError(f'Столбец "{change["to"]}" уже существует.')
+    elif op == "drop" and _confirm_drop_column() is None:
+        return None
+
+    version = metadata[table_name].get("schema_version", 0) + 1
+    messages = {
+        "add": f'Столбец "{column}" добавлен в таблицу "{table_name}"',
+        "drop": f'Столбец "{column}" удалён из таблицы "{table_name}"',
+        "rename": (
+            f'Столбец "{column}" таблицы "{table_name}" '
+            f'переименован в "{change.get("to")}"'
+        ),
+    }
+    print(f"{messages[op]} (версия схемы {version}).")
+    return {**change, "version": version}
+
+
 def list_tables(metadata):
     """Показать список всех таблиц."""
     if not metadata:
@@ -120,116 +199,567 @@ def list_tables(metadata):
 
 @handle_db_errors
 @log_time
-def insert_record(metadata, table_name, values, table_data):
-    """Добавить новую запись в таблицу.
+def insert_records(metadata, table_name, rows, table):
+    """Добавить в таблицу одну или несколько записей.
 
-    Проверяет существование таблицы, количество и типы значений.
-    Генерирует ID автоматически.
+    rows — список строк значений. Вся пачка сначала проверяется
+    (количество и типы значений), и только потом вставляется:
+    при ошибке не добавляется ни одна запись. ID берутся из
+    счётчика таблицы. Возвращает список добавленных записей.
     """
     if table_name not in metadata:
         print(f'Ошибка: Таблица "{table_name}" не существует.')
-        return table_data
+        return []
 
-    columns = metadata[table_name]["columns"]
-    data_columns = {
-        k: v for k, v in columns.items() if k != ID_COLUMN
-    }
+    schema = compile_schema(metadata[table_name]["columns"])
+    error = schema.check_rows(rows)
+    if error is not None:
+        print(f"Ошибка: {error}")
+        return []
 
-    if len(values) != len(data_columns):
+    records = table.insert_many(schema.make_records(rows))
+    if len(records) == 1:
+        print(
+            f"Запись с ID={records[0][ID_COLUMN]} успешно добавлена "
+            f'в таблицу "{table_name}".'
+        )
+    else:
         print(
-            f"Ошибка: Ожидается {len(data_columns)} значений, "
-            f"получено {len(values)}."
+            f"Записи с ID={records[0][ID_COLUMN]}..."
+            f"{records[-1][ID_COLUMN]} ({len(records)} шт.) успешно "
+            f'добавлены в таблицу "{table_name}".'
         )
-        return table_data
 
-    col_items = list(data_columns.items())
-    for i, (col_name, col_type) in enumerate(col_items):
-        if not _validate_type(values[i], col_type):
-            print(
-                f"Некорректное значение: {values[i]} "
-                f'для столбца "{col_name}" '
-                f"(ожидается {col_type})."
-            )
-            return table_data
+    return records
 
-    new_id = _generate_id(table_data)
-    record = {ID_COLUMN: new_id}
-    for i, (col_name, _) in enumerate(col_items):
-        record[col_name] = values[i]
 
-    table_data.append(record)
-    print(
-        f'Запись с ID={new_id} успешно добавлена '
-        f'в таблицу "{table_name}".'
-    )
+def _batches(items, size):
+    """Разбить поток на списки длиной до size."""
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+@handle_db_errors
+@log_time
+def import_records(
+    metadata, table_name, filepath, table, commit,
+    batch_size=IMPORT_BATCH_SIZE,
+):
+    """Импортировать записи из файла CSV или JSON Lines.
+
+    Файл читается потоком пачками по batch_size строк. Каждая
+    пачка проверяется целиком, вставляется и передаётся в
+    commit(records) — вызывающая сторона записывает её в журнал.
+    При ошибке импорт останавливается; уже принятые пачки
+    остаются в таблице. Возвращает число импортированных записей.
+    """
+    if table_name not in metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return 0
+    if not os.path.isfile(filepath):
+        print(f"Ошибка: Файл {filepath} не найден.")
+        return 0
+
+    schema = compile_schema(metadata[table_name]["columns"])
+    columns = dict(schema.items)
+    total = 0
+    try:
+        for batch in _batches(read_rows(filepath, columns), batch_size):
+            error = schema.check_rows(batch)
+            if error is not None:
+                raise ValueError(
+                    f"пачка со строки данных {total + 1}: {error}"
+                )
+            commit(table.insert_many(schema.make_records(batch)))
+            total += len(batch)
+    except ValueError as e:
+        print(f"Ошибка импорта: {e}")
+
+    print(f'Импортировано записей в таблицу "{table_name}": {total}.')
+    return total
+
+
+def _check_columns(table, columns):
+    """Проверить, что столбцы есть в схеме таблицы."""
+    for column in columns:
+        if column not in table.schema:
+            raise ValueError(f'Столбец "{column}" не существует.')
+
+
+def _order_records(records, order_by, top=None):
+    """Упорядочить записи по списку (столбец, по_убыванию).
+
+    Если направление у всех столбцов одно и известно, сколько
+    записей нужно (top), используется heapq — без сортировки
+    всего результата.
+    """
+    def key(record):
+        return tuple(record.get(column) for column, _ in order_by)
+
+    directions = {descending for _, descending in order_by}
+    if len(directions) == 1:
+        descending = directions.pop()
+        if top is not None:
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            return pick(top, records, key=key)
+        return sorted(records, key=key, reverse=descending)
 
-    return table_data
+    records = list(records)
+    for column, descending in reversed(order_by):
+        records.sort(key=lambda r: r.get(column), reverse=descending)
+    return records
+
+
+def _scan(table, where_clause):
+    """Перебрать записи по условию (большую таблицу таблица
+    фильтрует в пуле процессов, см. модуль parallel).
+
+    Время перебора учитывается в метрике filter.
+    """
+    return metrics.timed_iter("filter", table.scan(where_clause))
+
+
+@handle_db_errors
+@log_time
+def select_records(
+    table,
+    where_clause=None,
+    columns=None,
+    order_by=None,
+    limit=None,
+    offset=0,
+):
+    """Выбрать записи потоком: scan → filter → order → limit → project.
+
+    Возвращает итератор; записи читаются из таблицы по мере
+    потребления. Без order by сканирование останавливается, как
+    только набрано limit записей; с order by и limit хранятся
+    только первые offset + limit записей. Сортировка по одному
+    столбцу с упорядоченным индексом идёт обходом индекса.
+    """
+    validate_condition(where_clause, table.schema)
+    _check_columns(table, columns or [])
+    _check_columns(table, [column for column, _ in order_by or []])
+
+    if order_by and len(order_by) == 1 and (
+        order_by[0][0] in table.sorted_indexes
+    ):
+        column, descending = order_by[0]
+        records = metrics.timed_iter(
+            "filter", table.scan_ordered(column, descending, where_clause)
+        )
+    elif order_by:
+        records = _scan(table, where_clause)
+        top = None if limit is None else offset + limit
+        records = iter(_order_records(records, order_by, top))
+    else:
+        records = _scan(table, where_clause)
+    if offset or limit is not None:
+        stop = None if limit is None else offset + limit
+        records = islice(records, offset, stop)
+    if columns is not None:
+        records = (
+            {col: record.get(col) for col in columns}
+            for record in records
+        )
+    return metrics.counted("rows_returned", records)
 
 
 @handle_db_errors
 @log_time
-def select_records(table_data, where_clause=None):
-    """Выбрать записи, опционально с фильтрацией по where."""
+def select_joined(
+    tables,
+    on,
+    where_clause=None,
+    columns=None,
+    order_by=None,
+    limit=None,
+    offset=0,
+):
+    """Выбрать соединённые записи двух таблиц потоком (hash join).
+
+    tables — [(имя, таблица), (имя, таблица)] в порядке
+    from ... join, on — пара столбцов условия соединения.
+    Столбцы в on, where, columns и order by можно писать как
+    <таблица>.<столбец> или без имени таблицы, если оно
+    однозначно. Выбор стороны для хеш-таблицы и разделение
+    условия между таблицами — см. модуль join. Возвращает
+    итератор записей: без columns — с ключами
+    <таблица>.<столбец>, иначе — с ключами из columns.
+    """
+    (left_name, left), (right_name, right) = tables
+    if left_name == right_name:
+        raise ValueError("Соединение таблицы с самой собой не поддерживается.")
+    schemas = {left_name: left.schema, right_name: right.schema}
+    on_columns = dict(resolve_column(column, schemas) for column in on)
+    if len(on_columns) != 2:
+        raise ValueError("Условие on должно связывать столбцы двух таблиц.")
+    if schemas[left_name][on_columns[left_name]] != (
+        schemas[right_name][on_columns[right_name]]
+    ):
+        raise ValueError("Столбцы условия on должны быть одного типа.")
+    pushed, rest = split_condition(where_clause, schemas)
+    order_by = [
+        (qualify(column, schemas), descending)
+        for column, descending in order_by or []
+    ]
+    projection = None
+    if columns is not None:
+        projection = [(col, qualify(col, schemas)) for col in columns]
+
+    sides = [
+        (name, table, on_columns[name], pushed[name])
+        for name, table in tables
+    ]
+    records = join_records(sides, _scan, rest)
+    if order_by:
+        top = None if limit is None else offset + limit
+        records = iter(_order_records(records, order_by, top))
+    if offset or limit is not None:
+        stop = None if limit is None else offset + limit
+        records = islice(records, offset, stop)
+    if projection is not None:
+        records = (
+            {col: record.get(name) for col, name in projection}
+            for record in records
+        )
+    return metrics.counted("rows_returned", records)
+
+
+def _check_aggregates(table, items, group_by, order_by):
+    """Проверить столбцы и функции запроса с агрегатами."""
+    _check_columns(table, group_by)
+    _check_columns(table, [column for _, column in items if column])
+    for func, column in items:
+        if func is None and column not in group_by:
+            raise ValueError(
+                f'Столбец "{column}" должен быть в group by '
+                "или внутри агрегата."
+            )
+        if func in ("sum", "avg") and table.schema[column] not in NUMERIC_TYPES:
+            raise ValueError(
+                f'{func} нельзя посчитать по столбцу "{column}" '
+                f"типа {table.schema[column]}."
+            )
+    labels = [aggregate_label(item) for item in items]
+    for label, _ in order_by:
+        if label not in labels:
+            raise ValueError(
+                f'Сортировать можно только по столбцам результата: "{label}".'
+            )
+    return labels
+
+
+@handle_db_errors
+@log_time
+def aggregate_records(
+    table,
+    where_clause=None,
+    items=None,
+    group_by=None,
+    order_by=None,
+    limit=None,
+    offset=0,
+):
+    """Посчитать агрегаты (count, sum, avg, min, max) по группам.
+
+    items — элементы select в виде (функция, столбец), см.
+    parse_select_args. Все агрегаты считаются за один проход
+    по подходящим строкам без построения выводимых записей;
+    запросы без условия по возможности отвечаются по индексам.
+    Группы упорядочиваются по order by или по ключу группировки.
+    Возвращает список записей {заголовок: значение}.
+    """
+    group_by = group_by or []
+    order_by = order_by or []
+    validate_condition(where_clause, table.schema)
+    labels = _check_aggregates(table, items, group_by, order_by)
+
+    groups = None
     if where_clause is None:
-        return list(table_data)
-    return _filter_records(table_data, where_clause)
+        groups = index_aggregate(table, items, group_by)
+    if groups is None:
+        columns = needed_columns(items, group_by)
+        chunks = source_chunks(table, where_clause, columns, _scan)
+        groups = aggregate(chunks, items, group_by)
+
+    pairs = groups.items()
+    if not order_by:
+        pairs = sorted(
+            pairs, key=lambda pair: [(v is None, v) for v in pair[0]]
+        )
+    records = []
+    for key, values in pairs:
+        record = dict(zip(labels, values))
+        record.update(zip(group_by, key))
+        records.append(record)
+    if order_by:
+        records = _order_records(records, order_by)
+    stop = None if limit is None else offset + limit
+    records = records[offset:stop]
+    metrics.count("rows_returned", len(records))
+    return records
 
 
 @handle_db_errors
-def update_records(table_data, set_clause, where_clause):
-    """Обновить записи, соответствующие условию where."""
+@log_time
+def export_records(table, where_clause, filepath, file_type):
+    """Выгрузить записи по условию в файл CSV или JSON Lines.
+
+    Записи идут из таблицы потоком через тот же перебор, что и
+    select, и сразу пишутся в файл; результат целиком в памяти
+    не собирается. Возвращает число выгруженных записей.
+    """
+    validate_condition(where_clause, table.schema)
+    total = write_rows(
+        filepath, file_type, list(table.schema), _scan(table, where_clause)
+    )
+    print(f"Выгружено записей в файл {filepath}: {total}.")
+    return total
+
+
+@handle_db_errors
+def update_records(table, set_clause, where_clause):
+    """Обновить записи, соответствующие условию where.
+
+    Новые значения проверяются по схеме таблицы до изменения
+    первой записи: при ошибке не меняется ни одна.
+    """
+    error = compile_schema(table.schema).check_changes(set_clause)
+    if error is not None:
+        raise ValueError(error)
+    validate_condition(where_clause, table.schema)
+
     updated_ids = []
-    for record in table_data:
-        match = all(
-            col in record and record[col] == val
-            for col, val in where_clause.items()
-        )
-        if match:
-            for col, val in set_clause.items():
-                record[col] = val
-            updated_ids.append(record.get(ID_COLUMN))
+    for record in list(_scan(table, where_clause)):
+        table.update(record, set_clause)
+        updated_ids.append(record[ID_COLUMN])
 
-    return table_data, updated_ids
+    return table, updated_ids
 
 
 @handle_db_errors
 @confirm_action("удаление записей")
-def delete_records(table_data, where_clause):
+def delete_records(table, where_clause):
     """Удалить записи, соответствующие условию where.
 
     Запрашивает подтверждение у пользователя.
     """
-    deleted_ids = []
-    new_data = []
+    validate_condition(where_clause, table.schema)
+    deleted_ids = [
+        record[ID_COLUMN] for record in _scan(table, where_clause)
+    ]
+    table.delete(deleted_ids)
+
+    return table, deleted_ids
+
+
+@handle_db_errors
+def create_index(
+    metadata, table_name, column, table, kind=DEFAULT_INDEX_KIND
+):
+    """Создать индекс по столбцу таблицы.
+
+    kind — "hash" (условия на равенство) или "sorted" (диапазоны
+    и order by). Строит индекс по текущим записям и запоминает
+    столбец в метаданных таблицы (ключ "indexes" или
+    "sorted_indexes").
+    """
+    if table_name not in metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return metadata
+
+    if column not in metadata[table_name]["columns"]:
+        print(
+            f'Ошибка: Столбец "{column}" не существует '
+            f'в таблице "{table_name}".'
+        )
+        return metadata
+
+    if kind not in INDEX_KINDS:
+        print(
+            f"Ошибка: Неизвестный вид индекса: {kind}. "
+            f"Доступные: {', '.join(sorted(INDEX_KINDS))}"
+        )
+        return metadata
+
+    col_type = metadata[table_name]["columns"][column]
+    if kind == "sorted" and col_type not in SORTED_INDEX_TYPES:
+        print(
+            f"Ошибка: Упорядоченный индекс не поддерживает "
+            f'тип "{col_type}".'
+        )
+        return metadata
+
+    meta_key = "indexes" if kind == "hash" else "sorted_indexes"
+    table_indexes = metadata[table_name].setdefault(meta_key, [])
+    if column in table_indexes:
+        print(f'Ошибка: Индекс по столбцу "{column}" уже существует.')
+        return metadata
+
+    if kind == "hash":
+        table.indexes[column] = build_index(table, column)
+    else:
+        table.sorted_indexes[column] = build_sorted_index(table, column)
+    table_indexes.append(column)
+    print(
+        f'Индекс по столбцу "{column}" таблицы "{table_name}" '
+        "успешно создан."
+    )
+
+    return metadata
+
+
+@handle_db_errors
+def change_layout(metadata, table_name, layout):
+    """Сменить представление таблицы в памяти (rows/columnar)."""
+    if table_name not in metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return metadata
+
+    if layout not in LAYOUTS:
+        print(
+            f"Некорректное значение: {layout}. "
+            "Попробуйте снова."
+        )
+        return metadata
+
+    metadata[table_name]["layout"] = layout
+    print(
+        f'Таблица "{table_name}" переведена '
+        f'в представление "{layout}".'
+    )
+
+    return metadata
+
+
+@handle_db_errors
+def convert_table(metadata, table_name, table_format, write):
+    """Сменить формат файла данных таблицы (json/binary).
+
+    JSON не сжимается: при переводе в него кодек таблицы
+    сбрасывается. write(settings) записывает снимок таблицы
+    в новом формате (см. TableStore.compact); метаданные
+    меняются только после успешной записи, так что при ошибке
+    таблица остаётся в прежнем формате.
+    """
+    if table_name not in metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return metadata
 
-    for record in table_data:
-        match = all(
-            col in record and record[col] == val
-            for col, val in where_clause.items()
+    if table_format not in TABLE_FORMATS:
+        print(
+            f"Некорректное значение: {table_format}. "
+            "Попробуйте снова."
         )
-        if match:
-            deleted_ids.append(record.get(ID_COLUMN))
-        else:
-            new_data.append(record)
+        return metadata
 
-    return new_data, deleted_ids
+    write({"format": table_format})
+    metadata[table_name]["format"] = table_format
+    if table_format == "json":
+        metadata[table_name].pop("codec", None)
+    print(
+        f'Таблица "{table_name}" переведена '
+        f'в формат "{table_format}".'
+    )
+
+    return metadata
 
 
-def display_records(columns, records):
-    """Вывести записи в формате PrettyTable."""
-    if not records:
+@handle_db_errors
+def compress_table(metadata, table_name, codec, write):
+    """Сменить кодек сжатия снимка таблицы (none/zlib/lzma).
+
+    Сжатый снимок хранится только в бинарном формате, поэтому
+    таблица в JSON переводится в binary. write(settings), как
+    и в convert_table, записывает снимок до смены метаданных.
+    """
+    if table_name not in metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return metadata
+
+    if codec not in CODECS:
+        print(
+            f"Некорректное значение: {codec}. "
+            "Попробуйте снова."
+        )
+        return metadata
+
+    if codec == DEFAULT_CODEC:
+        write({"codec": DEFAULT_CODEC})
+        metadata[table_name].pop("codec", None)
+        print(f'Сжатие таблицы "{table_name}" отключено.')
+        return metadata
+
+    write({"format": "binary", "codec": codec})
+    metadata[table_name].update(format="binary", codec=codec)
+    print(
+        f'Таблица "{table_name}" сжата кодеком "{codec}" '
+        '(формат файла: binary).'
+    )
+
+    return metadata
+
+
+@handle_db_errors
+def display_records(columns, records, page_size=DISPLAY_PAGE_SIZE):
+    """Вывести записи в формате PrettyTable постранично.
+
+    Записи берутся из итератора порциями по page_size, и каждая
+    порция выводится отдельной таблицей, поэтому в памяти
+    одновременно находится не больше одной страницы. Итератор
+    ленивый (см. select_records), и ошибки выборки возникают
+    уже здесь, при выводе.
+    """
+    records = iter(records)
+    shown = 0
+    while True:
+        page = list(islice(records, page_size))
+        if not page:
+            break
+        table = PrettyTable()
+        table.field_names = list(columns)
+        for record in page:
+            table.add_row([record.get(col, "") for col in columns])
+        print(table)
+        shown += len(page)
+
+    if not shown:
         print("Записи не найдены.")
+
+
+def _show_compression(codec, file_stats):
+    """Вывести степень сжатия и скорость декодирования снимка.
+
+    Степень сжатия считается по данным столбцов, без заголовка
+    файла: иначе у маленьких таблиц она была бы меньше единицы.
+    """
+    if file_stats is None or file_stats["codec"] != codec:
+        print(f"Сжатие: {codec} (сжатый снимок ещё не записан)")
         return
+    raw, stored = file_stats["raw_bytes"], file_stats["stored_bytes"]
+    print(
+        f"Сжатие: {codec}, данные {raw} → {stored} байт "
+        f"(в {raw / max(stored, 1):.2f} раза), "
+        f"файл {file_stats['file_bytes']} байт"
+    )
+    seconds = file_stats["decode_seconds"]
+    if seconds is None:
+        print(
+            "Скорость декодирования: будет замерена "
+            "при следующей загрузке снимка"
+        )
+    elif seconds > 0:
+        print(f"Скорость декодирования: {raw / 2**20 / seconds:.1f} МБ/с")
 
-    table = PrettyTable()
-    table.field_names = list(columns.keys())
-    for record in records:
-        table.add_row([record.get(col, "") for col in columns])
-    print(table)
 
+def show_table_info(metadata, table_name, table, file_stats=None):
+    """Вывести информацию о таблице.
 
-def show_table_info(metadata, table_name, table_data):
-    """Вывести информацию о таблице."""
+    file_stats — размеры и время декодирования бинарного снимка
+    (см. TableStore.file_stats) для сжатой таблицы.
+    """
     if table_name not in metadata:
         print(f'Ошибка: Таблица "{table_name}" не существует.')
         return
@@ -241,4 +771,66 @@ def show_table_info(metadata, table_name, table_data):
 
     print(f"Таблица: {table_name}")
     print(f"Столбцы: {cols_str}")
-    print(f"Количество записей: {len(table_data)}")
+    layout = metadata[table_name].get("layout", DEFAULT_LAYOUT)
+    print(f"Представление: {layout}")
+    table_format = metadata[table_name].get("format", DEFAULT_FORMAT)
+    print(f"Формат файла: {table_format}")
+    codec = metadata[table_name].get("codec")
+    if codec:
+        _show_compression(codec, file_stats)
+    if metadata[table_name].get("indexes"):
+        print(f"Индексы: {', '.join(metadata[table_name]['indexes'])}")
+    if metadata[table_name].get("sorted_indexes"):
+        sorted_columns = ", ".join(metadata[table_name]["sorted_indexes"])
+        print(f"Упорядоченные индексы: {sorted_columns}")
+    version = metadata[table_name].get("schema_version", 0)
+    if version:
+        pending = len(metadata[table_name].get("schema_changes", []))
+        print(
+            f"Версия схемы: {version} "
+            f"(не применено к файлам данных: {pending})"
+        )
+    print(f"Количество записей: {len(table)}")
+
+
+def show_cache_stats(stats):
+    """Вывести счётчики кэша select-запросов."""
+    print(f"Результатов в кэше: {stats['entries']}")
+    print(f"Примерный размер: {stats['bytes']} байт")
+    print(f"Попаданий: {stats['hits']}")
+    print(f"Промахов: {stats['misses']}")
+    print(f"Вытеснений: {stats['evictions']}")
+
+
+def show_metrics(snapshot):
+    """Вывести счётчики и задержки операций (см. модуль metrics)."""
+    counters = snapshot["counters"]
+    histograms = snapshot["histograms"]
+    if not counters and not histograms:
+        print("Метрик пока нет.")
+        return
+    for name in sorted(counters):
+        print(f"{name}: {counters[name]}")
+    if not histograms:
+        return
+    table = PrettyTable()
+    table.field_names = [
+        "Операция", "Вызовов", "Всего, мс", "Среднее, мс",
+        "p50, мс", "p95, мс", "p99, мс", "Макс., мс",
+    ]
+    for name in sorted(histograms):
+        h = histograms[name]
+        table.add_row([
+            name,
+            h["count"],
+            f"{h['total'] * 1000:.3f}",
+            f"{h['total'] / h['count'] * 1000:.3f}",
+            *(f"{h[key] * 1000:.3f}" for key in ("p50", "p95", "p99", "max")),
+        ])
+    print(table)
+
+
+def show_profile(profiler):
+    """Вывести PROFILE_TOP самых затратных функций профиля."""
+    stats = pstats.Stats(profiler, stream=sys.stdout)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(PROFILE_TOP)
@@ -1,8 +1,19 @@
 """Декораторы и замыкания для улучшения кода."""
 
+import sys
+import threading
 import time
+from collections import OrderedDict
+from collections.abc import Iterator
 from functools import wraps
 
+from src.primitive_db import metrics
+from src.primitive_db.constants import (
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_MAX_ROWS,
+)
+
 
 def handle_db_errors(func):
     """Декоратор для централизованной обработки ошибок БД.
@@ -31,15 +42,36 @@ def handle_db_errors(func):
     return wrapper
 
 
+_auto_confirm = False
+
+
+def set_auto_confirm(enabled):
+    """Включить или выключить автоподтверждение (флаг --yes)."""
+    global _auto_confirm
+    _auto_confirm = enabled
+
+
 def confirm_action(action_name):
     """Фабрика декораторов для подтверждения опасных операций.
 
     Перед выполнением функции запрашивает у пользователя
     подтверждение. Если ответ не 'y', операция отменяется.
+    При включённом автоподтверждении вопрос не задаётся.
+    Если stdin не терминал (команды идут из него в пакетном
+    режиме), ответ не читается — иначе ответом стала бы
+    следующая команда, — и операция отменяется.
     """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
+            if _auto_confirm:
+                return func(*args, **kwargs)
+            if not sys.stdin.isatty():
+                print(
+                    f'Операция "{action_name}" отменена: '
+                    "подтвердить её без терминала можно флагом --yes."
+                )
+                return None
             answer = input(
                 f"Вы уверены, что хотите выполнить "
                 f'"{action_name}"? [y/n]: '
@@ -55,37 +87,137 @@ def confirm_action(action_name):
 def log_time(func):
     """Декоратор для замера времени выполнения функции.
 
-    Использует time.monotonic() и выводит результат в консоль.
+    Использует time.monotonic() и учитывает время в метриках
+    под именем функции (см. модуль metrics и команду stats).
+    Если функция возвращает итератор, время замеряется до его
+    полного исчерпания.
     """
+    def report(start):
+        metrics.observe(func.__name__, time.monotonic() - start)
+
+    def timed(items, start):
+        yield from items
+        report(start)
+
     @wraps(func)
     def wrapper(*args, **kwargs):
         start = time.monotonic()
         result = func(*args, **kwargs)
-        elapsed = time.monotonic() - start
-        print(
-            f"Функция {func.__name__} выполнилась "
-            f"за {elapsed:.3f} секунд."
-        )
+        if isinstance(result, Iterator):
+            return timed(result, start)
+        report(start)
         return result
     return wrapper
 
 
-def create_cacher():
+def _result_size(rows):
+    """Примерный размер результата в байтах."""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        if isinstance(row, dict):
+            size += sum(sys.getsizeof(value) for value in row.values())
+    return size
+
+
+def create_cacher(
+    max_rows=CACHE_MAX_ROWS,
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+):
     """Создать функцию кэширования через замыкание.
 
-    Возвращает функцию cache_result(key, value_func), которая
-    хранит кэш в замыкании. При повторном вызове с тем же ключом
-    возвращает результат из кэша без вызова value_func.
+    Возвращает функцию cache_result(table, key, value_func), которая
+    хранит кэш в замыкании. При повторном вызове с той же таблицей
+    и ключом возвращает результат из кэша без вызова value_func.
+
+    Если value_func возвращает итератор, строки отдаются потоком
+    и попадают в кэш, только когда итератор исчерпан целиком
+    и содержит не больше max_rows элементов. Пустой результат
+    тоже кэшируется; None (ошибка) — нет.
+
+    Кэш ограничен числом результатов max_entries и их примерным
+    размером max_bytes; при переполнении вытесняются давно
+    не использованные (LRU). У каждой таблицы свой счётчик
+    версий: cache_result.invalidate(table) увеличивает его, и
+    результаты по старой версии больше не находятся, не задевая
+    кэш других таблиц. Результат, зависящий от нескольких таблиц
+    (join), кэшируется с кортежем их имён вместо table и
+    устаревает при изменении любой из них. cache_result.stats() возвращает счётчики
+    попаданий, промахов и вытеснений. Кэш можно использовать
+    из нескольких потоков (режим сервера).
     """
-    cache = {}
+    cache = OrderedDict()
+    versions = {}
+    lock = threading.Lock()
+    counters = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+    def store(full_key, rows):
+        size = _result_size(rows)
+        if size > max_bytes:
+            return
+        with lock:
+            if full_key in cache:
+                counters["bytes"] -= cache.pop(full_key)[1]
+            cache[full_key] = (rows, size)
+            counters["bytes"] += size
+            while (
+                len(cache) > max_entries or counters["bytes"] > max_bytes
+            ):
+                _, (_, evicted_size) = cache.popitem(last=False)
+                counters["bytes"] -= evicted_size
+                counters["evictions"] += 1
+
+    def remember(full_key, items):
+        buffer = []
+        for item in items:
+            if buffer is not None:
+                buffer.append(item)
+                if len(buffer) > max_rows:
+                    buffer = None
+            yield item
+        if buffer is not None:
+            store(full_key, buffer)
 
-    def cache_result(key, value_func):
+    def cache_result(table, key, value_func):
         """Получить результат из кэша или вычислить и сохранить."""
-        if key not in cache:
-            result = value_func()
-            if result is not None:
-                cache[key] = result
-            return result
-        return cache[key]
+        tables = table if isinstance(table, tuple) else (table,)
+        with lock:
+            full_key = (
+                tables,
+                tuple(versions.get(name, 0) for name in tables),
+                key,
+            )
+            hit = full_key in cache
+            if hit:
+                counters["hits"] += 1
+                cache.move_to_end(full_key)
+                rows = cache[full_key][0]
+            else:
+                counters["misses"] += 1
+        metrics.count("cache_hits" if hit else "cache_misses")
+        if hit:
+            return rows
+        result = value_func()
+        if isinstance(result, Iterator):
+            return remember(full_key, result)
+        if result is not None:
+            store(full_key, result)
+        return result
+
+    def invalidate(table):
+        """Сделать устаревшими все результаты по таблице."""
+        with lock:
+            versions[table] = versions.get(table, 0) + 1
+            stale = [key for key in cache if table in key[0]]
+            for full_key in stale:
+                counters["bytes"] -= cache.pop(full_key)[1]
+
+    def stats():
+        """Счётчики кэша и его текущий размер."""
+        with lock:
+            return {**counters, "entries": len(cache)}
 
+    cache_result.invalidate = invalidate
+    cache_result.stats = stats
     return cache_result
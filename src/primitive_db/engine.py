@@ -1,35 +1,54 @@
 """Модуль запуска, игровой цикл и обработка команд."""
 
+import cProfile
 import shlex
 
 import prompt
 
-from src.primitive_db.constants import META_FILEPATH, PROMPT_TEXT
+from src.primitive_db import metrics
+from src.primitive_db.constants import (
+    DEFAULT_CODEC,
+    DEFAULT_INDEX_KIND,
+    FLUSH_POLICY,
+    PROMPT_TEXT,
+)
 from src.primitive_db.core import (
+    aggregate_records,
+    alter_table,
+    change_layout,
+    compress_table,
+    convert_table,
+    create_index,
     create_table,
     delete_records,
     display_records,
     drop_table,
-    insert_record,
+    export_records,
+    import_records,
+    insert_records,
     list_tables,
+    select_joined,
     select_records,
+    show_cache_stats,
+    show_metrics,
+    show_profile,
     show_table_info,
     update_records,
 )
-from src.primitive_db.decorators import create_cacher
+from src.primitive_db.decorators import create_cacher, set_auto_confirm
+from src.primitive_db.join import joined_schema
+from src.primitive_db.locking import LockTimeoutError
 from src.primitive_db.parser import (
+    aggregate_label,
+    parse_alter_args,
     parse_delete_args,
+    parse_export_args,
     parse_insert_args,
     parse_select_args,
     parse_update_args,
 )
-from src.primitive_db.utils import (
-    delete_table_data,
-    load_metadata,
-    load_table_data,
-    save_metadata,
-    save_table_data,
-)
+from src.primitive_db.query import normalize_condition
+from src.primitive_db.store import TableStore
 
 
 def print_help():
@@ -38,30 +57,89 @@ def print_help():
     print("Функции:")
     print(
         "<command> create_table <имя_таблицы> "
-        "<столбец1:тип> .. - создать таблицу"
+        "<столбец1:тип> .. [compress <zlib|lzma>] - создать таблицу"
     )
     print("<command> list_tables - показать список всех таблиц")
     print("<command> drop_table <имя_таблицы> - удалить таблицу")
+    print(
+        "<command> alter_table <имя_таблицы> add <столбец:тип> "
+        "[default <зн>] | drop <столбец> | rename <столбец> <новое_имя> "
+        "- изменить столбцы таблицы"
+    )
     print(
         "<command> insert into <имя_таблицы> values "
-        "(<зн1>, <зн2>, ...) - создать запись"
+        "(<зн1>, <зн2>, ...) [, (...)] - создать записи"
+    )
+    print(
+        "<command> import <имя_таблицы> <файл.csv|файл.jsonl> - "
+        "загрузить записи из файла"
+    )
+    print(
+        "<command> export <имя_таблицы> [where <условие>] to <файл> "
+        "format <csv|jsonl> - выгрузить записи в файл"
     )
     print(
-        "<command> select from <имя_таблицы> "
-        "[where <столбец> = <значение>] - прочитать записи"
+        "<command> select [<стб1>, <стб2> ...] from <имя_таблицы> "
+        "[where <условие>] [order by <стб> [asc|desc]] "
+        "[limit <N>] [offset <M>] - прочитать записи"
+    )
+    print(
+        "<command> select [<стб1>, ...] from <таблица1> join <таблица2> "
+        "on <таблица1>.<стб> = <таблица2>.<стб> [where <условие>] "
+        "[order by ...] [limit <N>] - соединить таблицы"
+    )
+    print(
+        "<command> select <стб>, count(*), sum(<стб>), avg(<стб>), "
+        "min(<стб>), max(<стб>) from <имя_таблицы> [where <условие>] "
+        "[group by <стб>, ...] - агрегаты по группам"
     )
     print(
         "<command> update <имя_таблицы> set <стб> = <зн> "
-        "where <стб> = <зн> - обновить запись"
+        "where <условие> - обновить запись"
     )
     print(
         "<command> delete from <имя_таблицы> "
-        "where <столбец> = <значение> - удалить запись"
+        "where <условие> - удалить запись"
+    )
+    print(
+        "    условие: <стб> <оператор> <значение>, операторы "
+        "= != < <= > >=, связки AND/OR и скобки"
     )
     print(
         "<command> info <имя_таблицы> - "
         "информация о таблице"
     )
+    print(
+        "<command> create_index <имя_таблицы> <столбец> "
+        "[hash|sorted] - создать индекс по столбцу"
+    )
+    print(
+        "<command> layout <имя_таблицы> <rows|columnar> - "
+        "сменить представление таблицы в памяти"
+    )
+    print(
+        "<command> convert <имя_таблицы> <json|binary> - "
+        "сменить формат файла данных"
+    )
+    print(
+        "<command> compress <имя_таблицы> <zlib|lzma|none> - "
+        "сжимать снимок таблицы (none - без сжатия)"
+    )
+    print(
+        "<command> cache_stats - статистика кэша select-запросов"
+    )
+    print(
+        "<command> stats [reset] - метрики и задержки операций "
+        "(reset - обнулить)"
+    )
+    print(
+        "<command> profile <команда> - выполнить команду "
+        "под cProfile и показать самые затратные функции"
+    )
+    print("\nТранзакции:")
+    print("<command> begin - начать транзакцию")
+    print("<command> commit - зафиксировать транзакцию")
+    print("<command> rollback - отменить транзакцию")
     print("\nОбщие команды:")
     print("<command> exit - выход из программы")
     print("<command> help - справочная информация\n")
@@ -75,196 +153,608 @@ def _check_table_exists(metadata, table_name):
     return True
 
 
-def run():
-    """Запустить основной цикл приложения."""
-    print_help()
-    cache_result = create_cacher()
+# Команды, которые сразу меняют файлы или схему и поэтому
+# не могут входить в транзакцию
+_NON_TRANSACTIONAL = {
+    "create_table",
+    "drop_table",
+    "alter_table",
+    "create_index",
+    "layout",
+    "convert",
+    "compress",
+    "import",
+}
 
-    while True:
-        metadata = load_metadata(META_FILEPATH)
-        user_input = prompt.string(PROMPT_TEXT)
 
-        if user_input is None:
-            continue
+def _insert_entry(records):
+    """Запись журнала о вставке одной или нескольких записей."""
+    if len(records) == 1:
+        return {"op": "insert", "record": dict(records[0])}
+    return {"op": "insert_many", "records": [dict(r) for r in records]}
 
-        user_input = user_input.strip()
-        if not user_input:
-            continue
 
-        command = user_input.split()[0].lower()
+def _select_joined(result, store, cache_result):
+    """Выполнить select ... join (см. core.select_joined)."""
+    metadata = store.metadata
+    table_name = result["table"]
+    join_name = result["join"]["table"]
+    if not _check_table_exists(metadata, join_name):
+        return
+    if result["aggregates"] is not None:
+        print("Ошибка: Агрегаты и group by вместе с join не поддерживаются.")
+        return
+    if store.refresh(join_name):
+        cache_result.invalidate(join_name)
+    cache_key = (
+        "join",
+        result["join"]["on"],
+        normalize_condition(result["where"]),
+        tuple(result["columns"] or ()),
+        tuple(result["order_by"]),
+        result["limit"],
+        result["offset"],
+    )
+    records = cache_result(
+        (table_name, join_name),
+        cache_key,
+        lambda: select_joined(
+            [
+                (table_name, store.get_table(table_name)),
+                (join_name, store.get_table(join_name)),
+            ],
+            result["join"]["on"],
+            result["where"],
+            result["columns"],
+            result["order_by"],
+            result["limit"],
+            result["offset"],
+        ),
+    )
+    columns = result["columns"]
+    if columns is None:
+        columns = joined_schema(
+            {
+                name: metadata[name]["columns"]
+                for name in (table_name, join_name)
+            }
+        )
+    if records is not None:
+        display_records(columns, records)
 
-        if command == "exit":
-            break
 
-        elif command == "help":
-            print_help()
+def execute_command(user_input, store, cache_result):
+    """Выполнить одну команду.
 
-        elif command == "create_table":
-            try:
-                args = shlex.split(user_input)
-            except ValueError:
-                print("Некорректный ввод. Попробуйте снова.")
-                continue
-            if len(args) < 3:
-                print(
-                    "Некорректное значение: недостаточно "
-                    "аргументов. Попробуйте снова."
-                )
-                continue
-            table_name = args[1]
-            columns = args[2:]
-            result = create_table(
-                metadata, table_name, columns
+    store — хранилище таблиц (TableStore), cache_result — кэш
+    select-запросов (см. create_cacher). Возвращает False для
+    команды exit, иначе True. Перед командой подхватываются
+    изменения метаданных, сделанные другими процессами. Время
+    и счётчики команды учитываются в метриках (см. metrics).
+    """
+    words = user_input.split()
+    if not words:
+        return True
+    try:
+        with metrics.command(words[0].lower()):
+            for table_name in store.refresh_metadata():
+                cache_result.invalidate(table_name)
+            return _dispatch(user_input, store, cache_result)
+    except LockTimeoutError as e:
+        print(f"Ошибка: {e} Попробуйте позже.")
+        return True
+
+
+def _dispatch(user_input, store, cache_result):
+    """Разобрать и выполнить команду (см. execute_command)."""
+    metadata = store.metadata
+    user_input = user_input.strip()
+    if not user_input:
+        return True
+
+    command = user_input.split()[0].lower()
+
+    if command == "exit":
+        return False
+
+    if store.in_transaction and command in _NON_TRANSACTIONAL:
+        print(
+            f"Команда {command} недоступна внутри транзакции. "
+            "Выполните commit или rollback."
+        )
+        return True
+
+    if command == "help":
+        print_help()
+
+    elif command == "create_table":
+        try:
+            args = shlex.split(user_input)
+        except ValueError:
+            print("Некорректный ввод. Попробуйте снова.")
+            return True
+        if len(args) < 3:
+            print(
+                "Некорректное значение: недостаточно "
+                "аргументов. Попробуйте снова."
             )
-            if result is not None:
-                metadata = result
-                save_metadata(META_FILEPATH, metadata)
-
-        elif command == "drop_table":
-            try:
-                args = shlex.split(user_input)
-            except ValueError:
-                print("Некорректный ввод. Попробуйте снова.")
-                continue
-            if len(args) < 2:
-                print(
-                    "Некорректное значение: не указано "
-                    "имя таблицы. Попробуйте снова."
-                )
-                continue
-            table_name = args[1]
-            if not _check_table_exists(metadata, table_name):
-                continue
-            result = drop_table(metadata, table_name)
-            if result is not None:
-                metadata = result
-                save_metadata(META_FILEPATH, metadata)
-                if table_name not in metadata:
-                    delete_table_data(table_name)
-                cache_result = create_cacher()
-
-        elif command == "list_tables":
-            list_tables(metadata)
-
-        elif command == "insert":
-            result = parse_insert_args(user_input)
-            if result is None:
-                print(
-                    "Некорректный синтаксис команды insert. "
-                    "Попробуйте снова."
-                )
-                continue
-            table_name, values = result
-            if not _check_table_exists(metadata, table_name):
-                continue
-            table_data = load_table_data(table_name)
-            result = insert_record(
-                metadata, table_name, values, table_data
+            return True
+        table_name = args[1]
+        columns = args[2:]
+        codec = DEFAULT_CODEC
+        if len(columns) >= 2 and columns[-2] == "compress":
+            columns, codec = columns[:-2], columns[-1]
+        result = create_table(
+            metadata, table_name, columns, codec
+        )
+        if result is not None:
+            store.save_metadata()
+
+    elif command == "drop_table":
+        try:
+            args = shlex.split(user_input)
+        except ValueError:
+            print("Некорректный ввод. Попробуйте снова.")
+            return True
+        if len(args) < 2:
+            print(
+                "Некорректное значение: не указано "
+                "имя таблицы. Попробуйте снова."
             )
-            if result is not None:
-                save_table_data(table_name, result)
-                cache_result = create_cacher()
+            return True
+        table_name = args[1]
+        if not _check_table_exists(metadata, table_name):
+            return True
+        result = drop_table(metadata, table_name)
+        if result is not None and table_name not in result:
+            store.drop_table(table_name)
+            cache_result.invalidate(table_name)
 
-        elif command == "select":
-            result = parse_select_args(user_input)
-            if result is None:
-                print(
-                    "Некорректный синтаксис команды select. "
-                    "Попробуйте снова."
-                )
-                continue
-            table_name, where_clause = result
-            if not _check_table_exists(metadata, table_name):
-                continue
-            cache_key = f"{table_name}|{where_clause}"
+    elif command == "list_tables":
+        list_tables(metadata)
+
+    elif command == "insert":
+        result = parse_insert_args(user_input)
+        if result is None:
+            print(
+                "Некорректный синтаксис команды insert. "
+                "Попробуйте снова."
+            )
+            return True
+        table_name, rows = result
+        if not _check_table_exists(metadata, table_name):
+            return True
+        records = insert_records(
+            metadata,
+            table_name,
+            rows,
+            store.get_table(table_name, for_write=True),
+        )
+        if records:
+            store.log_changes(table_name, [_insert_entry(records)])
+            cache_result.invalidate(table_name)
+
+    elif command == "import":
+        try:
+            args = shlex.split(user_input)
+        except ValueError:
+            print("Некорректный ввод. Попробуйте снова.")
+            return True
+        if len(args) < 3:
+            print(
+                "Некорректное значение: укажите таблицу "
+                "и файл. Попробуйте снова."
+            )
+            return True
+        table_name, filepath = args[1], args[2]
+        if not _check_table_exists(metadata, table_name):
+            return True
+
+        # Таблица остаётся заблокированной между пачками и до
+        # сворачивания журнала: иначе другой процесс успел бы
+        # вставить записи с теми же ID
+        def commit(records, table_name=table_name):
+            store.log_changes(table_name, [_insert_entry(records)])
+            store.flush(
+                compact=False, table_names=[table_name], release=False
+            )
+
+        total = import_records(
+            metadata,
+            table_name,
+            filepath,
+            store.get_table(table_name, for_write=True),
+            commit,
+        )
+        if total:
+            store.compact(table_name)
+            cache_result.invalidate(table_name)
+
+    elif command == "export":
+        result = parse_export_args(user_input)
+        if result is None:
+            print(
+                "Некорректный синтаксис команды export. "
+                "Попробуйте снова."
+            )
+            return True
+        table_name, where_clause, filepath, file_type = result
+        if not _check_table_exists(metadata, table_name):
+            return True
+        export_records(
+            store.get_table(table_name),
+            where_clause,
+            filepath,
+            file_type,
+        )
+
+    elif command == "select":
+        result = parse_select_args(user_input)
+        if result is None:
+            print(
+                "Некорректный синтаксис команды select. "
+                "Попробуйте снова."
+            )
+            return True
+        table_name = result["table"]
+        if not _check_table_exists(metadata, table_name):
+            return True
+        if store.refresh(table_name):
+            cache_result.invalidate(table_name)
+        if result["join"] is not None:
+            _select_joined(result, store, cache_result)
+            return True
+        aggregates = result["aggregates"]
+        cache_key = (
+            normalize_condition(result["where"]),
+            tuple(result["columns"] or ()),
+            tuple(aggregates or ()),
+            tuple(result["group_by"]),
+            tuple(result["order_by"]),
+            result["limit"],
+            result["offset"],
+        )
+        if aggregates is not None:
+            columns = [aggregate_label(item) for item in aggregates]
             records = cache_result(
+                table_name,
                 cache_key,
-                lambda: select_records(
-                    load_table_data(table_name), where_clause
+                lambda: aggregate_records(
+                    store.get_table(table_name),
+                    result["where"],
+                    aggregates,
+                    result["group_by"],
+                    result["order_by"],
+                    result["limit"],
+                    result["offset"],
                 ),
             )
-            columns = metadata[table_name]["columns"]
             if records is not None:
                 display_records(columns, records)
+            return True
+        records = cache_result(
+            table_name,
+            cache_key,
+            lambda: select_records(
+                store.get_table(table_name),
+                result["where"],
+                result["columns"],
+                result["order_by"],
+                result["limit"],
+                result["offset"],
+            ),
+        )
+        columns = metadata[table_name]["columns"]
+        if result["columns"] is not None:
+            columns = {
+                col: columns.get(col) for col in result["columns"]
+            }
+        if records is not None:
+            display_records(columns, records)
 
-        elif command == "update":
-            result = parse_update_args(user_input)
-            if result is None:
-                print(
-                    "Некорректный синтаксис команды update. "
-                    "Попробуйте снова."
-                )
-                continue
-            table_name, set_clause, where_clause = result
-            if not _check_table_exists(metadata, table_name):
-                continue
-            table_data = load_table_data(table_name)
-            result = update_records(
-                table_data, set_clause, where_clause
+    elif command == "update":
+        result = parse_update_args(user_input)
+        if result is None:
+            print(
+                "Некорректный синтаксис команды update. "
+                "Попробуйте снова."
             )
-            if result is not None:
-                table_data, updated_ids = result
-                if updated_ids:
-                    for uid in updated_ids:
-                        print(
-                            f"Запись с ID={uid} в таблице "
-                            f'"{table_name}" успешно обновлена.'
-                        )
-                    save_table_data(table_name, table_data)
-                    cache_result = create_cacher()
-                else:
+            return True
+        table_name, set_clause, where_clause = result
+        if not _check_table_exists(metadata, table_name):
+            return True
+        result = update_records(
+            store.get_table(table_name, for_write=True),
+            set_clause,
+            where_clause,
+        )
+        if result is not None:
+            _, updated_ids = result
+            if updated_ids:
+                for uid in updated_ids:
                     print(
-                        "Записи для обновления не найдены."
+                        f"Запись с ID={uid} в таблице "
+                        f'"{table_name}" успешно обновлена.'
                     )
-
-        elif command == "delete":
-            result = parse_delete_args(user_input)
-            if result is None:
+                store.log_changes(
+                    table_name,
+                    [{
+                        "op": "update",
+                        "ids": updated_ids,
+                        "set": set_clause,
+                    }],
+                )
+                cache_result.invalidate(table_name)
+            else:
                 print(
-                    "Некорректный синтаксис команды delete. "
-                    "Попробуйте снова."
+                    "Записи для обновления не найдены."
                 )
-                continue
-            table_name, where_clause = result
-            if not _check_table_exists(metadata, table_name):
-                continue
-            table_data = load_table_data(table_name)
-            result = delete_records(
-                table_data, where_clause
+
+    elif command == "delete":
+        result = parse_delete_args(user_input)
+        if result is None:
+            print(
+                "Некорректный синтаксис команды delete. "
+                "Попробуйте снова."
             )
-            if result is not None:
-                table_data, deleted_ids = result
-                if deleted_ids:
-                    for did in deleted_ids:
-                        print(
-                            f"Запись с ID={did} успешно "
-                            f"удалена из таблицы "
-                            f'"{table_name}".'
-                        )
-                    save_table_data(table_name, table_data)
-                    cache_result = create_cacher()
-                else:
+            return True
+        table_name, where_clause = result
+        if not _check_table_exists(metadata, table_name):
+            return True
+        result = delete_records(
+            store.get_table(table_name, for_write=True),
+            where_clause,
+        )
+        if result is not None:
+            _, deleted_ids = result
+            if deleted_ids:
+                for did in deleted_ids:
                     print(
-                        "Записи для удаления не найдены."
+                        f"Запись с ID={did} успешно "
+                        f"удалена из таблицы "
+                        f'"{table_name}".'
                     )
-
-        elif command == "info":
-            try:
-                args = shlex.split(user_input)
-            except ValueError:
-                print("Некорректный ввод. Попробуйте снова.")
-                continue
-            if len(args) < 2:
+                store.log_changes(
+                    table_name,
+                    [{"op": "delete", "ids": deleted_ids}],
+                )
+                cache_result.invalidate(table_name)
+            else:
                 print(
-                    "Некорректное значение: не указано "
-                    "имя таблицы. Попробуйте снова."
+                    "Записи для удаления не найдены."
                 )
-                continue
-            table_name = args[1]
-            if not _check_table_exists(metadata, table_name):
-                continue
-            table_data = load_table_data(table_name)
-            show_table_info(metadata, table_name, table_data)
 
+    elif command == "info":
+        try:
+            args = shlex.split(user_input)
+        except ValueError:
+            print("Некорректный ввод. Попробуйте снова.")
+            return True
+        if len(args) < 2:
+            print(
+                "Некорректное значение: не указано "
+                "имя таблицы. Попробуйте снова."
+            )
+            return True
+        table_name = args[1]
+        if not _check_table_exists(metadata, table_name):
+            return True
+        table = store.get_table(table_name)
+        file_stats = None
+        if metadata[table_name].get("codec"):
+            file_stats = store.file_stats(table_name)
+        show_table_info(metadata, table_name, table, file_stats)
+
+    elif command == "create_index":
+        try:
+            args = shlex.split(user_input)
+        except ValueError:
+            print("Некорректный ввод. Попробуйте снова.")
+            return True
+        if len(args) < 3:
+            print(
+                "Некорректное значение: укажите таблицу "
+                "и столбец. Попробуйте снова."
+            )
+            return True
+        table_name, column = args[1], args[2]
+        kind = args[3] if len(args) > 3 else DEFAULT_INDEX_KIND
+        if not _check_table_exists(metadata, table_name):
+            return True
+        result = create_index(
+            metadata,
+            table_name,
+            column,
+            store.get_table(table_name),
+            kind,
+        )
+        if result is not None:
+            store.save_metadata()
+
+    elif command == "layout":
+        try:
+            args = shlex.split(user_input)
+        except ValueError:
+            print("Некорректный ввод. Попробуйте снова.")
+            return True
+        if len(args) < 3:
+            print(
+                "Некорректное значение: укажите таблицу "
+                "и представление. Попробуйте снова."
+            )
+            return True
+        table_name, layout = args[1], args[2]
+        if not _check_table_exists(metadata, table_name):
+            return True
+        result = change_layout(metadata, table_name, layout)
+        if result is not None:
+            store.save_metadata()
+            store.change_layout(table_name)
+            cache_result.invalidate(table_name)
+
+    elif command == "alter_table":
+        result = parse_alter_args(user_input)
+        if result is None:
+            print(
+                "Некорректный синтаксис команды alter_table. "
+                "Попробуйте снова."
+            )
+            return True
+        table_name, change = result
+        if not _check_table_exists(metadata, table_name):
+            return True
+        change = alter_table(metadata, table_name, change)
+        if change is not None:
+            store.alter_table(table_name, change)
+            cache_result.invalidate(table_name)
+
+    elif command == "convert":
+        try:
+            args = shlex.split(user_input)
+        except ValueError:
+            print("Некорректный ввод. Попробуйте снова.")
+            return True
+        if len(args) < 3:
+            print(
+                "Некорректное значение: укажите таблицу "
+                "и формат. Попробуйте снова."
+            )
+            return True
+        table_name, table_format = args[1], args[2]
+        if not _check_table_exists(metadata, table_name):
+            return True
+        result = convert_table(
+            metadata,
+            table_name,
+            table_format,
+            lambda settings: store.compact(table_name, settings),
+        )
+        if result is not None:
+            store.save_metadata()
+
+    elif command == "compress":
+        try:
+            args = shlex.split(user_input)
+        except ValueError:
+            print("Некорректный ввод. Попробуйте снова.")
+            return True
+        if len(args) < 3:
+            print(
+                "Некорректное значение: укажите таблицу "
+                "и кодек. Попробуйте снова."
+            )
+            return True
+        table_name, codec = args[1], args[2]
+        if not _check_table_exists(metadata, table_name):
+            return True
+        result = compress_table(
+            metadata,
+            table_name,
+            codec,
+            lambda settings: store.compact(table_name, settings),
+        )
+        if result is not None:
+            store.save_metadata()
+
+    elif command == "begin":
+        if store.in_transaction:
+            print("Ошибка: Транзакция уже начата.")
+            return True
+        store.begin()
+        print("Транзакция начата.")
+
+    elif command == "commit":
+        if not store.in_transaction:
+            print("Ошибка: Нет активной транзакции.")
+            return True
+        store.commit()
+        print("Транзакция зафиксирована.")
+
+    elif command == "rollback":
+        if not store.in_transaction:
+            print("Ошибка: Нет активной транзакции.")
+            return True
+        for table_name in store.rollback():
+            cache_result.invalidate(table_name)
+        print("Транзакция отменена.")
+
+    elif command == "cache_stats":
+        show_cache_stats(cache_result.stats())
+
+    elif command == "stats":
+        args = user_input.split()
+        if len(args) > 1 and args[1].lower() == "reset":
+            metrics.reset()
+            print("Метрики обнулены.")
         else:
-            print(f"Функции {command} нет. Попробуйте снова.")
+            show_metrics(metrics.snapshot())
+
+    elif command == "profile":
+        inner = user_input[len(command):].strip()
+        if not inner:
+            print(
+                "Некорректное значение: не указана "
+                "команда. Попробуйте снова."
+            )
+            return True
+        profiler = cProfile.Profile()
+        result = profiler.runcall(_dispatch, inner, store, cache_result)
+        show_profile(profiler)
+        return result
+
+    else:
+        print(f"Функции {command} нет. Попробуйте снова.")
+
+    return True
+
+
+def open_store(flush_policy=FLUSH_POLICY):
+    """Открыть хранилище и сообщить о восстановлении после сбоя."""
+    store = TableStore(flush_policy=flush_policy)
+    for filepath in store.recovered:
+        print(f"Восстановление после сбоя: обработан файл {filepath}")
+    return store
+
+
+def close_store(store):
+    """Сбросить изменения, отменив незавершённую транзакцию."""
+    if store.in_transaction:
+        print("Незавершённая транзакция отменена.")
+    store.close()
+
+
+def run():
+    """Запустить основной цикл приложения."""
+    print_help()
+    cache_result = create_cacher()
+    store = open_store()
+
+    try:
+        while True:
+            user_input = prompt.string(PROMPT_TEXT)
+            if user_input is None:
+                continue
+            with store.command():
+                if not execute_command(user_input, store, cache_result):
+                    break
+    finally:
+        close_store(store)
+
+
+def run_batch(commands, assume_yes=False):
+    """Выполнить команды без интерактивного ввода.
+
+    commands — итерируемый набор строк-команд (строки файла,
+    stdin или аргументы -c). Таблицы остаются в памяти на всё
+    время работы, а изменения сбрасываются на диск один раз
+    в конце. assume_yes=True отвечает «да» на все подтверждения.
+    """
+    set_auto_confirm(assume_yes)
+    cache_result = create_cacher()
+    store = open_store(flush_policy="exit")
+    try:
+        for user_input in commands:
+            if not execute_command(user_input, store, cache_result):
+                break
+    finally:
+        close_store(store)
@@ -0,0 +1,254 @@
+"""Индексы по столбцам.
+
+Хеш-индекс — словарь значение → множество ID записей, служит
+для условий на равенство. Упорядоченный индекс (SortedIndex)
+хранит пары (значение, ID) по возрастанию и служит для
+диапазонов и order by.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+from src.primitive_db.constants import ID_COLUMN, SORTED_BLOCK_SIZE
+
+# Больше любого ID: (v, _AFTER_ALL) идёт после всех пар (v, ID)
+_AFTER_ALL = float("inf")
+
+
+def build_index(table_data, column):
+    """Построить индекс по столбцу для всех записей таблицы."""
+    index = {}
+    for record in table_data:
+        if column in record:
+            index.setdefault(record[column], set()).add(
+                record[ID_COLUMN]
+            )
+    return index
+
+
+def index_insert(indexes, record):
+    """Добавить запись во все индексы таблицы."""
+    for column, index in indexes.items():
+        if column in record:
+            index.setdefault(record[column], set()).add(
+                record[ID_COLUMN]
+            )
+
+
+def index_remove(indexes, record):
+    """Удалить запись из всех индексов таблицы."""
+    for column, index in indexes.items():
+        if column not in record:
+            continue
+        ids = index.get(record[column])
+        if ids is None:
+            continue
+        ids.discard(record[ID_COLUMN])
+        if not ids:
+            del index[record[column]]
+
+
+def lookup_ids(indexes, where_clause):
+    """Найти ID записей по индексированным столбцам условия.
+
+    Возвращает пересечение множеств ID для всех индексированных
+    столбцов из where_clause или None, если ни один столбец
+    условия не проиндексирован.
+    """
+    result = None
+    for column, value in where_clause.items():
+        if column not in indexes:
+            continue
+        ids = indexes[column].get(value, set())
+        result = set(ids) if result is None else result & ids
+        if not result:
+            break
+    return result
+
+
+def dump_indexes(indexes):
+    """Преобразовать индексы в JSON-совместимую структуру."""
+    return {
+        column: [[value, sorted(ids)] for value, ids in index.items()]
+        for column, index in indexes.items()
+    }
+
+
+def restore_indexes(dumped):
+    """Восстановить индексы из JSON-совместимой структуры."""
+    return {
+        column: {value: set(ids) for value, ids in pairs}
+        for column, pairs in dumped.items()
+    }
+
+
+class SortedIndex:
+    """Упорядоченный индекс: пары (значение, ID) по возрастанию.
+
+    Пары хранятся двухуровневой структурой в духе B-дерева:
+    список блоков длиной до 2 * SORTED_BLOCK_SIZE и список
+    максимумов блоков. Поиск границы — два бинарных поиска,
+    вставка и удаление затрагивают один блок.
+    """
+
+    def __init__(self, pairs=()):
+        pairs = sorted(pairs)
+        self._blocks = [
+            pairs[i:i + SORTED_BLOCK_SIZE]
+            for i in range(0, len(pairs), SORTED_BLOCK_SIZE)
+        ]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._len = len(pairs)
+
+    def __len__(self):
+        return self._len
+
+    def add(self, value, record_id):
+        """Добавить пару (значение, ID)."""
+        item = (value, record_id)
+        self._len += 1
+        if not self._blocks:
+            self._blocks.append([item])
+            self._maxes.append(item)
+            return
+        i = min(bisect_left(self._maxes, item), len(self._blocks) - 1)
+        block = self._blocks[i]
+        insort(block, item)
+        self._maxes[i] = block[-1]
+        if len(block) > 2 * SORTED_BLOCK_SIZE:
+            half = len(block) // 2
+            self._blocks[i:i + 1] = [block[:half], block[half:]]
+            self._maxes[i:i + 1] = [block[half - 1], block[-1]]
+
+    def remove(self, value, record_id):
+        """Удалить пару (значение, ID), если она есть."""
+        item = (value, record_id)
+        i = bisect_left(self._maxes, item)
+        if i == len(self._blocks):
+            return
+        block = self._blocks[i]
+        j = bisect_left(block, item)
+        if j == len(block) or block[j] != item:
+            return
+        del block[j]
+        self._len -= 1
+        if block:
+            self._maxes[i] = block[-1]
+        else:
+            del self._blocks[i]
+            del self._maxes[i]
+
+    def _locate(self, key, after):
+        """Позиция (блок, смещение) первой пары >= key (> key при after)."""
+        find = bisect_right if after else bisect_left
+        i = find(self._maxes, key)
+        if i == len(self._blocks):
+            return i, 0
+        return i, find(self._blocks[i], key)
+
+    def irange(
+        self,
+        low=None,
+        high=None,
+        low_inclusive=True,
+        high_inclusive=True,
+        reverse=False,
+    ):
+        """Выдать ID записей со значениями в диапазоне [low, high].
+
+        Границы None означают отсутствие ограничения. Работает
+        за O(log n + k), где k — число выданных ID.
+        """
+        if low is None:
+            start = (0, 0)
+        elif low_inclusive:
+            start = self._locate((low,), after=False)
+        else:
+            start = self._locate((low, _AFTER_ALL), after=True)
+        if high is None:
+            stop = (len(self._blocks), 0)
+        elif high_inclusive:
+            stop = self._locate((high, _AFTER_ALL), after=True)
+        else:
+            stop = self._locate((high,), after=False)
+
+        spans = []
+        for i in range(start[0], min(stop[0], len(self._blocks) - 1) + 1):
+            lo = start[1] if i == start[0] else 0
+            hi = stop[1] if i == stop[0] else len(self._blocks[i])
+            if lo < hi:
+                spans.append((i, lo, hi))
+
+        if reverse:
+            for i, lo, hi in reversed(spans):
+                block = self._blocks[i]
+                for j in range(hi - 1, lo - 1, -1):
+                    yield block[j][1]
+        else:
+            for i, lo, hi in spans:
+                for _, record_id in self._blocks[i][lo:hi]:
+                    yield record_id
+
+
+def build_sorted_index(table, column):
+    """Построить упорядоченный индекс по столбцу таблицы."""
+    return SortedIndex(
+        (record[column], record[ID_COLUMN])
+        for record in table
+        if column in record
+    )
+
+
+def sorted_insert(sorted_indexes, record):
+    """Добавить запись во все упорядоченные индексы таблицы."""
+    for column, index in sorted_indexes.items():
+        if column in record:
+            index.add(record[column], record[ID_COLUMN])
+
+
+def sorted_remove(sorted_indexes, record):
+    """Удалить запись из всех упорядоченных индексов таблицы."""
+    for column, index in sorted_indexes.items():
+        if column in record:
+            index.remove(record[column], record[ID_COLUMN])
+
+
+def _comparable(value, col_type):
+    """Можно ли сравнивать значение с ключами индекса по типу."""
+    if col_type == "str":
+        return isinstance(value, str)
+    return isinstance(value, int)
+
+
+def range_bounds(parts, sorted_indexes, schema):
+    """Найти границы диапазона для упорядоченного индекса.
+
+    parts — сравнения условия, соединённые через AND. Возвращает
+    (столбец, low, high, low_inclusive, high_inclusive) для первого
+    столбца с упорядоченным индексом или None.
+    """
+    for column in sorted_indexes:
+        low = high = None
+        low_inc = high_inc = True
+        found = False
+        for part in parts:
+            if part[0] != "cmp" or part[2] != column:
+                continue
+            _, op, _, value = part
+            if op == "!=" or not _comparable(value, schema[column]):
+                continue
+            found = True
+            if op in (">", ">=", "="):
+                inclusive = op != ">"
+                if low is None or value > low or (
+                    value == low and not inclusive
+                ):
+                    low, low_inc = value, inclusive
+            if op in ("<", "<=", "="):
+                inclusive = op != "<"
+                if high is None or value < high or (
+                    value == high and not inclusive
+                ):
+                    high, high_inc = value, inclusive
+        if found:
+            return column, low, high, low_inc, high_inc
+    return None
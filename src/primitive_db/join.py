@@ -0,0 +1,192 @@
+"""Соединение двух таблиц по равенству столбцов (hash join).
+
+Запрос select ... from a join b on a.x = b.y выполняется за
+O(n + m): по одной стороне строится хеш-таблица значение →
+записи, другая сторона перебирается потоком, и пары для каждой
+её записи находятся одним обращением к словарю. Хеш-таблица
+строится по меньшей таблице. Если столбец соединения одной из
+таблиц — ID или по нему есть хеш-индекс, хеш-таблицей служит
+он сам, и строить её не нужно.
+
+Столбцы результата называются <таблица>.<столбец>; в запросе
+имя таблицы можно не писать, если столбец есть только в одной
+из них. Части условия where, соединённые через AND и
+относящиеся к одной таблице, проверяются ещё при переборе этой
+таблицы (и сужают его через ID и индексы); остальное —
+на соединённых записях. Значения None ни с чем не соединяются.
+"""
+
+from src.primitive_db import metrics
+from src.primitive_db.constants import ID_COLUMN
+from src.primitive_db.query import (
+    combine,
+    compile_condition,
+    condition_columns,
+    conjuncts,
+    rename_columns,
+)
+
+
+def joined_schema(schemas):
+    """Схема результата: {<таблица>.<столбец>: тип}.
+
+    schemas — {таблица: схема} в порядке from ... join.
+    """
+    return {
+        f"{name}.{column}": col_type
+        for name, schema in schemas.items()
+        for column, col_type in schema.items()
+    }
+
+
+def resolve_column(column, schemas):
+    """Найти столбец запроса: вернуть пару (таблица, столбец)."""
+    name, dot, rest = column.partition(".")
+    if dot and name in schemas:
+        if rest in schemas[name]:
+            return name, rest
+        raise ValueError(f'Столбец "{column}" не существует.')
+    owners = [name for name, schema in schemas.items() if column in schema]
+    if len(owners) > 1:
+        raise ValueError(
+            f'Столбец "{column}" есть в нескольких таблицах, '
+            f"укажите <таблица>.{column}."
+        )
+    if not owners:
+        raise ValueError(f'Столбец "{column}" не существует.')
+    return owners[0], column
+
+
+def qualify(column, schemas):
+    """Полное имя столбца запроса: <таблица>.<столбец>."""
+    return "{}.{}".format(*resolve_column(column, schemas))
+
+
+def split_condition(where_clause, schemas):
+    """Разделить условие между таблицами и соединёнными записями.
+
+    Возвращает ({таблица: условие с её столбцами без имени
+    таблицы или None}, условие на соединённых записях с полными
+    именами столбцов или None).
+    """
+    pushed = {name: [] for name in schemas}
+    rest = []
+    for part in conjuncts(where_clause):
+        resolved = {
+            column: resolve_column(column, schemas)
+            for column in condition_columns(part)
+        }
+        owners = {name for name, _ in resolved.values()}
+        if len(owners) == 1:
+            names = {column: col for column, (_, col) in resolved.items()}
+            pushed[owners.pop()].append(rename_columns(part, names))
+        else:
+            names = {
+                column: f"{name}.{col}"
+                for column, (name, col) in resolved.items()
+            }
+            rest.append(rename_columns(part, names))
+    pushed = {name: combine(parts) for name, parts in pushed.items()}
+    return pushed, combine(rest)
+
+
+def _has_index(side):
+    """Можно ли искать записи стороны по значению без перебора."""
+    _, table, column, _ = side
+    return column == ID_COLUMN or column in table.indexes
+
+
+def _probe(table, column, value):
+    """Записи таблицы со значением value в столбце по ID или индексу."""
+    if column == ID_COLUMN:
+        record = table.get(value)
+        return [] if record is None else [record]
+    ids = table.indexes[column].get(value)
+    if not ids:
+        return []
+    return [table.get(record_id) for record_id in sorted(ids)]
+
+
+def _build(side, scan):
+    """Хеш-таблица стороны: значение столбца → список записей."""
+    _, table, column, where_clause = side
+    buckets = {}
+    for record in scan(table, where_clause):
+        value = record.get(column)
+        if value is None:
+            continue
+        if value in buckets:
+            buckets[value].append(record)
+        else:
+            buckets[value] = [record]
+    return buckets
+
+
+def join_pairs(sides, scan):
+    """Лениво выдавать пары соединённых записей (левая, правая).
+
+    sides — две стороны соединения в порядке from ... join, каждая
+    (имя, таблица, столбец соединения, условие только по этой
+    таблице или None). scan(table, where_clause) перебирает
+    записи таблицы по условию. Пары идут в порядке перебираемой
+    стороны: если по ID или хеш-индексу можно искать на одной из
+    сторон (из двух — на большей), перебирается другая, иначе
+    хеш-таблица строится по меньшей таблице.
+    """
+    indexed = [n for n, side in enumerate(sides) if _has_index(side)]
+    if indexed:
+        build = max(indexed, key=lambda n: len(sides[n][1]))
+    else:
+        build = min((0, 1), key=lambda n: len(sides[n][1]))
+    stream = 1 - build
+    _, build_table, build_column, build_where = sides[build]
+    _, stream_table, stream_column, stream_where = sides[stream]
+
+    if indexed:
+        predicate = compile_condition(build_where)
+        probed = 0
+
+        def matches(value):
+            nonlocal probed
+            found = _probe(build_table, build_column, value)
+            probed += len(found)
+            return [record for record in found if predicate(record)]
+    else:
+        matches = _build(sides[build], scan).get
+        probed = 0
+
+    try:
+        for record in scan(stream_table, stream_where):
+            value = record.get(stream_column)
+            if value is None:
+                continue
+            for other in matches(value) or ():
+                if stream == 0:
+                    yield record, other
+                else:
+                    yield other, record
+    finally:
+        metrics.count("rows_scanned", probed)
+
+
+def join_records(sides, scan, where_clause=None):
+    """Лениво выдавать соединённые записи {<таблица>.<столбец>: зн}.
+
+    sides и scan — как в join_pairs; where_clause — условие на
+    соединённых записях с полными именами столбцов.
+    """
+    (left_name, left, _, _), (right_name, right, _, _) = sides
+    left_names = {column: f"{left_name}.{column}" for column in left.schema}
+    right_names = {
+        column: f"{right_name}.{column}" for column in right.schema
+    }
+    predicate = None
+    if where_clause is not None:
+        predicate = compile_condition(where_clause)
+    for left_record, right_record in join_pairs(sides, scan):
+        record = {left_names[k]: v for k, v in left_record.items()}
+        record.update(
+            (right_names[k], v) for k, v in right_record.items()
+        )
+        if predicate is None or predicate(record):
+            yield record
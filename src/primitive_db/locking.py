@@ -0,0 +1,98 @@
+"""Межпроцессные блокировки файлов таблиц и метаданных.
+
+Используются рекомендательные блокировки fcntl.flock на отдельных
+файлах <файл>.lock: сами файлы данных заменяются атомарно
+(os.replace), и блокировка на них терялась бы вместе со старым
+файлом. Разделяемая блокировка берётся на время чтения с диска,
+исключительная — на время изменения таблицы и записи на диск.
+
+Без модуля fcntl (Windows) блокировки ничего не делают.
+"""
+
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from src.primitive_db.constants import LOCK_FILE_EXT, LOCK_TIMEOUT
+
+_POLL_INTERVAL = 0.05
+
+
+class LockTimeoutError(Exception):
+    """Блокировку не удалось получить за отведённое время."""
+
+
+class FileLock:
+    """Блокировка «читатели/писатель» на файле path + LOCK_FILE_EXT."""
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path = path + LOCK_FILE_EXT
+        self.timeout = timeout
+        self._fd = None
+
+    @property
+    def locked(self):
+        """Держит ли блокировку этот объект."""
+        return self._fd is not None
+
+    def acquire(self, exclusive=True):
+        """Получить блокировку, ожидая не дольше timeout секунд."""
+        if fcntl is None or self._fd is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(fd, mode | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise LockTimeoutError(
+                        f"Файл {self.path} заблокирован другим процессом."
+                    ) from None
+                time.sleep(_POLL_INTERVAL)
+        self._fd = fd
+
+    def release(self):
+        """Снять блокировку, если она взята."""
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def shared(self):
+        """Контекст разделяемой блокировки (на время чтения)."""
+        return _Held(self, exclusive=False)
+
+    def exclusive(self):
+        """Контекст исключительной блокировки (на время записи)."""
+        return _Held(self, exclusive=True)
+
+
+class _Held:
+    """Контекст, снимающий только ту блокировку, которую взял сам."""
+
+    def __init__(self, lock, exclusive):
+        self._lock = lock
+        self._exclusive = exclusive
+        self._taken = False
+
+    def __enter__(self):
+        if not self._lock.locked:
+            self._lock.acquire(self._exclusive)
+            self._taken = True
+        return self._lock
+
+    def __exit__(self, *exc_info):
+        if self._taken:
+            self._lock.release()
@@ -1,12 +1,94 @@
 #!/usr/bin/env python3
 """Точка входа в приложение Primitive Database."""
 
-from src.primitive_db.engine import run
+import argparse
+import sys
 
+from src.primitive_db import metrics
+from src.primitive_db.constants import (
+    FILE_ENCODING,
+    METRICS_FILE,
+    SERVER_HOST,
+    SERVER_PORT,
+)
+from src.primitive_db.engine import run, run_batch
+from src.primitive_db.server import run_server
 
-def main():
+
+def _parse_args(argv):
+    """Разобрать аргументы командной строки."""
+    parser = argparse.ArgumentParser(
+        prog="project",
+        description=(
+            "Primitive Database. Без аргументов запускается "
+            "интерактивный режим; если stdin не терминал, команды "
+            "читаются из него построчно."
+        ),
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "-f",
+        "--file",
+        help="выполнить команды из файла (по одной на строку)",
+    )
+    source.add_argument(
+        "-c",
+        dest="commands",
+        action="append",
+        metavar="COMMAND",
+        help="выполнить команду (можно указать несколько раз)",
+    )
+    source.add_argument(
+        "--serve",
+        action="store_true",
+        help="запустить сервер для клиентов (см. client.py)",
+    )
+    parser.add_argument("--host", default=SERVER_HOST, help="адрес сервера")
+    parser.add_argument(
+        "--port", type=int, default=SERVER_PORT, help="порт сервера"
+    )
+    parser.add_argument(
+        "--socket",
+        help="путь к Unix-сокету (вместо TCP)",
+    )
+    parser.add_argument(
+        "-y",
+        "--yes",
+        action="store_true",
+        help="подтверждать удаление без вопросов",
+    )
+    parser.add_argument(
+        "--metrics",
+        default=METRICS_FILE,
+        metavar="FILE",
+        help="дописывать метрики каждой команды в файл JSON Lines",
+    )
+    return parser.parse_args(argv)
+
+
+def _script_lines(lines):
+    """Строки скрипта без пустых строк и комментариев (# или --)."""
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith(("#", "--")):
+            yield line
+
+
+def main(argv=None):
     """Запустить приложение базы данных."""
-    run()
+    args = _parse_args(argv)
+    metrics.set_output(args.metrics)
+    if args.serve:
+        run_server(args.host, args.port, args.socket)
+    elif args.file is not None:
+        with open(args.file, encoding=FILE_ENCODING) as f:
+            run_batch(_script_lines(f), args.yes)
+    elif args.commands:
+        run_batch(args.commands, args.yes)
+    elif not sys.stdin.isatty():
+        run_batch(_script_lines(sys.stdin), args.yes)
+    else:
+        run()
 
 
 if __name__ == "__main__":
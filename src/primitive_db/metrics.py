@@ -0,0 +1,226 @@
+"""Метрики выполнения: счётчики и гистограммы задержек.
+
+Метрики собираются на весь процесс (команда stats) и отдельно
+для текущей команды: если задан файл метрик (set_output),
+после каждой команды в него дописывается строка JSON с её
+временами и счётчиками. Имена метрик:
+
+- command.<команда> — полное время команды;
+- parse — разбор аргументов команды;
+- load — загрузка таблицы с диска, serialize — запись на диск;
+- filter — перебор записей по условию where;
+- select_records, insert_records, ... — время функций с log_time;
+- rows_scanned / rows_returned — просмотрено и выдано записей;
+- rows_loaded — загружено записей с диска;
+- cache_hits / cache_misses — обращения к кэшу select.
+
+Метрики можно собирать из нескольких потоков (режим сервера).
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from src.primitive_db.constants import FILE_ENCODING
+
+# Верхние границы корзин гистограммы в секундах: 1 мкс · 2^k
+_BUCKETS = [2 ** k / 1_000_000 for k in range(27)]
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_local = threading.local()
+_output = None
+
+
+class Histogram:
+    """Гистограмма задержек с корзинами по степеням двойки."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        """Учесть одно наблюдение."""
+        low, high = 0, len(_BUCKETS)
+        while low < high:
+            mid = (low + high) // 2
+            if seconds <= _BUCKETS[mid]:
+                high = mid
+            else:
+                low = mid + 1
+        self.buckets[low] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, fraction):
+        """Оценка перцентиля: верхняя граница нужной корзины."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bucket, hits in enumerate(self.buckets):
+            seen += hits
+            if hits and seen >= rank:
+                if bucket == len(_BUCKETS):
+                    return self.max
+                return min(_BUCKETS[bucket], self.max)
+        return self.max
+
+    def to_dict(self):
+        """Сводка гистограммы в секундах."""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+def set_output(filepath):
+    """Дописывать метрики каждой команды в файл JSON Lines.
+
+    None — не записывать.
+    """
+    global _output
+    _output = filepath
+
+
+def _current():
+    """Метрики текущей команды этого потока или None."""
+    return getattr(_local, "record", None)
+
+
+def count(name, amount=1):
+    """Увеличить счётчик name."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+    record = _current()
+    if record is not None:
+        counters = record["counters"]
+        counters[name] = counters.get(name, 0) + amount
+
+
+def observe(name, seconds):
+    """Учесть длительность операции name в секундах."""
+    with _lock:
+        if name not in _histograms:
+            _histograms[name] = Histogram()
+        _histograms[name].observe(seconds)
+    record = _current()
+    if record is not None:
+        timings = record["timings"]
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timer(name):
+    """Замерить время блока и учесть его как name."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """Фабрика декораторов: замерять каждый вызов функции как name."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_iter(name, items):
+    """Выдавать элементы items, учитывая как name время их получения.
+
+    Время потребителя между элементами не учитывается.
+    """
+    items = iter(items)
+    clock = time.perf_counter
+    spent = 0.0
+    try:
+        while True:
+            start = clock()
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                spent += clock() - start
+            yield item
+    finally:
+        observe(name, spent)
+
+
+def counted(name, items):
+    """Выдавать элементы items, прибавив их число к счётчику name."""
+    total = 0
+    try:
+        for item in items:
+            total += 1
+            yield item
+    finally:
+        count(name, total)
+
+
+@contextmanager
+def command(name):
+    """Собирать метрики команды name.
+
+    По завершении время команды учитывается как command.<name>
+    и, если задан файл метрик, в него дописывается строка JSON.
+    """
+    record = {"timings": {}, "counters": {}}
+    _local.record = record
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        elapsed = time.perf_counter() - start
+        _local.record = None
+        observe(f"command.{name}", elapsed)
+        if _output is not None:
+            line = json.dumps(
+                {
+                    "time": time.time(),
+                    "command": name,
+                    "seconds": elapsed,
+                    **record,
+                },
+                ensure_ascii=False,
+            )
+            with open(_output, "a", encoding=FILE_ENCODING) as f:
+                f.write(line + "\n")
+
+
+def snapshot():
+    """Текущие значения счётчиков и сводки гистограмм."""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "histograms": {
+                name: histogram.to_dict()
+                for name, histogram in _histograms.items()
+            },
+        }
+
+
+def reset():
+    """Обнулить все метрики процесса."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
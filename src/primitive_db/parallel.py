@@ -0,0 +1,102 @@
+"""Параллельная фильтрация больших таблиц в пуле процессов.
+
+Таблица делится на пачки строк по PARALLEL_CHUNK_SIZE. В рабочий
+процесс передаются дерево условия (см. модуль query) и значения
+только тех столбцов, которые в нём упомянуты; обратно приходят
+позиции подошедших строк. Результаты пачек склеиваются в исходном
+порядке строк, поэтому вывод совпадает с последовательным scan.
+"""
+
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+
+from src.primitive_db import metrics
+from src.primitive_db.constants import (
+    PARALLEL_CHUNK_SIZE,
+    PARALLEL_THRESHOLD,
+    PARALLEL_WORKERS,
+)
+from src.primitive_db.query import compile_condition, condition_columns
+
+_executor = None
+
+
+def _get_executor():
+    """Пул процессов, создаваемый при первом обращении."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PARALLEL_WORKERS)
+        atexit.register(shutdown)
+    return _executor
+
+
+def shutdown():
+    """Остановить пул процессов, если он был запущен."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def _match_chunk(where_clause, start, columns):
+    """Найти позиции строк пачки, подходящих под условие.
+
+    Выполняется в рабочем процессе. columns — {столбец: значения
+    строк пачки}; None означает отсутствующее значение. Условие
+    проверяется прямо по кортежам значений, без сборки словарей.
+    """
+    predicate = compile_condition(where_clause, list(columns))
+    return [
+        start + offset
+        for offset, values in enumerate(zip(*columns.values()))
+        if predicate(values)
+    ]
+
+
+def use_parallel(table, where_clause):
+    """Проверить, стоит ли фильтровать таблицу в пуле процессов.
+
+    Пул окупается только на полном переборе большой таблицы,
+    поэтому таблица спрашивает об этом, лишь когда условие
+    не сужается по ID или индексу; при числе строк меньше
+    PARALLEL_THRESHOLD используется обычный scan.
+    """
+    return (
+        where_clause is not None
+        and PARALLEL_WORKERS != 1
+        and len(table) >= PARALLEL_THRESHOLD
+    )
+
+
+def parallel_positions(
+    table, where_clause, chunk_size=PARALLEL_CHUNK_SIZE, executor=None
+):
+    """Позиции строк, подходящих под условие, по возрастанию.
+
+    executor — свой пул процессов (например, для замеров);
+    по умолчанию используется общий пул модуля.
+    """
+    names = sorted(condition_columns(where_clause))
+    starts = range(0, len(table), chunk_size)
+    executor = executor or _get_executor()
+    futures = [
+        executor.submit(
+            _match_chunk,
+            where_clause,
+            start,
+            table.column_slice(names, start, start + chunk_size),
+        )
+        for start in starts
+    ]
+    positions = []
+    for future in futures:
+        positions.extend(future.result())
+    return positions
+
+
+def parallel_scan(table, where_clause, chunk_size=PARALLEL_CHUNK_SIZE):
+    """Выдавать записи, подходящие под условие, в порядке таблицы."""
+    positions = parallel_positions(table, where_clause, chunk_size)
+    metrics.count("rows_scanned", len(table))
+    for pos in positions:
+        yield table[pos]
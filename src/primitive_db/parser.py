@@ -1,4 +1,14 @@
-"""Парсер команд — разбор where, set и values."""
+"""Парсер команд — разбор where, set и values.
+
+Команды insert, select, update и delete разбираются
+токенизатором и рекурсивным спуском; условие where превращается
+в дерево (см. модуль query).
+"""
+
+import re
+
+from src.primitive_db.constants import AGGREGATE_FUNCTIONS
+from src.primitive_db.metrics import timed
 
 
 def parse_value(value_str):
@@ -31,124 +41,428 @@ def parse_value(value_str):
     return value_str
 
 
-def parse_condition(condition_str):
-    """Разобрать условие 'столбец = значение' в словарь.
+class _Tokens:
+    """Поток токенов команды для рекурсивного спуска."""
 
-    Пример: 'age = 28' → {'age': 28}
-    """
-    parts = condition_str.split("=", 1)
-    if len(parts) != 2:
-        return None
-    col = parts[0].strip()
-    val = parse_value(parts[1].strip())
-    if not col or val is None:
+    def __init__(self, raw_input):
+        self.items = tokenize(raw_input)
+        self.pos = 0
+
+    def peek(self, ahead=0):
+        """Токен через ahead позиций от текущего или None."""
+        if self.pos + ahead < len(self.items):
+            return self.items[self.pos + ahead]
         return None
-    return {col: val}
 
+    def next(self):
+        """Забрать текущий токен; в конце ввода — ошибка."""
+        token = self.peek()
+        if token is None:
+            raise SyntaxError("неожиданный конец команды")
+        self.pos += 1
+        return token
+
+    def at_keyword(self, *words):
+        """Проверить, что текущий токен — одно из ключевых слов."""
+        token = self.peek()
+        return (
+            token is not None
+            and token[0] == "word"
+            and token[1].lower() in words
+        )
+
+    def accept(self, kind, text=None):
+        """Забрать токен, если он совпадает с ожидаемым."""
+        token = self.peek()
+        if token is None or token[0] != kind:
+            return False
+        if text is not None and token[1].lower() != text:
+            return False
+        self.pos += 1
+        return True
+
+    def expect(self, kind, text=None):
+        """Забрать ожидаемый токен или сообщить об ошибке."""
+        if not self.accept(kind, text):
+            raise SyntaxError(f"ожидается {text or kind}")
+        return self.items[self.pos - 1][1]
 
+    def done(self):
+        """Проверить, что вся команда разобрана."""
+        return self.peek() is None
+
+
+_TOKEN_RE = re.compile(
+    r"""\s*(?:
+        (?P<string>"[^"]*"|'[^']*')
+      | (?P<op><=|>=|!=|<>|=|<|>)
+      | (?P<punct>[(),*])
+      | (?P<word>[^\s()<>=!,*"']+)
+    )""",
+    re.VERBOSE,
+)
+
+_KEYWORDS = {
+    "and", "or", "where", "order", "by", "limit", "offset",
+    "asc", "desc", "from", "set", "into", "values", "group",
+    "join", "on",
+}
+
+
+def tokenize(raw_input):
+    """Разбить команду на токены (вид, текст).
+
+    Виды: string (в кавычках), op (сравнение), punct (скобки,
+    запятая, звёздочка), word (имена, числа, ключевые слова).
+    """
+    tokens = []
+    pos = 0
+    raw_input = raw_input.rstrip()
+    while pos < len(raw_input):
+        match = _TOKEN_RE.match(raw_input, pos)
+        if match is None or match.end() == pos:
+            raise SyntaxError(f"непонятный символ в позиции {pos}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "op" and text == "<>":
+            text = "!="
+        tokens.append((kind, text))
+        pos = match.end()
+    return tokens
+
+
+def _parse_name(tokens):
+    """Разобрать имя таблицы или столбца."""
+    token = tokens.next()
+    if token[0] != "word" or token[1].lower() in _KEYWORDS:
+        raise SyntaxError("ожидается имя")
+    return token[1]
+
+
+def _parse_literal(tokens):
+    """Разобрать значение: строку в кавычках, число или bool."""
+    kind, text = tokens.next()
+    if kind not in ("string", "word"):
+        raise SyntaxError("ожидается значение")
+    return parse_value(text)
+
+
+def _parse_comparison(tokens):
+    """comparison := '(' expr ')' | имя оператор значение."""
+    if tokens.accept("punct", "("):
+        node = _parse_or(tokens)
+        tokens.expect("punct", ")")
+        return node
+    column = _parse_name(tokens)
+    op = tokens.expect("op")
+    return ("cmp", op, column, _parse_literal(tokens))
+
+
+def _parse_and(tokens):
+    """and_expr := comparison (AND comparison)*."""
+    node = _parse_comparison(tokens)
+    while tokens.accept("word", "and"):
+        node = ("and", node, _parse_comparison(tokens))
+    return node
+
+
+def _parse_or(tokens):
+    """expr := and_expr (OR and_expr)*."""
+    node = _parse_and(tokens)
+    while tokens.accept("word", "or"):
+        node = ("or", node, _parse_and(tokens))
+    return node
+
+
+def _parse_int(tokens):
+    """Разобрать неотрицательное целое (для limit/offset)."""
+    text = tokens.expect("word")
+    if not text.isdigit():
+        raise SyntaxError("ожидается число")
+    return int(text)
+
+
+@timed("parse")
 def parse_insert_args(raw_input):
     """Разобрать команду insert.
 
     Формат: insert into <таблица> values (<зн1>, <зн2>, ...)
-    Возвращает (table_name, [values]) или None.
+    [, (<зн1>, <зн2>, ...) ...]
+    Возвращает (table_name, [[значения строки], ...]) или None.
     """
-    lower = raw_input.lower()
-    into_pos = lower.find("into ")
-    values_pos = lower.find("values")
-
-    if into_pos == -1 or values_pos == -1:
-        return None
-
-    table_name = raw_input[into_pos + 5:values_pos].strip()
-    if not table_name:
+    try:
+        tokens = _Tokens(raw_input)
+        tokens.expect("word", "insert")
+        tokens.expect("word", "into")
+        table_name = _parse_name(tokens)
+        tokens.expect("word", "values")
+        rows = []
+        while True:
+            tokens.expect("punct", "(")
+            row = [_parse_literal(tokens)]
+            while tokens.accept("punct", ","):
+                row.append(_parse_literal(tokens))
+            tokens.expect("punct", ")")
+            rows.append(row)
+            if not tokens.accept("punct", ","):
+                break
+        if not tokens.done():
+            return None
+    except SyntaxError:
         return None
 
-    values_str = raw_input[values_pos + 6:].strip()
-    if not (values_str.startswith("(") and values_str.endswith(")")):
-        return None
+    return table_name, rows
 
-    values_str = values_str[1:-1]
-    raw_values = values_str.split(",")
-    parsed = [parse_value(v) for v in raw_values]
 
-    return table_name, parsed
+def aggregate_label(item):
+    """Заголовок столбца результата: age, count(*), sum(age)."""
+    func, column = item
+    if func is None:
+        return column
+    return f"{func}({column or '*'})"
 
 
-def parse_select_args(raw_input):
-    """Разобрать команду select.
+def _parse_select_item(tokens):
+    """item := имя | функция '(' имя ')' | count '(' '*' ')'.
 
-    Формат: select from <таблица> [where <столбец> = <значение>]
-    Возвращает (table_name, where_dict или None).
+    Возвращает (функция, столбец); для простого столбца функция
+    None, для count(*) столбец None.
     """
-    lower = raw_input.lower()
-    from_pos = lower.find("from ")
-    where_pos = lower.find(" where ")
+    token = tokens.peek()
+    if (
+        token is not None
+        and token[0] == "word"
+        and token[1].lower() in AGGREGATE_FUNCTIONS
+        and tokens.peek(1) == ("punct", "(")
+    ):
+        func = tokens.next()[1].lower()
+        tokens.expect("punct", "(")
+        column = None
+        if not (func == "count" and tokens.accept("punct", "*")):
+            column = _parse_name(tokens)
+        tokens.expect("punct", ")")
+        return func, column
+    return None, _parse_name(tokens)
 
-    if from_pos == -1:
-        return None
 
-    if where_pos != -1:
-        table_name = raw_input[from_pos + 5:where_pos].strip()
-        where_str = raw_input[where_pos + 7:].strip()
-        where_clause = parse_condition(where_str)
-        if where_clause is None:
-            return None
-    else:
-        table_name = raw_input[from_pos + 5:].strip()
-        where_clause = None
+@timed("parse")
+def parse_select_args(raw_input):
+    """Разобрать команду select.
 
-    if not table_name:
+    Формат: select [* | <элемент1>, <элемент2> ...] from <таблица>
+    [join <таблица> on <стб> = <стб>]
+    [where <условие>] [group by <стб>, ...]
+    [order by <элемент> [asc|desc], ...] [limit <N>] [offset <M>]
+
+    Элемент — столбец или агрегат count(*), count(<стб>),
+    sum(<стб>), avg(<стб>), min(<стб>), max(<стб>).
+    Условие поддерживает =, !=, <, <=, >, >=, AND, OR и скобки.
+    Возвращает словарь с ключами table, join, columns, aggregates,
+    group_by, where, order_by, limit, offset или None при ошибке
+    синтаксиса. Для запроса с агрегатами или group by columns —
+    None, а aggregates — список элементов (функция, столбец);
+    иначе aggregates — None. В order_by элементы записываются
+    заголовками (см. aggregate_label). join — None или словарь
+    с ключами table и on (пара столбцов условия соединения).
+    """
+    try:
+        return _parse_select(_Tokens(raw_input))
+    except SyntaxError:
         return None
 
-    return table_name, where_clause
-
 
+def _parse_select(tokens):
+    tokens.expect("word", "select")
+    items = None
+    if tokens.accept("punct", "*"):
+        pass
+    elif not tokens.at_keyword("from"):
+        items = [_parse_select_item(tokens)]
+        while tokens.accept("punct", ","):
+            items.append(_parse_select_item(tokens))
+    tokens.expect("word", "from")
+    query = {
+        "table": _parse_name(tokens),
+        "join": None,
+        "columns": None,
+        "aggregates": None,
+        "group_by": [],
+        "where": None,
+        "order_by": [],
+        "limit": None,
+        "offset": 0,
+    }
+
+    if tokens.accept("word", "join"):
+        join_table = _parse_name(tokens)
+        tokens.expect("word", "on")
+        left = _parse_name(tokens)
+        tokens.expect("op", "=")
+        query["join"] = {
+            "table": join_table,
+            "on": (left, _parse_name(tokens)),
+        }
+
+    if tokens.accept("word", "where"):
+        query["where"] = _parse_or(tokens)
+
+    if tokens.accept("word", "group"):
+        tokens.expect("word", "by")
+        query["group_by"].append(_parse_name(tokens))
+        while tokens.accept("punct", ","):
+            query["group_by"].append(_parse_name(tokens))
+
+    if query["group_by"] or any(func for func, _ in items or []):
+        if items is None:
+            raise SyntaxError("с group by нужно перечислить столбцы")
+        query["aggregates"] = items
+    elif items is not None:
+        query["columns"] = [column for _, column in items]
+
+    if tokens.accept("word", "order"):
+        tokens.expect("word", "by")
+        while True:
+            column = aggregate_label(_parse_select_item(tokens))
+            descending = False
+            if tokens.at_keyword("asc", "desc"):
+                descending = tokens.next()[1].lower() == "desc"
+            query["order_by"].append((column, descending))
+            if not tokens.accept("punct", ","):
+                break
+
+    if tokens.accept("word", "limit"):
+        query["limit"] = _parse_int(tokens)
+    if tokens.accept("word", "offset"):
+        query["offset"] = _parse_int(tokens)
+
+    if not tokens.done():
+        raise SyntaxError("лишние символы в конце команды")
+    return query
+
+
+@timed("parse")
 def parse_update_args(raw_input):
     """Разобрать команду update.
 
-    Формат: update <таблица> set <стб> = <зн> where <стб> = <зн>
-    Возвращает (table_name, set_dict, where_dict) или None.
+    Формат: update <таблица> set <стб> = <зн> [, <стб> = <зн>]
+    where <условие>
+    Возвращает (table_name, set_dict, where_tree) или None.
     """
-    lower = raw_input.lower()
-    set_pos = lower.find(" set ")
-    where_pos = lower.find(" where ")
-
-    if set_pos == -1 or where_pos == -1:
+    try:
+        tokens = _Tokens(raw_input)
+        tokens.expect("word", "update")
+        table_name = _parse_name(tokens)
+        tokens.expect("word", "set")
+        set_clause = {}
+        while True:
+            column = _parse_name(tokens)
+            tokens.expect("op", "=")
+            set_clause[column] = _parse_literal(tokens)
+            if not tokens.accept("punct", ","):
+                break
+        tokens.expect("word", "where")
+        where_clause = _parse_or(tokens)
+        if not tokens.done():
+            return None
+    except SyntaxError:
         return None
 
-    first_space = raw_input.find(" ")
-    table_name = raw_input[first_space + 1:set_pos].strip()
+    return table_name, set_clause, where_clause
 
-    set_str = raw_input[set_pos + 5:where_pos].strip()
-    where_str = raw_input[where_pos + 7:].strip()
 
-    set_clause = parse_condition(set_str)
-    where_clause = parse_condition(where_str)
+@timed("parse")
+def parse_delete_args(raw_input):
+    """Разобрать команду delete.
 
-    if not table_name or set_clause is None or where_clause is None:
+    Формат: delete from <таблица> where <условие>
+    Возвращает (table_name, where_tree) или None.
+    """
+    try:
+        tokens = _Tokens(raw_input)
+        tokens.expect("word", "delete")
+        tokens.expect("word", "from")
+        table_name = _parse_name(tokens)
+        tokens.expect("word", "where")
+        where_clause = _parse_or(tokens)
+        if not tokens.done():
+            return None
+    except SyntaxError:
         return None
 
-    return table_name, set_clause, where_clause
+    return table_name, where_clause
 
 
-def parse_delete_args(raw_input):
-    """Разобрать команду delete.
+@timed("parse")
+def parse_export_args(raw_input):
+    """Разобрать команду export.
 
-    Формат: delete from <таблица> where <столбец> = <значение>
-    Возвращает (table_name, where_dict) или None.
+    Формат: export <таблица> [where <условие>] to <файл>
+    format csv|jsonl
+    Возвращает (table_name, where_tree, filepath, format) или None.
     """
-    lower = raw_input.lower()
-    from_pos = lower.find("from ")
-    where_pos = lower.find(" where ")
-
-    if from_pos == -1 or where_pos == -1:
+    try:
+        tokens = _Tokens(raw_input)
+        tokens.expect("word", "export")
+        table_name = _parse_name(tokens)
+        where_clause = None
+        if tokens.accept("word", "where"):
+            where_clause = _parse_or(tokens)
+        tokens.expect("word", "to")
+        kind, filepath = tokens.next()
+        if kind == "string":
+            filepath = filepath[1:-1]
+        elif kind != "word":
+            return None
+        tokens.expect("word", "format")
+        file_type = tokens.expect("word").lower()
+        if not tokens.done():
+            return None
+    except SyntaxError:
         return None
 
-    table_name = raw_input[from_pos + 5:where_pos].strip()
-    where_str = raw_input[where_pos + 7:].strip()
-    where_clause = parse_condition(where_str)
+    return table_name, where_clause, filepath, file_type
 
-    if not table_name or where_clause is None:
+
+@timed("parse")
+def parse_alter_args(raw_input):
+    """Разобрать команду alter_table.
+
+    Форматы:
+    alter_table <таблица> add <стб>:<тип> [default <зн>]
+    alter_table <таблица> drop <стб>
+    alter_table <таблица> rename <стб> <новое_имя>
+    Возвращает (table_name, change) или None. change — словарь
+    с ключами op и column; для add ещё type и default (None,
+    если не задан), для rename — to.
+    """
+    try:
+        tokens = _Tokens(raw_input)
+        tokens.expect("word", "alter_table")
+        table_name = _parse_name(tokens)
+        op = tokens.expect("word").lower()
+        if op == "add":
+            column, sep, col_type = _parse_name(tokens).partition(":")
+            if not sep:
+                return None
+            default = None
+            if tokens.accept("word", "default"):
+                default = _parse_literal(tokens)
+            change = {
+                "op": op,
+                "column": column,
+                "type": col_type,
+                "default": default,
+            }
+        elif op == "drop":
+            change = {"op": op, "column": _parse_name(tokens)}
+        elif op == "rename":
+            column = _parse_name(tokens)
+            change = {"op": op, "column": column, "to": _parse_name(tokens)}
+        else:
+            return None
+        if not tokens.done():
+            return None
+    except SyntaxError:
         return None
 
-    return table_name, where_clause
+    return table_name, change
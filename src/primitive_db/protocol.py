@@ -0,0 +1,83 @@
+"""Протокол обмена между сервером и клиентом.
+
+Каждое сообщение — кадр: длина полезной нагрузки (u32, big-endian)
+и сама нагрузка — JSON в UTF-8. Запрос: {"command": "<команда>"}
+в той же грамматике, что и в REPL. Ответ: {"output": "<вывод>"}
+или {"error": "<сообщение>"}. Клиент может отправить несколько
+запросов подряд, не дожидаясь ответов: сервер отвечает на них
+в том же порядке.
+"""
+
+import asyncio
+import json
+import struct
+
+from src.primitive_db.constants import FILE_ENCODING, MAX_FRAME_SIZE
+
+_HEADER = struct.Struct(">I")
+
+
+class ProtocolError(Exception):
+    """Нарушение формата кадра."""
+
+
+def encode_frame(message):
+    """Упаковать сообщение-словарь в кадр."""
+    payload = json.dumps(message, ensure_ascii=False).encode(FILE_ENCODING)
+    if len(payload) > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Слишком большое сообщение: {len(payload)} байт")
+    return _HEADER.pack(len(payload)) + payload
+
+
+def _frame_size(header):
+    """Длина нагрузки по заголовку кадра."""
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Слишком большое сообщение: {size} байт")
+    return size
+
+
+def _decode(payload):
+    try:
+        message = json.loads(payload.decode(FILE_ENCODING))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ProtocolError("Некорректное сообщение") from None
+    if not isinstance(message, dict):
+        raise ProtocolError("Сообщение должно быть объектом")
+    return message
+
+
+async def read_frame(reader):
+    """Прочитать кадр из asyncio.StreamReader.
+
+    Возвращает сообщение или None, если соединение закрыто
+    между кадрами. Обрыв посреди кадра — ProtocolError.
+    """
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise ProtocolError("Соединение закрыто посреди кадра") from None
+    try:
+        payload = await reader.readexactly(_frame_size(header))
+    except asyncio.IncompleteReadError:
+        raise ProtocolError("Соединение закрыто посреди кадра") from None
+    return _decode(payload)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Соединение закрыто сервером")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock):
+    """Прочитать кадр из блокирующего сокета."""
+    header = _recv_exactly(sock, _HEADER.size)
+    return _decode(_recv_exactly(sock, _frame_size(header)))
@@ -0,0 +1,154 @@
+"""Условия запросов: дерево разбора и его компиляция.
+
+Условие where — дерево из кортежей:
+
+    ("cmp", оператор, столбец, значение)
+    ("and", левое, правое)
+    ("or", левое, правое)
+
+Операторы сравнения: =, !=, <, <=, >, >=.
+"""
+
+import operator
+
+OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+_MISSING = object()
+
+
+def conjuncts(node):
+    """Разложить условие на список частей, соединённых через AND."""
+    if node is None:
+        return []
+    if node[0] == "and":
+        return conjuncts(node[1]) + conjuncts(node[2])
+    return [node]
+
+
+def equality_terms(node):
+    """Выделить равенства верхнего уровня: {столбец: значение}.
+
+    Учитываются только сравнения '=', соединённые через AND, —
+    ими можно сузить перебор по ID или хеш-индексу.
+    """
+    terms = {}
+    for part in conjuncts(node):
+        if part[0] == "cmp" and part[1] == "=":
+            terms.setdefault(part[2], part[3])
+    return terms
+
+
+def condition_columns(node):
+    """Множество столбцов, упомянутых в условии."""
+    if node is None:
+        return set()
+    if node[0] == "cmp":
+        return {node[2]}
+    return condition_columns(node[1]) | condition_columns(node[2])
+
+
+def rename_columns(node, names):
+    """Копия условия, где столбцы заменены по словарю names."""
+    if node is None:
+        return None
+    if node[0] == "cmp":
+        _, op, column, value = node
+        return ("cmp", op, names.get(column, column), value)
+    return (
+        node[0],
+        rename_columns(node[1], names),
+        rename_columns(node[2], names),
+    )
+
+
+def combine(parts):
+    """Соединить части условия через AND; без частей — None."""
+    node = None
+    for part in parts:
+        node = part if node is None else ("and", node, part)
+    return node
+
+
+def validate_condition(node, columns):
+    """Проверить, что все столбцы условия есть в схеме таблицы."""
+    for column in condition_columns(node):
+        if column not in columns:
+            raise ValueError(f'Столбец "{column}" не существует.')
+
+
+def normalize_condition(node):
+    """Привести условие к каноническому строковому виду."""
+    if node is None:
+        return ""
+    if node[0] == "cmp":
+        _, op, column, value = node
+        return f"{column}{op}{value!r}"
+    parts = sorted(
+        normalize_condition(part) for part in _flatten(node, node[0])
+    )
+    return f"{node[0]}(" + ",".join(parts) + ")"
+
+
+def _flatten(node, kind):
+    """Развернуть цепочку одинаковых операций AND или OR."""
+    if node[0] == kind:
+        return _flatten(node[1], kind) + _flatten(node[2], kind)
+    return [node]
+
+
+def _ordered(op):
+    """Сравнение, которое даёт False при несравнимых типах."""
+    func = OPERATORS[op]
+
+    def compare(left, right):
+        try:
+            return func(left, right)
+        except TypeError:
+            return False
+    return compare
+
+
+def compile_condition(node, columns=None):
+    """Скомпилировать условие в одну функцию record → bool.
+
+    Дерево один раз превращается в исходный код lambda-выражения,
+    поэтому при фильтрации оно не разбирается заново для каждой
+    записи. Отсутствующий столбец и несравнимые типы дают False.
+
+    Если задан список columns, функция принимает не словарь,
+    а кортеж значений этих столбцов; None в кортеже означает
+    отсутствующее значение.
+    """
+    if node is None:
+        return lambda record: True
+
+    namespace = {"_MISSING": _MISSING}
+
+    def emit(part):
+        if part[0] in ("and", "or"):
+            return f"({emit(part[1])} {part[0]} {emit(part[2])})"
+        _, op, column, value = part
+        name = f"_v{len(namespace)}"
+        namespace[name] = value
+        if columns is not None:
+            getter = f"r[{columns.index(column)}]"
+            present = f"{getter} is not None"
+        else:
+            getter = f"r.get({column!r}, _MISSING)"
+            present = f"{column!r} in r"
+        if op == "=":
+            return f"({getter} == {name})"
+        if op == "!=":
+            return f"({present} and {getter} != {name})"
+        compare = f"_c{len(namespace)}"
+        namespace[compare] = _ordered(op)
+        return f"{compare}({getter}, {name})"
+
+    return eval(f"lambda r: {emit(node)}", namespace)
@@ -0,0 +1,225 @@
+"""Скомпилированная схема таблицы для проверки вставок и обновлений.
+
+Схема {столбец: тип} один раз превращается в объект Schema:
+упорядоченные слоты столбцов без ID, кортеж Python-типов
+слотов (валидатор) и конструктор записи из строки значений.
+Строка проверяется одним сравнением кортежа типов её значений
+с валидатором — без сравнения строк с именами типов и без
+разбора метаданных на каждую запись.
+
+Объекты кэшируются по содержимому схемы (compile_schema):
+пока схема таблицы не меняется, используется один и тот же
+объект, а изменённая схема компилируется заново.
+
+Здесь же — изменения схемы командой alter_table. Каждое
+изменение получает номер версии схемы и хранится в метаданных
+таблицы (schema_changes); файлы данных помнят версию, в которой
+записаны их строки, и приводятся к текущей при чтении
+(upgrade_records, upgrade_columns), так что само изменение
+не переписывает данные.
+"""
+
+from array import array
+from functools import lru_cache
+
+from src.primitive_db.constants import ID_COLUMN, INT_MAX, INT_MIN
+
+# Тип столбца → класс значения; сравнение type(value) is cls
+# отличает bool от int (bool — подкласс int)
+_PY_TYPES = {"int": int, "str": str, "bool": bool}
+
+
+class Schema:
+    """Схема таблицы, подготовленная для проверки строк.
+
+    names — столбцы без ID в порядке схемы (слоты строки
+    значений insert), types — их типы, validator — кортеж классов
+    значений по слотам, slots — {столбец: номер слота},
+    int_slots — слоты столбцов int.
+    """
+
+    def __init__(self, columns):
+        self.names = tuple(name for name in columns if name != ID_COLUMN)
+        self.types = tuple(columns[name] for name in self.names)
+        self.validator = tuple(_PY_TYPES[t] for t in self.types)
+        self.slots = {name: slot for slot, name in enumerate(self.names)}
+        self.int_slots = tuple(
+            slot for slot, col_type in enumerate(self.types)
+            if col_type == "int"
+        )
+
+    @property
+    def items(self):
+        """Пары (столбец, тип) без ID."""
+        return list(zip(self.names, self.types))
+
+    def check_rows(self, rows):
+        """Проверить строки значений; вернуть текст ошибки или None.
+
+        Каждая строка проверяется одним сравнением кортежа типов
+        её значений с валидатором, а значения int — на попадание
+        в int64 (их хранят колоночное представление и бинарный
+        формат); разбор ошибки — только для строки, которая
+        проверку не прошла.
+        """
+        validator = self.validator
+        int_slots = self.int_slots
+        for row in rows:
+            if tuple(map(type, row)) != validator:
+                return self._row_error(row)
+            for slot in int_slots:
+                if not INT_MIN <= row[slot] <= INT_MAX:
+                    return _range_error(self.names[slot], row[slot])
+        return None
+
+    def _row_error(self, row):
+        """Текст ошибки для строки, не прошедшей проверку."""
+        if len(row) != len(self.names):
+            return f"Ожидается {len(self.names)} значений, получено {len(row)}."
+        for name, col_type, cls, value in zip(
+            self.names, self.types, self.validator, row
+        ):
+            if type(value) is not cls:
+                return _type_error(name, col_type, value)
+        return None
+
+    def check_changes(self, changes):
+        """Проверить изменения {столбец: значение} для update.
+
+        Возвращает текст ошибки или None.
+        """
+        if ID_COLUMN in changes:
+            return f"Столбец {ID_COLUMN} нельзя изменять."
+        for name, value in changes.items():
+            slot = self.slots.get(name)
+            if slot is None:
+                return f'Столбец "{name}" не существует.'
+            if type(value) is not self.validator[slot]:
+                return _type_error(name, self.types[slot], value)
+            if slot in self.int_slots and not INT_MIN <= value <= INT_MAX:
+                return _range_error(name, value)
+        return None
+
+    def make_records(self, rows):
+        """Записи {столбец: значение} без ID из строк значений."""
+        names = self.names
+        return (dict(zip(names, row)) for row in rows)
+
+
+def _type_error(name, col_type, value):
+    """Текст ошибки о значении не того типа."""
+    return (
+        f"Некорректное значение: {value} "
+        f'для столбца "{name}" '
+        f"(ожидается {col_type})."
+    )
+
+
+def _range_error(name, value):
+    """Текст ошибки о значении int вне int64."""
+    return (
+        f"Некорректное значение: {value} "
+        f'для столбца "{name}" '
+        f"(вне диапазона int: от {INT_MIN} до {INT_MAX})."
+    )
+
+
+@lru_cache(maxsize=256)
+def _compile(items):
+    return Schema(dict(items))
+
+
+def compile_schema(columns):
+    """Скомпилированная схема для {столбец: тип} (из кэша)."""
+    return _compile(tuple(columns.items()))
+
+
+def apply_change(columns, change):
+    """Схема {столбец: тип} после изменения alter_table.
+
+    change — {"op": "add" | "drop" | "rename", "column": ...,
+    "version": ...}; для add ещё "type" и "default", для rename —
+    "to". Возвращает новый словарь, порядок столбцов сохраняется
+    (добавленный — в конце).
+    """
+    op, column = change["op"], change["column"]
+    if op == "add":
+        return {**columns, column: change["type"]}
+    if op == "drop":
+        return {
+            name: col_type
+            for name, col_type in columns.items()
+            if name != column
+        }
+    return {
+        (change["to"] if name == column else name): col_type
+        for name, col_type in columns.items()
+    }
+
+
+def _pending(changes, version, target):
+    """Изменения новее version и не новее target (None — все)."""
+    return [
+        change for change in changes
+        if change["version"] > version
+        and (target is None or change["version"] <= target)
+    ]
+
+
+def change_records(records, change):
+    """Применить изменение схемы к записям-словарям на месте."""
+    op, column = change["op"], change["column"]
+    if op == "add":
+        default = change["default"]
+        for record in records:
+            record.setdefault(column, default)
+    elif op == "drop":
+        for record in records:
+            record.pop(column, None)
+    else:
+        new_name = change["to"]
+        for record in records:
+            if column in record:
+                record[new_name] = record.pop(column)
+
+
+def upgrade_records(records, changes, version, target=None):
+    """Привести записи версии схемы version к версии target.
+
+    changes — список изменений из метаданных таблицы
+    (schema_changes); target None — к последней. Возвращает
+    records.
+    """
+    for change in _pending(changes, version, target):
+        change_records(records, change)
+    return records
+
+
+def filled_column(col_type, value, size):
+    """Столбец из size одинаковых значений в виде BinaryTableFile.column."""
+    if col_type == "int":
+        return array("q", [value]) * size
+    if col_type == "bool":
+        return bytearray([1 if value else 0]) * size
+    return [value] * size
+
+
+def upgrade_columns(column_data, size, changes, version):
+    """Привести столбцы {имя: значения} версии version к последней.
+
+    size — число строк. Добавленный столбец заполняется значением
+    по умолчанию, удалённый отбрасывается, переименованный
+    переходит под новое имя — без разбора строк. Возвращает
+    column_data.
+    """
+    for change in _pending(changes, version, None):
+        op, column = change["op"], change["column"]
+        if op == "add":
+            column_data[column] = filled_column(
+                change["type"], change["default"], size
+            )
+        elif op == "drop":
+            column_data.pop(column, None)
+        elif column in column_data:
+            column_data[change["to"]] = column_data.pop(column)
+    return column_data
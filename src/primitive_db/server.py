@@ -0,0 +1,283 @@
+"""Сервер базы данных для нескольких клиентов на одной машине.
+
+Один процесс держит хранилище таблиц (TableStore) и принимает
+команды по TCP или Unix-сокету (формат кадров — см. модуль
+protocol). Команды разбираются той же грамматикой, что и в REPL,
+и выполняются через engine.execute_command в пуле потоков.
+
+Блокировки:
+
+- чтения (select, export, info) одной таблицы идут параллельно;
+  select ... join читает под блокировками обеих таблиц;
+- изменения (insert, update, delete) одной таблицы выполняются
+  по одному и не пересекаются с её чтениями, а разные таблицы
+  не мешают друг другу;
+- команды, меняющие схему или файлы (create_table, drop_table,
+  alter_table, create_index, layout, convert, compress, import),
+  и команды под profile выполняются в одиночку.
+
+Изменения таблицы сбрасываются на диск сразу после команды.
+Транзакции (begin/commit/rollback) в режиме сервера недоступны.
+"""
+
+import asyncio
+import io
+import shlex
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+
+from src.primitive_db.constants import (
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_WORKERS,
+)
+from src.primitive_db.decorators import create_cacher, set_auto_confirm
+from src.primitive_db.engine import close_store, execute_command, open_store
+from src.primitive_db.parser import (
+    parse_delete_args,
+    parse_export_args,
+    parse_insert_args,
+    parse_select_args,
+    parse_update_args,
+)
+from src.primitive_db.protocol import ProtocolError, encode_frame, read_frame
+
+_READ_COMMANDS = {"select", "export", "info"}
+_WRITE_COMMANDS = {"insert", "update", "delete"}
+_EXCLUSIVE_COMMANDS = {
+    "create_table",
+    "drop_table",
+    "alter_table",
+    "create_index",
+    "layout",
+    "convert",
+    "compress",
+    "import",
+    "profile",
+}
+_SESSION_COMMANDS = {"begin", "commit", "rollback", "exit"}
+
+_TABLE_PARSERS = {
+    "select": lambda text: (parse_select_args(text) or {}).get("table"),
+    "insert": lambda text: (parse_insert_args(text) or [None])[0],
+    "update": lambda text: (parse_update_args(text) or [None])[0],
+    "delete": lambda text: (parse_delete_args(text) or [None])[0],
+    "export": lambda text: (parse_export_args(text) or [None])[0],
+}
+
+
+def _joined_table(command, user_input):
+    """Вторая таблица команды select ... join или None."""
+    if command != "select":
+        return None
+    join = (parse_select_args(user_input) or {}).get("join")
+    return join["table"] if join else None
+
+
+def _command_table(command, user_input):
+    """Имя таблицы, к которой обращается команда, или None."""
+    if command in _TABLE_PARSERS:
+        return _TABLE_PARSERS[command](user_input)
+    try:
+        args = shlex.split(user_input)
+    except ValueError:
+        return None
+    return args[1] if len(args) > 1 else None
+
+
+class _RWLock:
+    """Блокировка «читатели/писатель» для asyncio."""
+
+    def __init__(self):
+        self._readers = 0
+        self._writer = False
+        self._cond = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reading(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: not self._writer)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._readers -= 1
+                self._cond.notify_all()
+
+    @asynccontextmanager
+    async def writing(self):
+        async with self._cond:
+            await self._cond.wait_for(
+                lambda: not self._writer and not self._readers
+            )
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class _ThreadOutput(io.TextIOBase):
+    """Замена sys.stdout, собирающая вывод команды своего потока.
+
+    Пока в потоке действует capture(), print пишет в его буфер,
+    остальной вывод уходит в исходный поток.
+    """
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer or self._fallback).write(text)
+
+    def flush(self):
+        self._fallback.flush()
+
+    @contextmanager
+    def capture(self):
+        self._local.buffer = io.StringIO()
+        try:
+            yield self._local.buffer
+        finally:
+            self._local.buffer = None
+
+
+class DatabaseServer:
+    """Выполнение команд клиентов над общим хранилищем."""
+
+    def __init__(self, store, workers=SERVER_WORKERS):
+        self.store = store
+        self.cache_result = create_cacher()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._schema_lock = _RWLock()
+        self._table_locks = {}
+        self._output = None
+
+    def _table_lock(self, table_name):
+        if table_name not in self._table_locks:
+            self._table_locks[table_name] = _RWLock()
+        return self._table_locks[table_name]
+
+    def _execute(self, user_input, flush_tables):
+        """Выполнить команду в рабочем потоке и вернуть её вывод."""
+        with self._output.capture() as buffer:
+            execute_command(user_input, self.store, self.cache_result)
+            if flush_tables != []:
+                self.store.flush(table_names=flush_tables)
+        return buffer.getvalue()
+
+    async def _run_in_pool(self, user_input, flush_tables):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, self._execute, user_input, flush_tables
+        )
+
+    async def run_command(self, user_input):
+        """Выполнить команду с нужными блокировками.
+
+        Возвращает ответ протокола: {"output": ...} или
+        {"error": ...}.
+        """
+        words = user_input.split()
+        command = words[0].lower() if words else ""
+        if command in _SESSION_COMMANDS:
+            return {
+                "error": f"Команда {command} недоступна в режиме сервера."
+            }
+
+        if command in _EXCLUSIVE_COMMANDS:
+            async with self._schema_lock.writing():
+                output = await self._run_in_pool(user_input, None)
+            return {"output": output}
+
+        async with self._schema_lock.reading():
+            table_name = None
+            if command in _READ_COMMANDS or command in _WRITE_COMMANDS:
+                table_name = _command_table(command, user_input)
+            if table_name is None:
+                output = await self._run_in_pool(user_input, [])
+            elif command in _WRITE_COMMANDS:
+                async with self._table_lock(table_name).writing():
+                    output = await self._run_in_pool(
+                        user_input, [table_name]
+                    )
+            else:
+                names = {table_name, _joined_table(command, user_input)}
+                async with AsyncExitStack() as stack:
+                    for name in sorted(names - {None}):
+                        await stack.enter_async_context(
+                            self._table_lock(name).reading()
+                        )
+                    output = await self._run_in_pool(user_input, [])
+        return {"output": output}
+
+    async def handle(self, reader, writer):
+        """Обслужить одно соединение клиента.
+
+        Запросы соединения выполняются по очереди, ответы
+        отправляются в порядке запросов.
+        """
+        try:
+            while True:
+                message = await read_frame(reader)
+                if message is None:
+                    break
+                command = message.get("command")
+                if isinstance(command, str):
+                    response = await self.run_command(command)
+                else:
+                    response = {"error": "В запросе нет команды."}
+                writer.write(encode_frame(response))
+                await writer.drain()
+        except (ProtocolError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve(self, host=SERVER_HOST, port=SERVER_PORT, socket_path=None):
+        """Принимать соединения, пока задача не будет отменена."""
+        self._output = _ThreadOutput(sys.stdout)
+        sys.stdout = self._output
+        try:
+            if socket_path is not None:
+                server = await asyncio.start_unix_server(
+                    self.handle, path=socket_path
+                )
+                address = socket_path
+            else:
+                server = await asyncio.start_server(self.handle, host, port)
+                address = f"{host}:{port}"
+            print(f"Сервер запущен: {address}")
+            async with server:
+                await server.serve_forever()
+        finally:
+            sys.stdout = self._output._fallback
+            self._pool.shutdown()
+
+
+def run_server(host=SERVER_HOST, port=SERVER_PORT, socket_path=None):
+    """Запустить сервер до нажатия Ctrl+C.
+
+    Удаление записей и таблиц подтверждается автоматически:
+    у клиента нет интерактивного ввода.
+    """
+    set_auto_confirm(True)
+    store = open_store(flush_policy="exit")
+    server = DatabaseServer(store)
+    try:
+        asyncio.run(server.serve(host, port, socket_path))
+    except KeyboardInterrupt:
+        print("Сервер остановлен.")
+    finally:
+        close_store(store)
@@ -0,0 +1,635 @@
+"""Резидентное хранилище таблиц, живущее между командами REPL.
+
+Несколько процессов могут работать с одним каталогом данных.
+Изменяемая таблица блокируется исключительно (см. модуль locking)
+от первого изменения до сброса на диск; загрузка с диска идёт под
+разделяемой блокировкой. Перед обращением к таблице сравнивается
+отпечаток её файлов (см. table_stamp): если другой процесс их
+не менял, таблица в памяти используется без перечитывания.
+
+Изменения схемы (alter_table) записываются только в метаданные
+как новая версия схемы. Снимок и метки schema в журнале хранят
+версию, в которой записаны их строки; при загрузке строки
+приводятся к текущей схеме, а при сворачивании журнала
+записываются уже в ней.
+"""
+
+import copy
+import threading
+import time
+from contextlib import contextmanager
+
+from src.primitive_db import metrics
+from src.primitive_db.columnar import ColumnarTable
+from src.primitive_db.constants import (
+    DEFAULT_CODEC,
+    DEFAULT_FORMAT,
+    DEFAULT_LAYOUT,
+    FLUSH_INTERVAL_MS,
+    FLUSH_POLICIES,
+    FLUSH_POLICY,
+    LOG_COMPACT_SIZE,
+    META_FILEPATH,
+)
+from src.primitive_db.indexes import (
+    build_index,
+    build_sorted_index,
+    dump_indexes,
+    restore_indexes,
+)
+from src.primitive_db.locking import FileLock
+from src.primitive_db.schema import apply_change, upgrade_columns
+from src.primitive_db.table import Table
+from src.primitive_db.utils import (
+    append_table_log,
+    compact_table_data,
+    file_stamp,
+    load_metadata,
+    load_table_columns,
+    load_table_indexes,
+    load_table_snapshot,
+    log_schema_version,
+    mark_table_dropped,
+    purge_dropped_table,
+    read_table_log,
+    recover_data_dir,
+    replay_log,
+    save_metadata,
+    save_table_indexes,
+    table_file_stats,
+    table_lock_path,
+    table_log_size,
+    table_stamp,
+)
+
+
+class TableStore:
+    """Хранилище метаданных и данных таблиц в памяти.
+
+    Каждая таблица загружается с диска один раз и дальше живёт
+    в памяти как объект Table или ColumnarTable (в зависимости
+    от metadata[table]["layout"]); функции core работают с ним
+    напрямую.
+    Изменения копятся как записи журнала и сбрасываются на диск
+    согласно политике сброса (см. FLUSH_POLICIES). При создании
+    хранилище убирает следы прерванных записей (см.
+    recover_data_dir); обработанные файлы — в self.recovered.
+    self._disk_metadata — описания таблиц в том виде, в каком
+    этот процесс последний раз прочитал или записал их на диск:
+    по ним save_metadata находит таблицы, изменённые самим
+    процессом.
+    """
+
+    def __init__(
+        self,
+        meta_filepath=META_FILEPATH,
+        flush_policy=FLUSH_POLICY,
+        flush_interval_ms=FLUSH_INTERVAL_MS,
+    ):
+        if flush_policy not in FLUSH_POLICIES:
+            raise ValueError(
+                f"Неизвестная политика сброса: {flush_policy}"
+            )
+        self.meta_filepath = meta_filepath
+        self.flush_policy = flush_policy
+        self.flush_interval = flush_interval_ms / 1000
+        self._meta_file_lock = FileLock(meta_filepath)
+        with self._meta_file_lock.shared():
+            self._meta_stamp = file_stamp(meta_filepath)
+            self.metadata = load_metadata(meta_filepath)
+        self._disk_metadata = copy.deepcopy(self.metadata)
+        self.recovered = recover_data_dir(self.metadata, meta_filepath)
+        self._tables = {}
+        self._stamps = {}
+        self._log_versions = {}
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        self._saved = None
+        self._file_locks = {}
+        self._held = set()
+        self._lock = threading.RLock()
+        self._timer = None
+
+    def _table_lock(self, table_name):
+        """Межпроцессная блокировка таблицы."""
+        with self._lock:
+            if table_name not in self._file_locks:
+                self._file_locks[table_name] = FileLock(
+                    table_lock_path(table_name)
+                )
+            return self._file_locks[table_name]
+
+    def get_table(self, table_name, for_write=False):
+        """Получить таблицу, загрузив её при первом обращении.
+
+        for_write=True — таблица будет изменена: она блокируется
+        до ближайшего сброса на диск, а внутри транзакции перед
+        первым изменением запоминается её копия для rollback.
+        Если блокировку не удалось получить за LOCK_TIMEOUT,
+        возникает LockTimeoutError.
+        """
+        if for_write:
+            self._hold(table_name)
+        with self._lock:
+            self.refresh(table_name)
+            if table_name not in self._tables:
+                self._tables[table_name] = self._load_table(table_name)
+        table = self._tables[table_name]
+        if for_write and self._saved is not None:
+            if table_name not in self._saved:
+                self._saved[table_name] = (
+                    [dict(record) for record in table.to_records()],
+                    table.next_id,
+                )
+        return table
+
+    def _hold(self, table_name):
+        """Заблокировать таблицу до сброса её изменений на диск."""
+        if table_name in self._held:
+            return
+        self._table_lock(table_name).acquire(exclusive=True)
+        with self._lock:
+            self._held.add(table_name)
+
+    def refresh(self, table_name):
+        """Выгрузить таблицу из памяти, если её файлы изменились.
+
+        Таблица с несохранёнными изменениями не выгружается: пока
+        они есть, таблица заблокирована и другие процессы её
+        не меняют. Возвращает True, если таблица выгружена и при
+        следующем обращении будет перечитана.
+        """
+        with self._lock:
+            if table_name not in self._tables or self.is_dirty(table_name):
+                return False
+            if self._stamps.get(table_name) == table_stamp(table_name):
+                return False
+            self.refresh_metadata()
+            self._tables.pop(table_name, None)
+            return True
+
+    def refresh_metadata(self):
+        """Перечитать метаданные, если их изменил другой процесс.
+
+        Описания заблокированных этим процессом таблиц остаются
+        своими; таблицы, описание которых изменилось, выгружаются
+        из памяти. Возвращает имена изменившихся таблиц.
+        """
+        with self._lock:
+            if file_stamp(self.meta_filepath) == self._meta_stamp:
+                return []
+            with self._meta_file_lock.shared():
+                self._meta_stamp = file_stamp(self.meta_filepath)
+                disk = load_metadata(self.meta_filepath)
+            changed = []
+            for table_name in set(self.metadata) | set(disk):
+                if table_name in self._held:
+                    continue
+                table_meta = disk.get(table_name)
+                if self.metadata.get(table_name) == table_meta:
+                    continue
+                if table_meta is None:
+                    del self.metadata[table_name]
+                    self._disk_metadata.pop(table_name, None)
+                else:
+                    self.metadata[table_name] = table_meta
+                    self._disk_metadata[table_name] = copy.deepcopy(
+                        table_meta
+                    )
+                self._tables.pop(table_name, None)
+                changed.append(table_name)
+            return changed
+
+    def _load_table(self, table_name):
+        """Загрузить снимок, журнал и индексы таблицы.
+
+        Сохранённые хеш-индексы соответствуют снимку, с которым
+        записаны (см. load_table_indexes), поэтому при непустом
+        журнале, снимке старой версии схемы или другом снимке
+        они перестраиваются.
+        Упорядоченные индексы не сохраняются и строятся заново.
+        Строки старых версий схемы приводятся к текущей (у бинарного
+        снимка колоночной таблицы — целыми столбцами). Время
+        загрузки учитывается в метрике load.
+        """
+        table_meta = self.metadata.get(table_name, {})
+        next_id = table_meta.get("next_id", 1)
+        changes = table_meta.get("schema_changes", [])
+        lock = self._table_lock(table_name)
+        with metrics.timer("load"), lock.shared():
+            self._stamps[table_name] = table_stamp(table_name)
+            entries = read_table_log(table_name)
+            snapshot = None
+            if not entries and self._is_columnar(table_name):
+                snapshot = load_table_columns(table_name)
+            if snapshot is not None:
+                column_data, size, version = snapshot
+                table = ColumnarTable.from_columns(
+                    table_meta["columns"],
+                    upgrade_columns(column_data, size, changes, version),
+                    next_id,
+                )
+            else:
+                rows, version = load_table_snapshot(table_name)
+                table = self._make_table(
+                    table_name,
+                    replay_log(rows, entries, changes, version),
+                    next_id,
+                )
+            self._log_versions[table_name] = log_schema_version(
+                entries, version
+            )
+            saved = {}
+            if (
+                table_meta.get("indexes")
+                and not entries
+                and version == table_meta.get("schema_version", 0)
+            ):
+                saved = restore_indexes(
+                    load_table_indexes(table_name, len(table))
+                )
+            self._attach_indexes(table_name, table, saved)
+        metrics.count("rows_loaded", len(table))
+        return table
+
+    def _attach_indexes(self, table_name, table, saved=None):
+        """Построить индексы таблицы по списку из метаданных.
+
+        saved — уже загруженные хеш-индексы; недостающие строятся.
+        """
+        table_meta = self.metadata.get(table_name, {})
+        saved = saved or {}
+        table.indexes = {
+            column: saved.get(column) or build_index(table, column)
+            for column in table_meta.get("indexes", [])
+        }
+        table.sorted_indexes = {
+            column: build_sorted_index(table, column)
+            for column in table_meta.get("sorted_indexes", [])
+        }
+
+    def _is_columnar(self, table_name):
+        """Проверить, хранится ли таблица в колоночном представлении."""
+        table_meta = self.metadata.get(table_name, {})
+        return table_meta.get("layout", DEFAULT_LAYOUT) == "columnar"
+
+    def _make_table(self, table_name, rows, next_id):
+        """Создать таблицу в представлении из метаданных."""
+        columns = self.metadata[table_name]["columns"]
+        if self._is_columnar(table_name):
+            return ColumnarTable(columns, rows, next_id)
+        return Table(columns, rows, next_id)
+
+    def change_layout(self, table_name):
+        """Перестроить загруженную таблицу под текущий layout."""
+        if table_name not in self._tables:
+            return
+        old = self.get_table(table_name, for_write=True)
+        table = self._make_table(
+            table_name, list(old.to_records()), old.next_id
+        )
+        table.indexes = old.indexes
+        table.sorted_indexes = old.sorted_indexes
+        self._tables[table_name] = table
+
+    def file_stats(self, table_name):
+        """Размеры бинарного снимка таблицы (см. table_file_stats).
+
+        Читается под разделяемой блокировкой таблицы, как и
+        загрузка.
+        """
+        with self._table_lock(table_name).shared():
+            return table_file_stats(table_name)
+
+    def log_changes(self, table_name, entries):
+        """Запомнить операции над таблицей до ближайшего сброса."""
+        with self._lock:
+            self._pending.setdefault(table_name, []).extend(entries)
+
+    def is_dirty(self, table_name=None):
+        """Проверить, есть ли несохранённые изменения."""
+        if table_name is None:
+            return bool(self._pending)
+        return table_name in self._pending
+
+    def save_metadata(self, dropped=None):
+        """Сразу сохранить метаданные (DDL-операции редки).
+
+        Если файл успел изменить другой процесс, записываются
+        только описания таблиц, изменённые этим процессом (см.
+        self._disk_metadata), а остальные берутся с диска: так
+        не откатываются чужие create_table, alter_table,
+        create_index и drop_table. Удаляемая сейчас таблица
+        dropped на диске не сохраняется. Счётчики ID изменённых
+        таблиц берутся наибольшие из двух.
+        """
+        with self._lock, self._meta_file_lock.exclusive():
+            if file_stamp(self.meta_filepath) != self._meta_stamp:
+                self._merge_metadata(
+                    load_metadata(self.meta_filepath), dropped
+                )
+            save_metadata(self.meta_filepath, self.metadata)
+            self._meta_stamp = file_stamp(self.meta_filepath)
+            self._disk_metadata = copy.deepcopy(self.metadata)
+
+    def _merge_metadata(self, disk, dropped):
+        """Совместить self.metadata с метаданными другого процесса."""
+        for table_name in set(self.metadata) | set(disk):
+            if table_name == dropped:
+                continue
+            ours = self.metadata.get(table_name)
+            theirs = disk.get(table_name)
+            if ours == self._disk_metadata.get(table_name):
+                # Этот процесс таблицу не менял
+                if ours == theirs:
+                    continue
+                if theirs is None:
+                    del self.metadata[table_name]
+                else:
+                    self.metadata[table_name] = theirs
+                if not self.is_dirty(table_name):
+                    self._tables.pop(table_name, None)
+            elif ours is not None and theirs is not None:
+                ours["next_id"] = max(
+                    ours.get("next_id", 1), theirs.get("next_id", 1)
+                )
+
+    def drop_table(self, table_name):
+        """Забыть таблицу и удалить её файлы.
+
+        Таблица уже удалена из self.metadata. Файлы сначала
+        помечаются, затем атомарно сохраняются метаданные и только
+        потом файлы удаляются: после сбоя на любом шаге запуск
+        либо вернёт таблицу целиком, либо доудалит её файлы.
+        """
+        lock = self._table_lock(table_name)
+        with lock.exclusive():
+            self._tables.pop(table_name, None)
+            self._stamps.pop(table_name, None)
+            self._log_versions.pop(table_name, None)
+            self._pending.pop(table_name, None)
+            mark_table_dropped(table_name)
+            self.save_metadata(dropped=table_name)
+            purge_dropped_table(table_name)
+        self._held.discard(table_name)
+        lock.release()
+
+    def compact(self, table_name, settings=None):
+        """Записать таблицу снимком в её формате и очистить журнал.
+
+        Снимок включает все изменения из памяти, поэтому
+        несохранённые записи журнала таблицы больше не нужны.
+        Снимок пишется в текущей версии схемы, так что история
+        изменений схемы (schema_changes) больше не нужна и
+        удаляется из метаданных. Бинарный снимок сжимается
+        кодеком таблицы (metadata[table]["codec"]). Хеш-индексы
+        сохраняются только здесь, вместе со снимком.
+        settings — новые format и codec таблицы, в которых пишется
+        снимок вместо текущих: так их меняют в метаданных только
+        после успешной записи.
+        """
+        table = self.get_table(table_name, for_write=True)
+        table_meta = self.metadata[table_name]
+        settings = {**table_meta, **(settings or {})}
+        version = table_meta.get("schema_version", 0)
+        columns = codec = None
+        if settings.get("format", DEFAULT_FORMAT) == "binary":
+            columns = table_meta["columns"]
+            codec = settings.get("codec", DEFAULT_CODEC)
+        with metrics.timer("serialize"):
+            compact_table_data(
+                table_name, table.to_records(), columns, version, codec
+            )
+        self._stamps[table_name] = table_stamp(table_name)
+        self._log_versions[table_name] = version
+        with self._lock:
+            self._pending.pop(table_name, None)
+            if table_meta.pop("schema_changes", None):
+                self.save_metadata()
+        if table.indexes:
+            save_table_indexes(
+                table_name, dump_indexes(table.indexes), len(table)
+            )
+        self._sync_next_id(table_name)
+
+    def _sync_next_id(self, table_name):
+        """Перенести счётчик ID таблицы в метаданные.
+
+        Возвращает True, если метаданные изменились. Метаданные
+        меняются под блокировкой хранилища: их может сохранять
+        другой поток сервера (см. save_metadata).
+        """
+        with self._lock:
+            table_meta = self.metadata.get(table_name)
+            next_id = self._tables[table_name].next_id
+            if not table_meta or table_meta.get("next_id") == next_id:
+                return False
+            table_meta["next_id"] = next_id
+            return True
+
+    def flush(self, compact=True, table_names=None, release=True):
+        """Сбросить накопленные изменения таблиц на диск.
+
+        Записи дописываются в журналы; журнал, превысивший
+        LOG_COMPACT_SIZE, сворачивается в снимок (если compact
+        не False — при массовой загрузке сворачивают один раз
+        в конце). Вместе с журналом сохраняется счётчик ID таблиц,
+        чтобы ID удалённых записей не выдавались повторно.
+        table_names — сбросить только эти таблицы (по умолчанию все).
+        После сброса блокировки этих таблиц снимаются (кроме
+        транзакции и release=False — импорт сбрасывает таблицу
+        пачками и держит её до конца): поток сервера, сбрасывающий
+        свою таблицу, не снимает блокировки, взятые другими
+        потоками.
+        """
+        released = table_names
+        if table_names is None:
+            table_names = list(self._pending)
+        meta_changed = False
+        for table_name in table_names:
+            with self._lock:
+                entries = self._pending.pop(table_name, None)
+            if entries is None:
+                continue
+            with self._table_lock(table_name).exclusive():
+                self._append_log(table_name, entries)
+                if (
+                    compact
+                    and table_log_size(table_name) >= LOG_COMPACT_SIZE
+                ):
+                    self.compact(table_name)
+            meta_changed |= self._sync_next_id(table_name)
+        if meta_changed:
+            self.save_metadata()
+        self._last_flush = time.monotonic()
+        if release:
+            self.release_locks(released)
+
+    def _append_log(self, table_name, entries):
+        """Дописать записи в журнал таблицы.
+
+        Если последние записи журнала сделаны в другой версии
+        схемы, перед новыми пишется метка {"op": "schema"}.
+        """
+        version = self.metadata.get(table_name, {}).get("schema_version", 0)
+        if self._log_versions.get(table_name, 0) != version:
+            entries = [{"op": "schema", "version": version}, *entries]
+        with metrics.timer("serialize"):
+            append_table_log(table_name, entries)
+        self._log_versions[table_name] = version
+        self._stamps[table_name] = table_stamp(table_name)
+
+    def alter_table(self, table_name, change):
+        """Применить изменение схемы alter_table (см. schema).
+
+        Несохранённые изменения таблицы сначала дописываются
+        в журнал в старой версии схемы. Затем изменение с новым
+        номером версии сохраняется в метаданных; файлы данных
+        не переписываются — их строки приводятся к новой схеме
+        при загрузке и сворачивании журнала. Загруженная таблица
+        меняется в памяти сразу.
+        """
+        self._hold(table_name)
+        with self._lock:
+            self.refresh(table_name)
+            entries = self._pending.pop(table_name, None)
+            if entries:
+                self._append_log(table_name, entries)
+            table_meta = self.metadata[table_name]
+            column = change["column"]
+            table_meta["columns"] = apply_change(table_meta["columns"], change)
+            for key in ("indexes", "sorted_indexes"):
+                names = table_meta.get(key, [])
+                if column in names:
+                    names.remove(column)
+                    if change["op"] == "rename":
+                        names.append(change["to"])
+            table_meta["schema_version"] = change["version"]
+            table_meta.setdefault("schema_changes", []).append(change)
+            if table_name in self._tables:
+                self._sync_next_id(table_name)
+                self._tables[table_name].alter(change)
+            self.save_metadata()
+        self.release_locks([table_name])
+
+    def release_locks(self, table_names=None):
+        """Снять блокировки таблиц без несохранённых изменений.
+
+        table_names — только эти таблицы (по умолчанию все).
+        Внутри транзакции блокировки держатся до commit/rollback.
+        """
+        if self.in_transaction:
+            return
+        with self._lock:
+            if table_names is None:
+                table_names = list(self._held)
+            for table_name in table_names:
+                if table_name in self._held and not self.is_dirty(table_name):
+                    self._held.discard(table_name)
+                    self._table_lock(table_name).release()
+
+    def end_command(self):
+        """Вызвать после каждой команды: сбросить по политике.
+
+        Внутри транзакции изменения не сбрасываются до commit.
+        При политике interval изменения, которые ещё рано
+        сбрасывать, сбрасываются по таймеру, даже если команд
+        больше не будет: иначе таблица оставалась бы
+        заблокированной, пока пользователь не введёт следующую.
+        """
+        if not self._pending or self.in_transaction:
+            self.release_locks()
+            return
+        if self.flush_policy == "command":
+            self.flush()
+        elif self.flush_policy == "interval":
+            delay = self.flush_interval - (time.monotonic() - self._last_flush)
+            if delay <= 0:
+                self.flush()
+            else:
+                self._schedule_flush(delay)
+
+    @contextmanager
+    def command(self):
+        """Контекст выполнения одной команды REPL.
+
+        Сброс по таймеру ждёт завершения команды; после неё
+        вызывается end_command.
+        """
+        with self._lock:
+            yield
+            self.end_command()
+
+    def _schedule_flush(self, delay):
+        """Запустить сброс через delay секунд, если он ещё не запущен."""
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(delay, self._flush_due)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_due(self):
+        """Сброс по таймеру (выполняется в потоке таймера)."""
+        with self._lock:
+            self._timer = None
+            if self._pending and not self.in_transaction:
+                self.flush()
+
+    def _cancel_timer(self):
+        """Отменить запланированный сброс по таймеру."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    @property
+    def in_transaction(self):
+        """Идёт ли транзакция."""
+        return self._saved is not None
+
+    def begin(self):
+        """Начать транзакцию.
+
+        Накопленные до неё изменения сбрасываются, чтобы rollback
+        отменял только изменения транзакции. До commit изменения
+        копятся в памяти и на диск не пишутся.
+        """
+        if self.in_transaction:
+            raise ValueError("Транзакция уже начата.")
+        self.flush()
+        self._saved = {}
+
+    def commit(self):
+        """Зафиксировать транзакцию одним сбросом на диск."""
+        if not self.in_transaction:
+            raise ValueError("Нет активной транзакции.")
+        self._saved = None
+        self.flush()
+
+    def rollback(self):
+        """Отменить транзакцию: вернуть изменённые таблицы.
+
+        Таблицы восстанавливаются из копий, снятых перед первым
+        изменением, а несохранённые записи журнала отбрасываются.
+        Возвращает имена восстановленных таблиц.
+        """
+        if not self.in_transaction:
+            raise ValueError("Нет активной транзакции.")
+        saved, self._saved = self._saved, None
+        for table_name, (rows, next_id) in saved.items():
+            table = self._make_table(table_name, rows, next_id)
+            self._attach_indexes(table_name, table)
+            self._tables[table_name] = table
+        self._pending = {}
+        self.release_locks()
+        return list(saved)
+
+    def close(self):
+        """Сбросить все изменения перед выходом.
+
+        Незавершённая транзакция при этом отменяется.
+        """
+        self._cancel_timer()
+        if self.in_transaction:
+            self.rollback()
+        self.flush()
@@ -0,0 +1,257 @@
+"""Таблица в памяти: записи, первичный ключ и индексы."""
+
+from src.primitive_db import metrics
+from src.primitive_db.constants import ID_COLUMN
+from src.primitive_db.indexes import (
+    index_insert,
+    index_remove,
+    lookup_ids,
+    range_bounds,
+    sorted_insert,
+    sorted_remove,
+)
+from src.primitive_db.parallel import parallel_scan, use_parallel
+from src.primitive_db.query import (
+    compile_condition,
+    conjuncts,
+    equality_terms,
+)
+from src.primitive_db.schema import apply_change, change_records
+
+
+class BaseTable:
+    """Общая часть представлений таблицы.
+
+    Хранит схему {столбец: тип}, карту ID → позиция строки,
+    счётчик следующего ID, хеш-индексы (indexes) и упорядоченные
+    индексы (sorted_indexes). Подклассы хранят сами значения
+    и реализуют _row(pos) — сборку записи-словаря по позиции.
+    """
+
+    def __init__(self, columns, next_id=1):
+        self.schema = dict(columns)
+        self.positions = {}
+        self.next_id = next_id
+        self.indexes = {}
+        self.sorted_indexes = {}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __iter__(self):
+        for pos in range(len(self)):
+            yield self._row(pos)
+
+    def __getitem__(self, pos):
+        if pos < 0:
+            pos += len(self)
+        return self._row(pos)
+
+    def _row(self, pos):
+        raise NotImplementedError
+
+    def get(self, record_id):
+        """Получить запись по ID или None."""
+        pos = self.positions.get(record_id)
+        return None if pos is None else self._row(pos)
+
+    def find(self, where_clause):
+        """Найти записи, соответствующие условию."""
+        return list(self.scan(where_clause))
+
+    def column_slice(self, names, start, stop):
+        """Значения столбцов names для строк [start, stop).
+
+        Возвращает {столбец: список значений}; отсутствующее
+        в записи значение передаётся как None.
+        """
+        stop = min(stop, len(self))
+        rows = [self._row(pos) for pos in range(start, stop)]
+        return {name: [row.get(name) for row in rows] for name in names}
+
+    def insert_many(self, records):
+        """Добавить записи подряд; вернуть их список с ID."""
+        return [self.insert(record) for record in records]
+
+    def alter(self, change):
+        """Применить изменение схемы alter_table к таблице в памяти.
+
+        Индексы удалённого столбца отбрасываются, переименованного —
+        переходят под новое имя. Значения меняет _alter_values.
+        """
+        self.schema = apply_change(self.schema, change)
+        self._alter_values(change)
+        column = change["column"]
+        for indexes in (self.indexes, self.sorted_indexes):
+            if column in indexes:
+                index = indexes.pop(column)
+                if change["op"] == "rename":
+                    indexes[change["to"]] = index
+
+    def _alter_values(self, change):
+        raise NotImplementedError
+
+    def _index_add(self, record):
+        """Добавить запись во все индексы таблицы."""
+        index_insert(self.indexes, record)
+        sorted_insert(self.sorted_indexes, record)
+
+    def _index_remove(self, record):
+        """Удалить запись из всех индексов таблицы."""
+        index_remove(self.indexes, record)
+        sorted_remove(self.sorted_indexes, record)
+
+    def _candidate_positions(self, where_clause):
+        """Сузить перебор по ID или индексам.
+
+        Порядок выбора: равенство по ID, хеш-индекс, диапазон
+        по упорядоченному индексу. Возвращает отсортированный
+        список позиций-кандидатов или None, если ничего из этого
+        к условию не применимо.
+        """
+        terms = equality_terms(where_clause)
+        if ID_COLUMN in terms:
+            pos = self.positions.get(terms[ID_COLUMN])
+            return [] if pos is None else [pos]
+        ids = None
+        if self.indexes:
+            ids = lookup_ids(self.indexes, terms)
+        if ids is None and self.sorted_indexes:
+            bounds = range_bounds(
+                conjuncts(where_clause), self.sorted_indexes, self.schema
+            )
+            if bounds is not None:
+                column, *limits = bounds
+                ids = self.sorted_indexes[column].irange(*limits)
+        if ids is None:
+            return None
+        return sorted(self.positions[i] for i in ids)
+
+    def scan_ordered(self, column, descending=False, where_clause=None):
+        """Лениво выдавать записи в порядке упорядоченного индекса.
+
+        Если условие ограничивает тот же столбец, обходится только
+        нужный диапазон индекса. Остальное условие проверяется
+        для каждой записи, так что order by ... limit k читает
+        лишь первые подходящие записи без сортировки таблицы.
+        """
+        index = self.sorted_indexes[column]
+        limits = ()
+        bounds = range_bounds(
+            conjuncts(where_clause), {column: index}, self.schema
+        )
+        if bounds is not None:
+            limits = bounds[1:]
+        predicate = compile_condition(where_clause)
+        scanned = 0
+        try:
+            for scanned, record_id in enumerate(
+                index.irange(*limits, reverse=descending), 1
+            ):
+                record = self._row(self.positions[record_id])
+                if predicate(record):
+                    yield record
+        finally:
+            metrics.count("rows_scanned", scanned)
+
+
+class Table(BaseTable):
+    """Таблица в виде списка записей-словарей.
+
+    Все изменения записей выполняются через методы класса, чтобы
+    карта позиций и индексы оставались согласованными.
+    """
+
+    def __init__(self, columns, rows=None, next_id=1):
+        super().__init__(columns, next_id)
+        self.rows = rows if rows is not None else []
+        self.positions = {
+            record[ID_COLUMN]: pos for pos, record in enumerate(self.rows)
+        }
+        max_id = max(self.positions, default=0)
+        self.next_id = max(next_id, max_id + 1)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def _row(self, pos):
+        return self.rows[pos]
+
+    def to_records(self):
+        """Вернуть все записи списком словарей (для сохранения)."""
+        return self.rows
+
+    def _alter_values(self, change):
+        change_records(self.rows, change)
+
+    def scan(self, where_clause=None):
+        """Лениво выдавать записи, соответствующие условию.
+
+        where_clause — дерево условия (см. модуль query). Равенства
+        и диапазоны из него сужают перебор через ID или индексы,
+        остальное проверяется скомпилированной функцией условия.
+        Полный перебор большой таблицы идёт в пуле процессов (см.
+        модуль parallel). Число просмотренных записей учитывается
+        в rows_scanned.
+        """
+        positions = None
+        if where_clause is not None:
+            positions = self._candidate_positions(where_clause)
+            if positions is None and use_parallel(self, where_clause):
+                yield from parallel_scan(self, where_clause)
+                return
+        scanned = 0
+        try:
+            if where_clause is None:
+                for scanned, record in enumerate(self.rows, 1):
+                    yield record
+                return
+            if positions is None:
+                candidates = self.rows
+            else:
+                candidates = (self.rows[pos] for pos in positions)
+            predicate = compile_condition(where_clause)
+            for scanned, record in enumerate(candidates, 1):
+                if predicate(record):
+                    yield record
+        finally:
+            metrics.count("rows_scanned", scanned)
+
+    def insert(self, record):
+        """Добавить запись, присвоив ей следующий ID."""
+        record = {ID_COLUMN: self.next_id, **record}
+        self.next_id += 1
+        self.positions[record[ID_COLUMN]] = len(self.rows)
+        self.rows.append(record)
+        self._index_add(record)
+        return record
+
+    def update(self, record, changes):
+        """Изменить значения записи и обновить индексы."""
+        if ID_COLUMN in changes:
+            raise ValueError(f"Столбец {ID_COLUMN} нельзя изменять.")
+        self._index_remove(record)
+        record.update(changes)
+        self._index_add(record)
+
+    def delete(self, ids):
+        """Удалить записи по ID.
+
+        Позиции пересчитываются только для записей, стоявших
+        после первой удалённой.
+        """
+        ids = {i for i in ids if i in self.positions}
+        if not ids:
+            return
+        first = min(self.positions[i] for i in ids)
+        for record_id in ids:
+            self._index_remove(self.rows[self.positions[record_id]])
+            del self.positions[record_id]
+        tail = [
+            record for record in self.rows[first:]
+            if record[ID_COLUMN] not in ids
+        ]
+        del self.rows[first:]
+        for record in tail:
+            self.positions[record[ID_COLUMN]] = len(self.rows)
+            self.rows.append(record)
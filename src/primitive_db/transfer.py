@@ -0,0 +1,170 @@
+"""Импорт и экспорт записей в файлы CSV и JSON Lines.
+
+При импорте формат файла определяется по расширению (.csv или
+.jsonl). Файл читается потоком: строки выдаются по одной как
+списки значений в порядке столбцов схемы, поэтому в памяти
+не держится больше одной пачки импорта. Экспорт так же потоком
+пишет записи через буферизованный файл.
+
+CSV начинается со строки заголовка с именами столбцов;
+в JSON Lines каждая строка — объект {столбец: значение}.
+При импорте столбец ID в файле игнорируется: ID назначаются
+заново.
+"""
+
+import csv
+import json
+import os
+from itertools import islice
+
+from src.primitive_db.constants import (
+    EXPORT_BUFFER_SIZE,
+    EXPORT_CHUNK_SIZE,
+    FILE_ENCODING,
+    ID_COLUMN,
+    TRANSFER_FORMATS,
+)
+
+
+def file_format(filepath):
+    """Определить формат файла (csv/jsonl) по расширению."""
+    ext = os.path.splitext(filepath)[1].lower().lstrip(".")
+    if ext not in TRANSFER_FORMATS:
+        raise ValueError(
+            f"Неизвестный формат файла: {filepath}. "
+            f"Доступные: {', '.join(sorted(TRANSFER_FORMATS))}"
+        )
+    return ext
+
+
+def _check_fields(fields, columns, line):
+    """Проверить, что в строке файла есть ровно столбцы схемы."""
+    fields = set(fields) - {ID_COLUMN}
+    unknown = fields - set(columns)
+    if unknown:
+        raise ValueError(
+            f"строка {line}: неизвестный столбец "
+            f'"{sorted(unknown)[0]}"'
+        )
+    missing = [name for name in columns if name not in fields]
+    if missing:
+        raise ValueError(
+            f'строка {line}: нет значения столбца "{missing[0]}"'
+        )
+
+
+def _csv_value(text, col_type):
+    """Преобразовать текст ячейки CSV в значение типа столбца."""
+    if col_type == "int":
+        return int(text)
+    if col_type == "bool":
+        lowered = text.strip().lower()
+        if lowered in ("true", "1"):
+            return True
+        if lowered in ("false", "0"):
+            return False
+        raise ValueError(f"не bool: {text}")
+    return text
+
+
+def _read_csv(f, columns):
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    _check_fields(header, columns, 1)
+    positions = [header.index(name) for name in columns]
+    types = list(columns.values())
+    for line, cells in enumerate(reader, start=2):
+        if len(cells) != len(header):
+            raise ValueError(
+                f"строка {line}: ожидается {len(header)} значений, "
+                f"получено {len(cells)}"
+            )
+        try:
+            yield [
+                _csv_value(cells[pos], col_type)
+                for pos, col_type in zip(positions, types)
+            ]
+        except ValueError as e:
+            raise ValueError(f"строка {line}: {e}") from None
+
+
+def _read_jsonl(f, columns):
+    for line, text in enumerate(f, start=1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except json.JSONDecodeError:
+            raise ValueError(f"строка {line}: некорректный JSON") from None
+        if not isinstance(record, dict):
+            raise ValueError(f"строка {line}: ожидается объект")
+        _check_fields(record, columns, line)
+        yield [record[name] for name in columns]
+
+
+def read_rows(filepath, columns):
+    """Читать строки файла импорта как списки значений.
+
+    columns — {столбец: тип} без ID; значения выдаются в порядке
+    columns. Ошибки разбора — ValueError с номером строки файла;
+    типы значений проверяет вызывающая сторона.
+    """
+    file_type = file_format(filepath)
+    with open(filepath, encoding=FILE_ENCODING, newline="") as f:
+        if file_type == "csv":
+            yield from _read_csv(f, columns)
+        else:
+            yield from _read_jsonl(f, columns)
+
+
+def _csv_cell(value):
+    """Значение для ячейки CSV: bool пишется как true/false."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+def write_rows(filepath, file_type, columns, records):
+    """Записать записи в файл CSV или JSON Lines.
+
+    columns — порядок столбцов в файле, records — итератор
+    записей-словарей. Записи пишутся пачками по EXPORT_CHUNK_SIZE
+    через буфер EXPORT_BUFFER_SIZE байт, так что память не зависит
+    от размера таблицы. Возвращает число записанных записей.
+    """
+    if file_type not in TRANSFER_FORMATS:
+        raise ValueError(
+            f"Неизвестный формат: {file_type}. "
+            f"Доступные: {', '.join(sorted(TRANSFER_FORMATS))}"
+        )
+    total = 0
+    records = iter(records)
+    with open(
+        filepath,
+        "w",
+        encoding=FILE_ENCODING,
+        newline="",
+        buffering=EXPORT_BUFFER_SIZE,
+    ) as f:
+        if file_type == "csv":
+            writer = csv.writer(f)
+            writer.writerow(columns)
+        while chunk := list(islice(records, EXPORT_CHUNK_SIZE)):
+            if file_type == "csv":
+                writer.writerows(
+                    [_csv_cell(record.get(name)) for name in columns]
+                    for record in chunk
+                )
+            else:
+                f.writelines(
+                    json.dumps(
+                        {name: record.get(name) for name in columns},
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                    for record in chunk
+                )
+            total += len(chunk)
+    return total
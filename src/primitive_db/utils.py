@@ -2,8 +2,95 @@
 
 import json
 import os
+import time
+from contextlib import contextmanager
 
-from src.primitive_db.constants import DATA_DIR, DATA_FILE_EXT, FILE_ENCODING
+from src.primitive_db.binfmt import BinaryTableFile, write_table
+from src.primitive_db.constants import (
+    BINARY_FILE_EXT,
+    DATA_DIR,
+    DATA_FILE_EXT,
+    DROPPED_FILE_SUFFIX,
+    DURABILITY,
+    DURABILITY_LEVELS,
+    FILE_ENCODING,
+    ID_COLUMN,
+    INDEX_FILE_EXT,
+    LOG_FILE_EXT,
+    TEMP_FILE_SUFFIX,
+)
+from src.primitive_db.locking import FileLock, LockTimeoutError
+from src.primitive_db.schema import upgrade_records
+
+if DURABILITY not in DURABILITY_LEVELS:
+    raise ValueError(f"Неизвестный уровень надёжности: {DURABILITY}")
+
+# INDEX_FILE_EXT раньше DATA_FILE_EXT: оба оканчиваются на .json
+_TABLE_FILE_EXTS = (
+    INDEX_FILE_EXT, DATA_FILE_EXT, BINARY_FILE_EXT, LOG_FILE_EXT
+)
+
+# Время декодирования бинарных снимков, замеренное при загрузке:
+# {путь: (отпечаток файла, секунды)} — для команды info
+_decode_times = {}
+
+
+def _sync_file(f):
+    """Довести записанное в файл до ОС или диска по DURABILITY."""
+    if DURABILITY == "none":
+        return
+    f.flush()
+    if DURABILITY == "fsync":
+        os.fsync(f.fileno())
+
+
+def _sync_dir(dirpath):
+    """Записать на диск изменения каталога (переименования)."""
+    if DURABILITY != "fsync":
+        return
+    try:
+        fd = os.open(dirpath or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_write(filepath, binary=False):
+    """Открыть файл для записи с атомарной заменой.
+
+    Данные пишутся во временный файл <filepath>.tmp в том же
+    каталоге, доводятся до диска по DURABILITY и заменяют
+    filepath через os.replace. При ошибке старый файл остаётся
+    нетронутым, а временный удаляется.
+    """
+    temp_path = filepath + TEMP_FILE_SUFFIX
+    if binary:
+        f = open(temp_path, "wb")
+    else:
+        f = open(temp_path, "w", encoding=FILE_ENCODING)
+    try:
+        with f:
+            yield f
+            _sync_file(f)
+        os.replace(temp_path, filepath)
+    except BaseException:
+        _remove(temp_path)
+        raise
+    _sync_dir(os.path.dirname(filepath))
+
+
+def _remove(filepath):
+    """Удалить файл, если он есть."""
+    try:
+        os.remove(filepath)
+    except FileNotFoundError:
+        pass
 
 
 def load_metadata(filepath):
@@ -19,42 +106,416 @@ def load_metadata(filepath):
 
 
 def save_metadata(filepath, data):
-    """Сохранить метаданные в JSON-файл."""
-    with open(filepath, "w", encoding=FILE_ENCODING) as f:
+    """Сохранить метаданные в JSON-файл (атомарно)."""
+    with atomic_write(filepath) as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
-def load_table_data(table_name):
-    """Загрузить данные таблицы из data/<table_name>.json.
+def _table_path(table_name, ext):
+    """Получить путь к файлу таблицы с указанным расширением."""
+    return os.path.join(DATA_DIR, f"{table_name}{ext}")
+
 
-    Если файл не найден, возвращает пустой список.
+def load_table_snapshot(table_name):
+    """Загрузить снимок таблицы из data/<table_name>.json или .bin.
+
+    Возвращает (записи, версия схемы снимка). Если файл
+    не найден — ([], 0).
     """
-    filepath = os.path.join(
-        DATA_DIR, f"{table_name}{DATA_FILE_EXT}"
-    )
+    binary_path = _table_path(table_name, BINARY_FILE_EXT)
+    if os.path.exists(binary_path):
+        start = time.perf_counter()
+        with BinaryTableFile(binary_path) as table_file:
+            records = table_file.records()
+            _remember_decode_time(binary_path, start)
+            return records, table_file.schema_version
+
+    filepath = _table_path(table_name, DATA_FILE_EXT)
     try:
         with open(filepath, "r", encoding=FILE_ENCODING) as f:
-            return json.load(f)
+            data = json.load(f)
     except FileNotFoundError:
-        return []
+        return [], 0
+    if isinstance(data, dict):
+        return data["records"], data["schema_version"]
+    return data, 0
 
 
-def save_table_data(table_name, data):
-    """Сохранить данные таблицы в data/<table_name>.json."""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    filepath = os.path.join(
-        DATA_DIR, f"{table_name}{DATA_FILE_EXT}"
+def read_table_log(table_name):
+    """Прочитать записи журнала операций таблицы.
+
+    Если журнала нет, возвращает пустой список. Недописанная
+    последняя строка (обрыв записи) пропускается.
+    """
+    filepath = _table_path(table_name, LOG_FILE_EXT)
+    entries = []
+    try:
+        with open(filepath, "r", encoding=FILE_ENCODING) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def log_schema_version(entries, version):
+    """Версия схемы последних записей журнала.
+
+    Это версия из последней метки schema в журнале или, если
+    меток нет, version — версия снимка.
+    """
+    for entry in reversed(entries):
+        if entry["op"] == "schema":
+            return max(version, entry["version"])
+    return version
+
+
+def replay_log(data, entries, changes=(), version=0):
+    """Применить записи журнала к списку записей таблицы.
+
+    Поддерживаются операции insert, insert_many, update, delete
+    и метка schema: следующие за ней записи журнала сделаны
+    в указанной версии схемы. version — версия схемы снимка
+    data; changes — изменения схемы из метаданных таблицы
+    (schema_changes). Записи приводятся к новой версии
+    на каждой метке и в конце — к последней.
+
+    Позиции записей по ID строятся один раз: update меняет
+    записи поиском по ID, а удалённые записи отбрасываются
+    одним проходом в конце, так что загрузка линейна по размеру
+    таблицы и журнала.
+    """
+    positions = {record[ID_COLUMN]: i for i, record in enumerate(data)}
+    removed = set()
+    for entry in entries:
+        op = entry["op"]
+        if op == "schema":
+            upgrade_records(data, changes, version, entry["version"])
+            version = max(version, entry["version"])
+        if op == "insert":
+            positions[entry["record"][ID_COLUMN]] = len(data)
+            data.append(entry["record"])
+        elif op == "insert_many":
+            for record in entry["records"]:
+                positions[record[ID_COLUMN]] = len(data)
+                data.append(record)
+        elif op == "update":
+            for record_id in entry["ids"]:
+                pos = positions.get(record_id)
+                if pos is not None:
+                    data[pos].update(entry["set"])
+        elif op == "delete":
+            for record_id in entry["ids"]:
+                pos = positions.pop(record_id, None)
+                if pos is not None:
+                    removed.add(pos)
+    if removed:
+        data = [r for i, r in enumerate(data) if i not in removed]
+    return upgrade_records(data, changes, version)
+
+
+def load_table_columns(table_name):
+    """Загрузить снимок бинарной таблицы по столбцам.
+
+    Возвращает ({столбец: значения}, число строк, версия схемы
+    снимка) или None, если снимка в бинарном формате нет.
+    """
+    binary_path = _table_path(table_name, BINARY_FILE_EXT)
+    if not os.path.exists(binary_path):
+        return None
+    start = time.perf_counter()
+    with BinaryTableFile(binary_path) as table_file:
+        columns = {
+            name: table_file.column(name) for name in table_file.columns
+        }
+        _remember_decode_time(binary_path, start)
+        return columns, len(table_file), table_file.schema_version
+
+
+def _remember_decode_time(binary_path, start):
+    """Запомнить время декодирования снимка, начатого в start."""
+    _decode_times[binary_path] = (
+        file_stamp(binary_path),
+        time.perf_counter() - start,
     )
-    with open(filepath, "w", encoding=FILE_ENCODING) as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
 
 
-def delete_table_data(table_name):
-    """Удалить файл данных таблицы."""
-    filepath = os.path.join(
-        DATA_DIR, f"{table_name}{DATA_FILE_EXT}"
+def load_table_data(table_name, changes=()):
+    """Загрузить данные таблицы: снимок плюс журнал операций.
+
+    changes — изменения схемы из метаданных таблицы
+    (schema_changes): с ними записи приводятся к текущей схеме.
+    Если файлов нет, возвращает пустой список.
+    """
+    data, version = load_table_snapshot(table_name)
+    return replay_log(data, read_table_log(table_name), changes, version)
+
+
+def save_table_data(
+    table_name, data, columns=None, schema_version=0, codec=None
+):
+    """Сохранить снимок таблицы.
+
+    Без схемы снимок пишется в data/<table_name>.json, со схемой
+    columns — в бинарный data/<table_name>.bin (сжатый кодеком
+    codec, если он задан). Снимок в другом формате удаляется.
+    Запись атомарна (см. atomic_write).
+    Снимок JSON — список записей; после изменений схемы
+    (schema_version > 0) — объект {"schema_version": ...,
+    "records": [...]}.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    json_path = _table_path(table_name, DATA_FILE_EXT)
+    binary_path = _table_path(table_name, BINARY_FILE_EXT)
+    if columns is None:
+        if schema_version:
+            data = {"schema_version": schema_version, "records": data}
+        with atomic_write(json_path) as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        stale_path = binary_path
+    else:
+        with atomic_write(binary_path, binary=True) as f:
+            write_table(f, columns, data, schema_version, codec)
+        stale_path = json_path
+    _remove(stale_path)
+
+
+def append_table_log(table_name, entries):
+    """Дописать записи в журнал операций таблицы одной записью."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    filepath = _table_path(table_name, LOG_FILE_EXT)
+    lines = "".join(
+        json.dumps(entry, ensure_ascii=False) + "\n"
+        for entry in entries
     )
+    with open(filepath, "a", encoding=FILE_ENCODING) as f:
+        f.write(lines)
+        _sync_file(f)
+
+
+def table_log_size(table_name):
+    """Размер журнала операций таблицы в байтах."""
     try:
-        os.remove(filepath)
+        return os.path.getsize(_table_path(table_name, LOG_FILE_EXT))
     except FileNotFoundError:
-        pass
+        return 0
+
+
+def compact_table_data(
+    table_name, data, columns=None, schema_version=0, codec=None
+):
+    """Свернуть журнал в снимок: сохранить данные и удалить журнал."""
+    save_table_data(table_name, data, columns, schema_version, codec)
+    _remove(_table_path(table_name, LOG_FILE_EXT))
+
+
+def table_file_stats(table_name):
+    """Размеры бинарного снимка таблицы и время его декодирования.
+
+    Читается только заголовок снимка; время декодирования —
+    замеренное при последней загрузке этого же файла в процессе
+    (None, если он ещё не загружался). Возвращает {"codec",
+    "raw_bytes", "stored_bytes", "file_bytes", "decode_seconds"}
+    или None, если снимка в бинарном формате нет: raw_bytes
+    и stored_bytes — данные столбцов без сжатия и в файле,
+    file_bytes — весь файл вместе с заголовком.
+    """
+    binary_path = _table_path(table_name, BINARY_FILE_EXT)
+    if not os.path.exists(binary_path):
+        return None
+    with BinaryTableFile(binary_path) as table_file:
+        stats = {
+            "codec": table_file.codec,
+            "raw_bytes": table_file.raw_size,
+            "stored_bytes": table_file.stored_size,
+            "file_bytes": os.path.getsize(binary_path),
+            "decode_seconds": None,
+        }
+    stamp, seconds = _decode_times.get(binary_path, (None, None))
+    if stamp == file_stamp(binary_path):
+        stats["decode_seconds"] = seconds
+    return stats
+
+
+def _snapshot_stamp(table_name):
+    """Отпечаток снимка таблицы в JSON-совместимом виде."""
+    return [
+        list(stamp) if stamp else None
+        for stamp in (
+            file_stamp(_table_path(table_name, ext))
+            for ext in (DATA_FILE_EXT, BINARY_FILE_EXT)
+        )
+    ]
+
+
+def load_table_indexes(table_name, rows):
+    """Загрузить индексы таблицы из data/<table_name>.index.json.
+
+    Индексы возвращаются, только если они записаны для текущего
+    снимка таблицы из rows строк (см. save_table_indexes);
+    иначе — а также если файла нет — пустой словарь, и индексы
+    строятся заново.
+    """
+    filepath = _table_path(table_name, INDEX_FILE_EXT)
+    try:
+        with open(filepath, "r", encoding=FILE_ENCODING) as f:
+            saved = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if (
+        saved.get("snapshot") != _snapshot_stamp(table_name)
+        or saved.get("rows") != rows
+    ):
+        return {}
+    return saved["indexes"]
+
+
+def save_table_indexes(table_name, dumped, rows):
+    """Сохранить индексы таблицы в data/<table_name>.index.json.
+
+    Вызывается сразу после записи снимка из rows строк: вместе
+    с индексами сохраняются отпечаток снимка и число строк,
+    по которым load_table_indexes узнаёт устаревший файл.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    filepath = _table_path(table_name, INDEX_FILE_EXT)
+    saved = {
+        "snapshot": _snapshot_stamp(table_name),
+        "rows": rows,
+        "indexes": dumped,
+    }
+    with atomic_write(filepath) as f:
+        json.dump(saved, f, ensure_ascii=False)
+
+
+def mark_table_dropped(table_name):
+    """Первый шаг удаления таблицы: пометить её файлы.
+
+    Файлы переименовываются в <файл>.dropped. Пока метаданные
+    не сохранены без таблицы, удаление можно откатить
+    (см. recover_data_dir).
+    """
+    for ext in _TABLE_FILE_EXTS:
+        filepath = _table_path(table_name, ext)
+        if os.path.exists(filepath):
+            os.replace(filepath, filepath + DROPPED_FILE_SUFFIX)
+    _sync_dir(DATA_DIR)
+
+
+def purge_dropped_table(table_name):
+    """Последний шаг удаления таблицы: удалить помеченные файлы."""
+    for ext in _TABLE_FILE_EXTS:
+        _remove(_table_path(table_name, ext) + DROPPED_FILE_SUFFIX)
+
+
+def _repair_log(filepath):
+    """Обрезать журнал по последней целой строке.
+
+    Недописанный хвост иначе остался бы перед следующими
+    записями и скрыл бы их при чтении журнала.
+    """
+    with open(filepath, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end == len(data):
+            return False
+        f.truncate(end)
+        _sync_file(f)
+    return True
+
+
+def table_lock_path(table_name):
+    """Путь, по которому берётся блокировка таблицы (data/<table>)."""
+    return _table_path(table_name, "")
+
+
+def file_stamp(filepath):
+    """Отпечаток файла: (mtime_ns, размер, inode) или None.
+
+    Разные отпечатки означают, что файл изменился.
+    """
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def table_stamp(table_name):
+    """Отпечаток снимков и журнала таблицы (см. file_stamp)."""
+    return tuple(
+        file_stamp(_table_path(table_name, ext))
+        for ext in (DATA_FILE_EXT, BINARY_FILE_EXT, LOG_FILE_EXT)
+    )
+
+
+def _file_table(filename):
+    """Имя таблицы, которой принадлежит файл из DATA_DIR, или None."""
+    for suffix in (TEMP_FILE_SUFFIX, DROPPED_FILE_SUFFIX):
+        if filename.endswith(suffix):
+            filename = filename[:-len(suffix)]
+    for ext in _TABLE_FILE_EXTS:
+        if filename.endswith(ext):
+            return filename[:-len(ext)]
+    return None
+
+
+def _recover_file(filepath, table_name, metadata):
+    """Обработать временный, помеченный или журнальный файл таблицы.
+
+    Возвращает True, если файл был исправлен.
+    """
+    if filepath.endswith(TEMP_FILE_SUFFIX):
+        _remove(filepath)
+    elif filepath.endswith(DROPPED_FILE_SUFFIX):
+        if table_name in metadata:
+            os.replace(filepath, filepath[:-len(DROPPED_FILE_SUFFIX)])
+        else:
+            _remove(filepath)
+    else:
+        return _repair_log(filepath)
+    return True
+
+
+def recover_data_dir(metadata, meta_filepath):
+    """Навести порядок в файлах после аварийного завершения.
+
+    Удаляет недописанные временные файлы, обрезает недописанные
+    журналы и завершает прерванные удаления таблиц: если таблица
+    ещё есть в метаданных, её файлы возвращаются на место, иначе
+    удаляются. Файлы таблиц, заблокированных другим процессом,
+    не трогаются: их запись ещё идёт. Возвращает список
+    обработанных файлов.
+    """
+    recovered = []
+    meta_temp = meta_filepath + TEMP_FILE_SUFFIX
+    if os.path.exists(meta_temp):
+        try:
+            with FileLock(meta_filepath, timeout=0).exclusive():
+                _remove(meta_temp)
+            recovered.append(meta_temp)
+        except LockTimeoutError:
+            pass
+    if not os.path.isdir(DATA_DIR):
+        return recovered
+
+    suffixes = (TEMP_FILE_SUFFIX, DROPPED_FILE_SUFFIX, LOG_FILE_EXT)
+    for filename in sorted(os.listdir(DATA_DIR)):
+        table_name = _file_table(filename)
+        if table_name is None or not filename.endswith(suffixes):
+            continue
+        filepath = os.path.join(DATA_DIR, filename)
+        try:
+            lock = FileLock(table_lock_path(table_name), timeout=0)
+            with lock.exclusive():
+                if _recover_file(filepath, table_name, metadata):
+                    recovered.append(filepath)
+        except LockTimeoutError:
+            continue
+    return recovered
@@ -0,0 +1,64 @@
+"""Общие фикстуры тестов.
+
+Пути к метаданным и данным (META_FILEPATH, DATA_DIR) заданы
+относительно текущего каталога, поэтому каждый тест работает
+в своём временном каталоге.
+"""
+
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from src.primitive_db.decorators import create_cacher, set_auto_confirm
+from src.primitive_db.engine import execute_command
+from src.primitive_db.store import TableStore
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Временный рабочий каталог теста."""
+    monkeypatch.chdir(tmp_path)
+    set_auto_confirm(True)
+    yield tmp_path
+    set_auto_confirm(False)
+
+
+class Session:
+    """Команды REPL над хранилищем в рабочем каталоге.
+
+    session(команда) выполняет команду и возвращает её вывод;
+    reopen() закрывает хранилище и открывает его заново с диска.
+    """
+
+    def __init__(self):
+        self.store = TableStore()
+        self.cache_result = create_cacher()
+
+    def __call__(self, command):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            execute_command(command, self.store, self.cache_result)
+            self.store.end_command()
+        return output.getvalue()
+
+    def reopen(self):
+        self.store.close()
+        self.store = TableStore()
+        self.cache_result = create_cacher()
+
+
+@pytest.fixture
+def db():
+    """Сессия команд над новым хранилищем (см. Session)."""
+    session = Session()
+    yield session
+    session.store.close()
+
+
+@pytest.fixture
+def other_db():
+    """Вторая сессия над тем же каталогом — как другой процесс."""
+    session = Session()
+    yield session
+    session.store.close()
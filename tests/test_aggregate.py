@@ -0,0 +1,135 @@
+"""Агрегаты и group by (aggregate.py, core.aggregate_records)."""
+
+import random
+from collections import defaultdict
+
+import pytest
+
+from src.primitive_db import aggregate as aggregate_module
+from src.primitive_db import core
+from src.primitive_db.core import aggregate_records
+from src.primitive_db.indexes import build_index, build_sorted_index
+from src.primitive_db.parser import parse_select_args
+from src.primitive_db.table import Table
+
+COLUMNS = {"ID": "int", "g": "str", "n": "int", "flag": "bool"}
+
+
+def _table(rows=200, indexed=False):
+    rng = random.Random(11)
+    table = Table(COLUMNS)
+    for _ in range(rows):
+        table.insert(
+            {
+                "g": f"g{rng.randrange(5)}",
+                "n": rng.randrange(-50, 50),
+                "flag": rng.random() < 0.3,
+            }
+        )
+    if indexed:
+        table.indexes["g"] = build_index(table, "g")
+        table.sorted_indexes["n"] = build_sorted_index(table, "n")
+    return table
+
+
+def _run(table, query):
+    parsed = parse_select_args(f"select {query}")
+    return aggregate_records(
+        table,
+        parsed["where"],
+        parsed["aggregates"],
+        parsed["group_by"],
+        parsed["order_by"],
+        parsed["limit"],
+        parsed["offset"],
+    )
+
+
+def test_group_by_matches_python():
+    table = _table()
+    groups = defaultdict(list)
+    for record in table.to_records():
+        if record["n"] > -20:
+            groups[record["g"]].append(record["n"])
+    expected = [
+        {
+            "g": g,
+            "count(*)": len(values),
+            "sum(n)": sum(values),
+            "avg(n)": pytest.approx(sum(values) / len(values)),
+            "min(n)": min(values),
+            "max(n)": max(values),
+        }
+        for g, values in sorted(groups.items())
+    ]
+    assert _run(
+        table,
+        "g, count(*), sum(n), avg(n), min(n), max(n) from t "
+        "where n > -20 group by g",
+    ) == expected
+
+
+def test_order_by_aggregate_and_limit():
+    table = _table()
+    records = _run(
+        table, "g, count(*) from t group by g order by count(*) desc limit 2"
+    )
+    counts = sorted(
+        (r["count(*)"] for r in _run(table, "g, count(*) from t group by g")),
+        reverse=True,
+    )
+    assert [r["count(*)"] for r in records] == counts[:2]
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "count(*) from t",
+        "min(n), max(n), count(*) from t",
+        "g, count(*) from t group by g",
+    ],
+)
+def test_index_path_matches_scan(query, monkeypatch):
+    answered = []
+    index_aggregate = aggregate_module.index_aggregate
+
+    def spy(*args):
+        result = index_aggregate(*args)
+        answered.append(result is not None)
+        return result
+
+    monkeypatch.setattr(core, "index_aggregate", spy)
+    by_index = _run(_table(indexed=True), query)
+    assert answered == [True]
+    monkeypatch.setattr(core, "index_aggregate", lambda *args: None)
+    assert by_index == _run(_table(), query)
+
+
+def test_empty_input():
+    table = _table()
+    assert _run(
+        table, "count(*), sum(n), avg(n), min(n), max(n) from t where n > 100"
+    ) == [
+        {
+            "count(*)": 0,
+            "sum(n)": 0,
+            "avg(n)": None,
+            "min(n)": None,
+            "max(n)": None,
+        }
+    ]
+    assert _run(table, "g, avg(n) from t where n > 100 group by g") == []
+    empty = Table(COLUMNS)
+    empty.sorted_indexes["n"] = build_sorted_index(empty, "n")
+    assert _run(empty, "min(n), count(*) from t") == [
+        {"min(n)": None, "count(*)": 0}
+    ]
+
+
+def test_aggregates_through_engine(db):
+    db("create_table t n:int g:str")
+    db('insert into t values (1, "a"), (2, "a"), (5, "b")')
+    output = db("select g, count(*), avg(n) from t group by g")
+    assert "| a |    2     |  1.5   |" in output
+    assert "| b |    1     |  5.0   |" in output
+    assert "Ошибка" in db("select n, count(*) from t group by g")
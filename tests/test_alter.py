@@ -0,0 +1,55 @@
+"""Изменение схемы alter_table и его применение при загрузке."""
+
+import pytest
+
+EXPECTED = [
+    {"ID": 1, "m": 1, "c": 5},
+    {"ID": 2, "m": 2, "c": 5},
+    {"ID": 3, "m": 3, "c": 7},
+    {"ID": 4, "m": 4, "c": 8},
+]
+
+
+def _records(db):
+    records = db.store.get_table("t").to_records()
+    return sorted(records, key=lambda record: record["ID"])
+
+
+@pytest.mark.parametrize("layout", ["rows", "columnar"])
+@pytest.mark.parametrize("table_format", ["json", "binary"])
+def test_schema_changes_replay_on_load(db, layout, table_format):
+    db("create_table t n:int s:str")
+    db(f"layout t {layout}")
+    db(f"convert t {table_format}")
+    db('insert into t values (1, "a")')
+    db.store.compact("t")
+    # Снимок в версии 0, журнал — записи версий 0, 1 и 3
+    db('insert into t values (2, "b")')
+    db("alter_table t add c:int default 5")
+    db('insert into t values (3, "c", 7)')
+    db("create_index t n")
+    db("alter_table t rename n m")
+    db("alter_table t drop s")
+    db("insert into t values (4, 8)")
+    assert db.store.metadata["t"]["schema_version"] == 3
+    assert "не применено к файлам данных: 3" in db("info t")
+
+    db.reopen()
+    assert _records(db) == EXPECTED
+    assert db.store.metadata["t"]["indexes"] == ["m"]
+    assert "| 3  | 3 | 7 |" in db("select from t where m = 3")
+
+    db.store.compact("t")
+    assert "schema_changes" not in db.store.metadata["t"]
+    db.reopen()
+    assert _records(db) == EXPECTED
+    assert "не применено к файлам данных: 0" in db("info t")
+
+
+def test_alter_keeps_loaded_table_in_sync(db):
+    db("create_table t n:int")
+    db("insert into t values (1)")
+    db("alter_table t add flag:bool")
+    db("alter_table t rename n m")
+    assert _records(db) == [{"ID": 1, "m": 1, "flag": False}]
+    assert "Ошибка" in db("alter_table t rename m ID")
@@ -0,0 +1,33 @@
+"""Пакетный режим точки входа (main.py)."""
+
+import io
+
+from src.primitive_db.main import main
+
+
+def test_commands_from_arguments(capsys):
+    main(["-c", "create_table t n:int", "-c", "insert into t values (1)"])
+    main(["-c", "select from t"])
+    assert "| 1  | 1 |" in capsys.readouterr().out
+
+
+def test_stdin_confirmation_does_not_consume_next_command(
+    monkeypatch, capsys
+):
+    main(["-c", "create_table t n:int", "-c", "insert into t values (1)"])
+    script = "delete from t where ID = 1\nselect from t\n"
+    monkeypatch.setattr("sys.stdin", io.StringIO(script))
+    main([])
+    out = capsys.readouterr().out
+    assert "--yes" in out
+    assert "| 1  | 1 |" in out
+
+
+def test_stdin_with_yes_confirms(monkeypatch, capsys):
+    main(["-c", "create_table t n:int", "-c", "insert into t values (1)"])
+    script = "delete from t where ID = 1\nselect from t\n"
+    monkeypatch.setattr("sys.stdin", io.StringIO(script))
+    main(["--yes"])
+    out = capsys.readouterr().out
+    assert "успешно удалена" in out
+    assert "Записи не найдены." in out
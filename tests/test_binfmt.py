@@ -0,0 +1,38 @@
+"""Бинарный формат файла таблицы (binfmt.py)."""
+
+import io
+import json
+
+import pytest
+
+from src.primitive_db.binfmt import write_table
+from src.primitive_db.constants import INT_MAX
+
+COLUMNS = {"ID": "int", "n": "int"}
+
+
+def test_write_table_rejects_ints_outside_int64():
+    records = [{"ID": 1, "n": INT_MAX + 1}]
+    for codec in (None, "zlib"):
+        with pytest.raises(ValueError, match='"n"'):
+            write_table(io.BytesIO(), COLUMNS, records, codec=codec)
+
+
+def test_failed_convert_keeps_table_format(db, workdir):
+    db("create_table t n:int")
+    db("insert into t values (1)")
+    db.reopen()
+    # Строка из файла, записанного до проверки диапазона int
+    (workdir / "data" / "t.json").write_text(
+        json.dumps([{"ID": 1, "n": 1}, {"ID": 2, "n": INT_MAX + 1}])
+    )
+    (workdir / "data" / "t.log").unlink(missing_ok=True)
+    db.reopen()
+
+    output = db("convert t binary")
+    assert "Ошибка валидации" in output
+    assert "format" not in db.store.metadata["t"]
+    db.reopen()
+    assert db.store.metadata["t"].get("format", "json") == "json"
+    assert not (workdir / "data" / "t.bin").exists()
+    assert len(db.store.get_table("t")) == 2
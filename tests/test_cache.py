@@ -0,0 +1,94 @@
+"""Кэш select-запросов (decorators.create_cacher)."""
+
+from src.primitive_db.decorators import _result_size, create_cacher
+
+
+class Compute:
+    """value_func, считающая свои вызовы."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return list(self.rows)
+
+
+def test_hits_misses_and_lru_eviction():
+    cache = create_cacher(max_entries=2)
+    funcs = {key: Compute([{"ID": 1}]) for key in "abc"}
+    cache("t", "a", funcs["a"])
+    cache("t", "b", funcs["b"])
+    cache("t", "a", funcs["a"])  # a — недавно использованный
+    cache("t", "c", funcs["c"])  # вытесняет b
+    cache("t", "a", funcs["a"])
+    cache("t", "b", funcs["b"])
+    assert [funcs[key].calls for key in "abc"] == [1, 2, 1]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 4, 2)
+    assert stats["entries"] == 2
+
+
+def test_byte_limit():
+    rows = [{"ID": i, "s": "x" * 10} for i in range(5)]
+    size = _result_size(rows)
+    cache = create_cacher(max_bytes=size * 2)
+    for key in "abc":
+        cache("t", key, Compute(rows))
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= size * 2
+
+    # Результат больше лимита не кэшируется вовсе
+    big = Compute(rows * 3)
+    cache("t", "big", big)
+    cache("t", "big", big)
+    assert big.calls == 2
+    assert cache.stats()["entries"] == 2
+
+
+def test_streamed_results_are_cached_only_when_complete():
+    cache = create_cacher(max_rows=3)
+    funcs = {"small": Compute([1, 2]), "large": Compute([1, 2, 3, 4])}
+    for key in ("small", "large", "small", "large"):
+        func = funcs[key]
+        assert list(cache("t", key, lambda: iter(func()))) == func.rows
+    assert (funcs["small"].calls, funcs["large"].calls) == (1, 2)
+
+    partial = Compute([1, 2])
+    first = cache("t", "partial", lambda: iter(partial()))
+    next(first)
+    cache("t", "partial", lambda: iter(partial()))
+    assert partial.calls == 2
+
+
+def test_invalidation_is_per_table():
+    cache = create_cacher()
+    t, u, joined = Compute([1]), Compute([2]), Compute([3])
+    for _ in range(2):
+        cache("t", "q", t)
+        cache("u", "q", u)
+        cache(("t", "u"), "q", joined)
+    cache.invalidate("t")
+    cache("t", "q", t)
+    cache("u", "q", u)
+    cache(("t", "u"), "q", joined)
+    assert (t.calls, u.calls, joined.calls) == (2, 1, 2)
+
+
+def test_select_cache_through_engine(db):
+    db("create_table t n:int")
+    db("create_table u n:int")
+    db("insert into t values (1)")
+    db("insert into u values (1)")
+    db("select from t")
+    db("select from u")
+    db("insert into t values (2)")
+    misses = db.cache_result.stats()["misses"]
+    assert "| 2  | 2 |" in db("select from t")
+    db("select from u")
+    stats = db.cache_result.stats()
+    assert stats["misses"] == misses + 1
+    assert stats["hits"] == 1
@@ -0,0 +1,44 @@
+"""Колоночное представление таблицы (columnar.py)."""
+
+import pytest
+
+from src.primitive_db.columnar import ColumnarTable
+from src.primitive_db.constants import INT_MAX
+
+COLUMNS = {"ID": "int", "n": "int", "s": "str", "b": "bool"}
+
+
+def test_insert_and_scan():
+    table = ColumnarTable(COLUMNS)
+    table.insert({"n": 5, "s": "a", "b": True})
+    table.insert({"n": 7, "s": "b", "b": False})
+    assert table.get(2) == {"ID": 2, "n": 7, "s": "b", "b": False}
+    assert [r["ID"] for r in table.scan(("cmp", ">", "n", 5))] == [2]
+
+
+def test_int_overflow_leaves_table_unchanged():
+    table = ColumnarTable(COLUMNS)
+    table.insert({"n": 1, "s": "a", "b": True})
+    with pytest.raises(ValueError):
+        table.insert({"n": INT_MAX + 1, "s": "b", "b": False})
+    assert len(table) == 1
+    assert table.next_id == 2
+    assert table.to_records() == [{"ID": 1, "n": 1, "s": "a", "b": True}]
+    assert table.insert({"n": 2, "s": "c", "b": False})["ID"] == 2
+
+
+def test_update_overflow_leaves_record_unchanged():
+    table = ColumnarTable(COLUMNS)
+    record = table.insert({"n": 1, "s": "a", "b": True})
+    with pytest.raises(ValueError):
+        table.update(record, {"s": "z", "n": INT_MAX + 1})
+    assert table.get(1) == {"ID": 1, "n": 1, "s": "a", "b": True}
+
+
+def test_delete_keeps_positions():
+    table = ColumnarTable(COLUMNS)
+    for n in range(5):
+        table.insert({"n": n, "s": str(n), "b": n % 2 == 0})
+    table.delete([2, 4])
+    assert [r["ID"] for r in table] == [1, 3, 5]
+    assert table.get(5)["n"] == 4
@@ -0,0 +1,53 @@
+"""Сжатие снимков таблиц (compression.py) и команда info."""
+
+import json
+
+from src.primitive_db import utils
+from src.primitive_db.constants import INT_MAX
+
+
+def test_info_reads_only_the_header(db, monkeypatch):
+    db("create_table t n:int")
+    db("insert into t values (1)")
+    db("compress t zlib")
+    # Снимок только что записан и ещё не загружался
+    assert "будет замерена" in db("info t")
+
+    db.reopen()
+    db("select from t")
+    decoded = []
+    original = utils.BinaryTableFile.column
+    monkeypatch.setattr(
+        utils.BinaryTableFile,
+        "column",
+        lambda self, name: decoded.append(name) or original(self, name),
+    )
+    output = db("info t")
+    assert "МБ/с" in output
+    assert not decoded
+
+
+def test_failed_compress_keeps_table_settings(db, workdir):
+    db("create_table t n:int")
+    db("insert into t values (1)")
+    db.reopen()
+    (workdir / "data" / "t.json").write_text(
+        json.dumps([{"ID": 1, "n": 1}, {"ID": 2, "n": INT_MAX + 1}])
+    )
+    (workdir / "data" / "t.log").unlink(missing_ok=True)
+    db.reopen()
+
+    assert "Ошибка валидации" in db("compress t zlib")
+    assert "codec" not in db.store.metadata["t"]
+    assert "format" not in db.store.metadata["t"]
+    assert not (workdir / "data" / "t.bin").exists()
+
+
+def test_ratio_compares_column_data(db):
+    db("create_table t s:str")
+    db('insert into t values ("a"), ("a"), ("a")')
+    db("compress t zlib")
+    stats = db.store.file_stats("t")
+    assert stats["stored_bytes"] < stats["file_bytes"]
+    ratio = stats["raw_bytes"] / stats["stored_bytes"]
+    assert f"(в {ratio:.2f} раза)" in db("info t")
@@ -0,0 +1,20 @@
+"""Операции над таблицами (core.py)."""
+
+from src.primitive_db.table import Table
+
+
+def test_select_error_while_displaying_is_reported(db, monkeypatch):
+    db("create_table t n:int")
+    db("insert into t values (1), (2)")
+    scan = Table.scan
+
+    def failing_scan(self, where_clause=None):
+        yield next(scan(self, where_clause))
+        raise OSError("диск недоступен")
+
+    monkeypatch.setattr(Table, "scan", failing_scan)
+    output = db("select from t where n > 0")
+    assert "Произошла непредвиденная ошибка: диск недоступен" in output
+    # Неполный результат не попадает в кэш
+    monkeypatch.setattr(Table, "scan", scan)
+    assert "| 2  | 2 |" in db("select from t where n > 0")
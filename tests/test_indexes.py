@@ -0,0 +1,133 @@
+"""Индексы таблиц (indexes.py) и их файлы на диске."""
+
+import json
+import random
+
+import pytest
+
+from src.primitive_db import indexes
+from src.primitive_db import store as store_module
+
+
+def _crash(*args, **kwargs):
+    raise KeyboardInterrupt
+
+
+def test_stale_index_file_is_rebuilt(db, workdir, monkeypatch):
+    db("create_table t n:int")
+    db("insert into t values (1), (2), (3)")
+    db("create_index t n")
+    db.store.compact("t")
+    assert (workdir / "data" / "t.index.json").exists()
+
+    db("delete from t where ID = 1")
+    db("insert into t values (7)")
+    # Сбой после записи снимка, но до записи индексов
+    with monkeypatch.context() as patch, pytest.raises(KeyboardInterrupt):
+        patch.setattr(store_module, "save_table_indexes", _crash)
+        db.store.compact("t")
+
+    db.reopen()
+    assert "| 4  | 7 |" in db("select from t where n = 7")
+    assert "Записи не найдены." in db("select from t where n = 1")
+
+
+def test_index_is_saved_only_with_snapshot(db, workdir):
+    db("create_table t n:int")
+    db("insert into t values (1)")
+    db("create_index t n")
+    assert not (workdir / "data" / "t.index.json").exists()
+    db.reopen()
+    assert "| 1  | 1 |" in db("select from t where n = 1")
+
+
+def test_index_file_without_snapshot_stamp_is_ignored(db, workdir):
+    db("create_table t n:int")
+    db("insert into t values (1), (2)")
+    db("create_index t n")
+    db.store.compact("t")
+    # Файл старого формата: только индексы, и те неверные
+    (workdir / "data" / "t.index.json").write_text(
+        json.dumps({"n": [[1, [5]]]})
+    )
+    db.reopen()
+    assert "| 1  | 1 |" in db("select from t where n = 1")
+
+
+def _expected(pairs, low, high, low_inc, high_inc, reverse):
+    ids = [
+        record_id
+        for value, record_id in sorted(pairs)
+        if (low is None or value > low or (low_inc and value == low))
+        and (high is None or value < high or (high_inc and value == high))
+    ]
+    return ids[::-1] if reverse else ids
+
+
+def test_sorted_index_matches_sorted(monkeypatch):
+    # Маленькие блоки: разбиение и удаление пустых блоков
+    monkeypatch.setattr(indexes, "SORTED_BLOCK_SIZE", 4)
+    rng = random.Random(7)
+    pairs = {(rng.randrange(20), record_id) for record_id in range(50)}
+    index = indexes.SortedIndex(pairs)
+    for record_id in range(50, 200):
+        if pairs and rng.random() < 0.4:
+            pair = rng.choice(sorted(pairs))
+            pairs.discard(pair)
+            index.remove(*pair)
+        else:
+            pair = (rng.randrange(20), record_id)
+            pairs.add(pair)
+            index.add(*pair)
+        # Удаление отсутствующей пары ничего не меняет
+        index.remove(100, -1)
+        assert len(index) == len(pairs)
+        assert list(index.irange()) == [i for _, i in sorted(pairs)]
+
+    bounds = [None, -1, 0, 5, 10, 19, 25]
+    for low in bounds:
+        for high in bounds:
+            for low_inc in (True, False):
+                for high_inc in (True, False):
+                    for reverse in (False, True):
+                        args = (low, high, low_inc, high_inc, reverse)
+                        assert list(index.irange(*args)) == _expected(
+                            pairs, *args
+                        ), args
+
+
+def test_sorted_index_upkeep_through_engine(db, monkeypatch):
+    db("create_table t n:int s:str")
+    db("create_table plain n:int s:str")
+    rng = random.Random(3)
+    for name in ("t", "plain"):
+        rows = ", ".join(f'({n}, "s{n % 7}")' for n in range(60))
+        db(f"insert into {name} values {rows}")
+    db("create_index t n sorted")
+    db("create_index t s sorted")
+    for _ in range(20):
+        record_id, n = rng.randrange(1, 61), rng.randrange(100)
+        for name in ("t", "plain"):
+            db(f"update {name} set n = {n} where ID = {record_id}")
+    for name in ("t", "plain"):
+        db(f"delete from {name} where n >= 40 and n < 50")
+        db(f'insert into {name} values (45, "new"), (-3, "s1")')
+
+    ranges = []
+    irange = indexes.SortedIndex.irange
+    monkeypatch.setattr(
+        indexes.SortedIndex,
+        "irange",
+        lambda self, *args, **kwargs: ranges.append(args)
+        or irange(self, *args, **kwargs),
+    )
+    for query in (
+        "where n >= 10 and n < 60 order by n desc limit 7",
+        "where n > 10 and n <= 45 order by n",
+        'where s = "s1" order by s desc, n',
+        "order by n limit 5 offset 3",
+    ):
+        assert db(f"select n, s from t {query}") == db(
+            f"select n, s from plain {query}"
+        ), query
+    assert ranges
@@ -0,0 +1,175 @@
+"""Соединение таблиц (join.py, core.select_joined)."""
+
+import random
+
+import pytest
+
+from src.primitive_db.core import select_joined
+from src.primitive_db.indexes import build_index
+from src.primitive_db.join import join_pairs, qualify, split_condition
+from src.primitive_db.parser import parse_select_args
+from src.primitive_db.query import (
+    compile_condition,
+    condition_columns,
+    rename_columns,
+)
+from src.primitive_db.table import Table
+
+USERS = {"ID": "int", "name": "str", "age": "int"}
+ORDERS = {"ID": "int", "user_id": "int", "amount": "int"}
+
+
+def _tables(users=20, orders=60):
+    rng = random.Random(5)
+    left = Table(USERS)
+    for n in range(users):
+        left.insert({"name": f"u{n % 4}", "age": rng.randrange(10, 60)})
+    right = Table(ORDERS)
+    for _ in range(orders):
+        right.insert(
+            {"user_id": rng.randrange(1, users + 5), "amount": rng.randrange(100)}
+        )
+    return left, right
+
+
+def _nested_loop(left, right, where_clause):
+    if where_clause is not None:
+        schemas = {"users": USERS, "orders": ORDERS}
+        where_clause = rename_columns(
+            where_clause,
+            {
+                column: qualify(column, schemas)
+                for column in condition_columns(where_clause)
+            },
+        )
+    predicate = compile_condition(where_clause)
+    result = []
+    for user in left.to_records():
+        for order in right.to_records():
+            if user["ID"] != order["user_id"]:
+                continue
+            record = {f"users.{k}": v for k, v in user.items()}
+            record.update((f"orders.{k}", v) for k, v in order.items())
+            if predicate(record):
+                result.append(record)
+    return result
+
+
+def _key(record):
+    return (record["users.ID"], record["orders.ID"])
+
+
+def _where(condition):
+    return parse_select_args(f"select from t where {condition}")["where"]
+
+
+@pytest.mark.parametrize("index", [False, True])
+@pytest.mark.parametrize(
+    "condition",
+    [
+        None,
+        "users.age > 30",
+        "amount < 50 and name = 'u1'",
+        "users.age > 20 and (amount < 10 or amount > 90)",
+        "users.name = 'u2' or orders.amount > 95",
+    ],
+)
+def test_matches_nested_loop(index, condition):
+    left, right = _tables()
+    if index:
+        right.indexes["user_id"] = build_index(right, "user_id")
+    where_clause = condition and _where(condition)
+    result = select_joined(
+        [("users", left), ("orders", right)],
+        ("users.ID", "user_id"),
+        where_clause,
+    )
+    assert sorted(result, key=_key) == sorted(
+        _nested_loop(left, right, where_clause), key=_key
+    )
+
+
+def _sides(left, right, left_column, right_column):
+    return [
+        ("users", left, left_column, None),
+        ("orders", right, right_column, None),
+    ]
+
+
+class Scans:
+    """scan для join_pairs, запоминающий перебранные таблицы."""
+
+    def __init__(self):
+        self.tables = []
+
+    def __call__(self, table, where_clause):
+        self.tables.append((table, where_clause))
+        return iter(table.scan(where_clause))
+
+
+def test_hash_table_is_built_on_the_smaller_side():
+    left, right = _tables(users=30, orders=10)
+    # age и amount без индексов: хеш-таблица по меньшей orders
+    scans = Scans()
+    list(join_pairs(_sides(left, right, "age", "amount"), scans))
+    assert [table for table, _ in scans.tables] == [right, left]
+
+    scans = Scans()
+    left, right = _tables(users=10, orders=30)
+    list(join_pairs(_sides(left, right, "age", "amount"), scans))
+    assert [table for table, _ in scans.tables] == [left, right]
+
+
+def test_indexed_side_is_probed_without_scan():
+    left, right = _tables(users=10, orders=30)
+    # На ID левой таблицы ищут по карте позиций
+    scans = Scans()
+    pairs = list(join_pairs(_sides(left, right, "ID", "user_id"), scans))
+    assert [table for table, _ in scans.tables] == [right]
+    assert all(user["ID"] == order["user_id"] for user, order in pairs)
+
+    # Из двух сторон с индексом перебирается меньшая
+    right.indexes["user_id"] = build_index(right, "user_id")
+    scans = Scans()
+    pairs_indexed = list(
+        join_pairs(_sides(left, right, "ID", "user_id"), scans)
+    )
+    assert [table for table, _ in scans.tables] == [left]
+    key = lambda pair: (pair[0]["ID"], pair[1]["ID"])  # noqa: E731
+    assert sorted(pairs_indexed, key=key) == sorted(pairs, key=key)
+
+
+def test_where_parts_are_pushed_to_their_tables():
+    schemas = {"users": USERS, "orders": ORDERS}
+    pushed, rest = split_condition(
+        _where("age > 30 and orders.amount < 5 and (name = 'u1' or amount > 9)"),
+        schemas,
+    )
+    assert pushed == {
+        "users": ("cmp", ">", "age", 30),
+        "orders": ("cmp", "<", "amount", 5),
+    }
+    assert rest is not None
+
+    left, right = _tables()
+    scans = Scans()
+    sides = [
+        ("users", left, "age", pushed["users"]),
+        ("orders", right, "amount", pushed["orders"]),
+    ]
+    list(join_pairs(sides, scans))
+    assert {where for _, where in scans.tables} == set(pushed.values())
+
+
+def test_join_through_engine(db):
+    db("create_table users name:str age:int")
+    db("create_table orders user_id:int amount:int")
+    db('insert into users values ("Anna", 30), ("Ivan", 17)')
+    db("insert into orders values (1, 10), (1, 20), (2, 5), (3, 7)")
+    output = db(
+        "select name, amount from users join orders "
+        "on users.ID = orders.user_id where age > 18 "
+        "order by amount desc limit 1"
+    )
+    assert "| Anna |   20   |" in output
+    assert "10" not in output
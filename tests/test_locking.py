@@ -0,0 +1,133 @@
+"""Межпроцессные блокировки (locking.py).
+
+Блокировка flock принадлежит открытому файлу, поэтому два
+хранилища в одном процессе блокируют друг друга так же, как
+два процесса.
+"""
+
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from src.primitive_db import core
+from src.primitive_db.decorators import create_cacher
+from src.primitive_db.engine import execute_command
+from src.primitive_db.locking import FileLock, LockTimeoutError
+from src.primitive_db.store import TableStore
+from src.primitive_db.utils import table_lock_path
+
+
+@pytest.fixture
+def short_timeout(monkeypatch):
+    """Ждать чужую блокировку не дольше 0.1 с."""
+    monkeypatch.setattr(FileLock.__init__, "__defaults__", (0.1,))
+
+
+def test_readers_share_and_writer_excludes(workdir):
+    first, second = FileLock("t"), FileLock("t", timeout=0)
+    with first.shared():
+        with second.shared():
+            pass
+        with pytest.raises(LockTimeoutError):
+            second.acquire(exclusive=True)
+    with first.exclusive():
+        with pytest.raises(LockTimeoutError):
+            second.acquire(exclusive=False)
+    with second.exclusive():
+        pass
+
+
+def test_open_transaction_blocks_other_writers(db, other_db, short_timeout):
+    db("create_table t n:int")
+    db("begin")
+    db("insert into t values (1)")
+
+    output = other_db("insert into t values (2)")
+    assert "заблокирован другим процессом" in output
+    db("commit")
+    other_db("insert into t values (2)")
+    assert [r["n"] for r in db.store.get_table("t").to_records()] == [1, 2]
+
+
+def test_stores_see_each_others_changes(db, other_db):
+    db("create_table t n:int")
+    db("insert into t values (1)")
+    assert "| 1  | 1 |" in other_db("select from t")
+
+    other_db("create_table u s:str")
+    other_db("update t set n = 5 where ID = 1")
+    db("create_table v b:bool")
+    assert "| 1  | 5 |" in db("select from t")
+    # Сохранение метаданных не теряет таблицы другого хранилища
+    db.reopen()
+    assert set(db.store.metadata) == {"t", "u", "v"}
+
+
+
+def test_flush_keeps_other_stores_schema_changes(db, other_db):
+    db("create_table t1 n:int")
+    db("create_table t2 n:int")
+    writer = TableStore(flush_policy="exit")
+    writer_cache = create_cacher()
+    with redirect_stdout(io.StringIO()):
+        execute_command("insert into t1 values (1)", writer, writer_cache)
+
+    other_db("alter_table t2 add m:int")
+    other_db("create_index t2 n")
+    other_db("create_table t3 s:str")
+    writer.flush()
+    writer.close()
+
+    db.reopen()
+    t2 = db.store.metadata["t2"]
+    assert list(t2["columns"]) == ["ID", "n", "m"]
+    assert t2["indexes"] == ["n"]
+    assert set(db.store.metadata) == {"t1", "t2", "t3"}
+    assert db.store.metadata["t1"]["next_id"] == 2
+    assert "ID=1" in db("insert into t2 values (1, 2)")
+
+
+def test_flush_does_not_restore_table_dropped_elsewhere(db, other_db):
+    db("create_table t1 n:int")
+    db("create_table t2 n:int")
+    writer = TableStore(flush_policy="exit")
+    with redirect_stdout(io.StringIO()):
+        execute_command("insert into t1 values (1)", writer, create_cacher())
+
+    other_db("drop_table t2")
+    writer.flush()
+    writer.close()
+    db.reopen()
+    assert set(db.store.metadata) == {"t1"}
+
+
+def test_import_keeps_table_locked_between_batches(db, workdir, monkeypatch):
+    monkeypatch.setattr(
+        core.import_records.__wrapped__.__wrapped__, "__defaults__", (2,)
+    )
+    db("create_table t n:int")
+    (workdir / "rows.jsonl").write_text(
+        "".join(f'{{"n": {n}}}\n' for n in range(5))
+    )
+    other = FileLock(table_lock_path("t"), timeout=0)
+    blocked = []
+    flush = db.store.flush
+
+    def checked_flush(*args, **kwargs):
+        flush(*args, **kwargs)
+        try:
+            other.acquire()
+        except LockTimeoutError:
+            blocked.append(True)
+        else:
+            other.release()
+            blocked.append(False)
+
+    monkeypatch.setattr(db.store, "flush", checked_flush)
+    db("import t rows.jsonl")
+    assert blocked == [True, True, True]
+    # Конец команды снимает блокировку
+    with other.exclusive():
+        pass
+    assert len(db.store.get_table("t")) == 5
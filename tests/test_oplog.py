@@ -0,0 +1,60 @@
+"""Журнал операций таблицы: дозапись и воспроизведение."""
+
+from src.primitive_db import store as store_module
+from src.primitive_db.utils import file_stamp, read_table_log, replay_log
+
+
+def test_changes_are_appended_without_rewriting_snapshot(db, workdir):
+    db("create_table t n:int s:str")
+    db('insert into t values (1, "a"), (2, "b"), (3, "c")')
+    db.store.compact("t")
+    snapshot = workdir / "data" / "t.json"
+    stamp = file_stamp(str(snapshot))
+
+    db('insert into t values (4, "d")')
+    db('update t set s = "x" where n >= 3')
+    db("delete from t where ID = 1")
+    assert file_stamp(str(snapshot)) == stamp
+    assert [entry["op"] for entry in read_table_log("t")] == [
+        "insert",
+        "update",
+        "delete",
+    ]
+
+    db.reopen()
+    records = sorted(
+        db.store.get_table("t").to_records(), key=lambda r: r["ID"]
+    )
+    assert records == [
+        {"ID": 2, "n": 2, "s": "b"},
+        {"ID": 3, "n": 3, "s": "x"},
+        {"ID": 4, "n": 4, "s": "x"},
+    ]
+
+
+def test_large_log_is_compacted_into_snapshot(db, workdir, monkeypatch):
+    monkeypatch.setattr(store_module, "LOG_COMPACT_SIZE", 1)
+    db("create_table t n:int")
+    db("insert into t values (1)")
+    assert read_table_log("t") == []
+    db.reopen()
+    assert [r["n"] for r in db.store.get_table("t").to_records()] == [1]
+
+
+def test_replay_applies_entries_in_order():
+    data = [{"ID": 1, "n": 1}, {"ID": 2, "n": 2}, {"ID": 3, "n": 3}]
+    entries = [
+        {"op": "insert", "record": {"ID": 4, "n": 4}},
+        {"op": "update", "ids": [2, 4], "set": {"n": 0}},
+        {"op": "delete", "ids": [1, 4]},
+        {"op": "update", "ids": [4], "set": {"n": 9}},
+        {"op": "insert_many", "records": [{"ID": 5, "n": 5}]},
+        {"op": "schema", "version": 1},
+        {"op": "update", "ids": [5], "set": {"m": 7}},
+    ]
+    changes = [{"op": "rename", "column": "n", "to": "m", "version": 1}]
+    assert replay_log(data, entries, changes) == [
+        {"ID": 2, "m": 0},
+        {"ID": 3, "m": 3},
+        {"ID": 5, "m": 7},
+    ]
@@ -0,0 +1,32 @@
+"""Параллельная фильтрация в пуле процессов (parallel.py)."""
+
+import pytest
+
+from src.primitive_db import parallel
+from src.primitive_db.columnar import ColumnarTable
+from src.primitive_db.table import Table
+
+COLUMNS = {"ID": "int", "n": "int", "s": "str"}
+WHERE = ("or", ("cmp", "<", "n", 3), ("cmp", "=", "s", "s7"))
+
+
+@pytest.mark.parametrize("cls", [Table, ColumnarTable])
+def test_parallel_scan_matches_sequential(cls, monkeypatch):
+    table = cls(COLUMNS)
+    for i in range(20):
+        table.insert({"n": i % 10, "s": f"s{i % 10}"})
+    expected = list(table.scan(WHERE))
+
+    calls = []
+    candidates = cls._candidate_positions
+
+    def counted(self, where_clause):
+        calls.append(where_clause)
+        return candidates(self, where_clause)
+
+    monkeypatch.setattr(cls, "_candidate_positions", counted)
+    monkeypatch.setattr(parallel, "PARALLEL_THRESHOLD", 1)
+    assert parallel.use_parallel(table, WHERE)
+    assert list(table.scan(WHERE)) == expected
+    assert len(calls) == 1
+    assert parallel._executor is not None
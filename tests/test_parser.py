@@ -0,0 +1,105 @@
+"""Язык запросов: разбор команд (parser.py) и условия (query.py)."""
+
+import pytest
+
+from src.primitive_db.parser import (
+    parse_delete_args,
+    parse_insert_args,
+    parse_select_args,
+    parse_update_args,
+)
+from src.primitive_db.query import compile_condition
+
+
+def test_and_binds_tighter_than_or():
+    query = parse_select_args(
+        'select a, b from t where a > 1 and b = "x" or c != 2'
+    )
+    assert query["columns"] == ["a", "b"]
+    assert query["where"] == (
+        "or",
+        ("and", ("cmp", ">", "a", 1), ("cmp", "=", "b", "x")),
+        ("cmp", "!=", "c", 2),
+    )
+
+
+def test_parentheses_order_by_limit_offset():
+    query = parse_select_args(
+        "select from t where a = 1 and (b < 2 or b >= 5) "
+        "order by a desc, b limit 5 offset 2"
+    )
+    assert query["where"] == (
+        "and",
+        ("cmp", "=", "a", 1),
+        ("or", ("cmp", "<", "b", 2), ("cmp", ">=", "b", 5)),
+    )
+    assert query["order_by"] == [("a", True), ("b", False)]
+    assert (query["limit"], query["offset"]) == (5, 2)
+
+
+def test_aggregates_and_group_by():
+    query = parse_select_args("select s, count(*), sum(n) from t group by s")
+    assert query["columns"] is None
+    assert query["aggregates"] == [(None, "s"), ("count", None), ("sum", "n")]
+    assert query["group_by"] == ["s"]
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        "select from t where (a = 1",
+        "select from t where a",
+        "select from t limit x",
+        "select from t order by",
+        "select count(*) from t where a = 1 extra",
+    ],
+)
+def test_syntax_errors(command):
+    assert parse_select_args(command) is None
+
+
+def test_insert_update_delete():
+    assert parse_insert_args(
+        'insert into t values (1, "a, b", true), (2, "c", false)'
+    ) == ("t", [[1, "a, b", True], [2, "c", False]])
+    assert parse_update_args('update t set a = 1, b = "x" where ID = 3') == (
+        "t",
+        {"a": 1, "b": "x"},
+        ("cmp", "=", "ID", 3),
+    )
+    assert parse_delete_args("delete from t where a >= 2") == (
+        "t",
+        ("cmp", ">=", "a", 2),
+    )
+
+
+def test_compile_condition_on_records_and_tuples():
+    node = parse_select_args(
+        'select from t where n >= 2 and (s = "a" or s != "b")'
+    )["where"]
+    match = compile_condition(node)
+    assert match({"n": 2, "s": "a"})
+    assert match({"n": 3, "s": "c"})
+    assert not match({"n": 1, "s": "a"})
+    assert not match({"n": 3, "s": "b"})
+    # Отсутствующий столбец не равен ничему, даже для !=
+    assert not match({"n": 3})
+
+    match = compile_condition(node, columns=["n", "s"])
+    assert match((2, "a"))
+    assert not match((3, None))
+
+
+def test_incomparable_types_do_not_match():
+    match = compile_condition(("cmp", "<", "n", "a"))
+    assert not match({"n": 1})
+
+
+def test_query_through_engine(db):
+    db("create_table t n:int s:str")
+    db('insert into t values (1, "a"), (5, "b"), (3, "a"), (4, "c")')
+    output = db(
+        'select n from t where n > 1 and s != "c" order by n desc limit 1'
+    )
+    assert "| 5 |" in output
+    assert "| 3 |" not in output
@@ -0,0 +1,46 @@
+"""Снимки таблиц на диске: форматы, кодеки и представления."""
+
+import pytest
+
+from src.primitive_db.constants import INT_MAX, INT_MIN
+
+ROWS = [
+    {"ID": 1, "n": INT_MIN, "s": "", "b": True},
+    {"ID": 2, "n": 0, "s": "привет, мир", "b": False},
+    {"ID": 3, "n": INT_MAX, "s": "ёлка (ель)", "b": True},
+    {"ID": 4, "n": -7, "s": "a" * 300, "b": False},
+]
+
+
+def _fill(db, layout, storage):
+    db("create_table t n:int s:str b:bool")
+    db(f"layout t {layout}")
+    if storage == "binary":
+        db("convert t binary")
+    elif storage != "json":
+        db(f"compress t {storage}")
+    values = ", ".join(
+        f'({row["n"]}, "{row["s"]}", {str(row["b"]).lower()})' for row in ROWS
+    )
+    db(f"insert into t values {values}")
+    db("update t set s = \"изменено\" where ID = 2")
+    db("delete from t where ID = 4")
+
+
+@pytest.mark.parametrize("layout", ["rows", "columnar"])
+@pytest.mark.parametrize("storage", ["json", "binary", "zlib", "lzma"])
+def test_snapshot_round_trip(db, workdir, layout, storage):
+    _fill(db, layout, storage)
+    db.store.compact("t")
+    expected = [dict(ROWS[0]), {**ROWS[1], "s": "изменено"}, dict(ROWS[2])]
+
+    db.reopen()
+    table = db.store.get_table("t")
+    assert sorted(table.to_records(), key=lambda r: r["ID"]) == expected
+    assert not db.store.metadata["t"].get("schema_changes")
+    suffix = "json" if storage == "json" else "bin"
+    assert (workdir / "data" / f"t.{suffix}").exists()
+    assert "| 3  |" in db("select from t where n > 0")
+    # Счётчик ID переживает перезапуск: удалённый ID 4 не занимается
+    db("insert into t values (1, \"x\", true)")
+    assert db.store.get_table("t").get(5) is not None
@@ -0,0 +1,38 @@
+"""Протокол обмена сервера и клиента (protocol.py)."""
+
+import asyncio
+
+import pytest
+
+from src.primitive_db.protocol import ProtocolError, encode_frame, read_frame
+
+
+def _read(data):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await read_frame(reader)
+
+    return asyncio.run(read())
+
+
+def test_round_trip():
+    message = {"command": "select from t where s = 'ё'"}
+    assert _read(encode_frame(message)) == message
+
+
+def test_eof_between_frames():
+    assert _read(b"") is None
+
+
+@pytest.mark.parametrize("cut", [2, 4, 10])
+def test_eof_inside_frame(cut):
+    frame = encode_frame({"command": "list_tables"})
+    with pytest.raises(ProtocolError):
+        _read(frame[:cut])
+
+
+def test_malformed_payload():
+    with pytest.raises(ProtocolError):
+        _read(b"\0\0\0\2[]")
@@ -0,0 +1,65 @@
+"""Восстановление файлов после аварийного завершения (utils.py)."""
+
+import pytest
+
+from src.primitive_db.utils import atomic_write
+
+
+def test_torn_log_tail_is_cut_before_new_writes(db, workdir):
+    db("create_table t n:int")
+    db("insert into t values (1)")
+    db.store.close()
+    log = workdir / "data" / "t.log"
+    # Обрыв записи посреди строки журнала
+    with open(log, "a", encoding="utf-8") as f:
+        f.write('{"op": "insert", "rec')
+
+    db.reopen()
+    assert str(log) in {str(workdir / p) for p in db.store.recovered}
+    db("insert into t values (2)")
+    db.reopen()
+    assert [r["n"] for r in db.store.get_table("t").to_records()] == [1, 2]
+
+
+def test_leftover_temp_files_are_removed(db, workdir):
+    db("create_table t n:int")
+    db("insert into t values (1)")
+    db.store.compact("t")
+    db.store.close()
+    (workdir / "data" / "t.json.tmp").write_text("[{")
+    (workdir / "db_meta.json.tmp").write_text("{")
+
+    db.reopen()
+    assert not (workdir / "data" / "t.json.tmp").exists()
+    assert not (workdir / "db_meta.json.tmp").exists()
+    assert len(db.store.get_table("t")) == 1
+
+
+def test_interrupted_drop_is_finished_or_undone(db, workdir):
+    db("create_table kept n:int")
+    db("insert into kept values (1)")
+    db("create_table dropped n:int")
+    db("insert into dropped values (1)")
+    db("drop_table dropped")
+    db.store.close()
+    data = workdir / "data"
+    # Файлы помечены к удалению, но метаданные не успели (kept)
+    # или успели (dropped) сохраниться
+    (data / "kept.log").rename(data / "kept.log.dropped")
+    (data / "dropped.log.dropped").write_text("")
+
+    db.reopen()
+    assert (data / "kept.log").exists()
+    assert not (data / "dropped.log.dropped").exists()
+    assert len(db.store.get_table("kept")) == 1
+
+
+def test_atomic_write_keeps_old_file_on_error(workdir):
+    target = workdir / "f.json"
+    target.write_text("old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(target)) as f:
+            f.write("new")
+            raise RuntimeError("сбой")
+    assert target.read_text() == "old"
+    assert not (workdir / "f.json.tmp").exists()
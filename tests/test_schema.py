@@ -0,0 +1,44 @@
+"""Проверка строк скомпилированной схемой (schema.py)."""
+
+from src.primitive_db.constants import INT_MAX, INT_MIN
+from src.primitive_db.schema import compile_schema
+
+COLUMNS = {"ID": "int", "n": "int", "s": "str", "b": "bool"}
+
+
+def test_check_rows_accepts_valid_rows():
+    schema = compile_schema(COLUMNS)
+    assert schema.check_rows([[1, "a", True], [INT_MIN, "", False]]) is None
+
+
+def test_check_rows_rejects_wrong_types():
+    schema = compile_schema(COLUMNS)
+    assert "n" in schema.check_rows([["1", "a", True]])
+    assert "b" in schema.check_rows([[1, "a", 1]])
+    assert "n" in schema.check_rows([[True, "a", True]])
+    assert "Ожидается 3" in schema.check_rows([[1, "a"]])
+
+
+def test_check_rows_rejects_ints_outside_int64():
+    schema = compile_schema(COLUMNS)
+    assert schema.check_rows([[INT_MAX, "a", True]]) is None
+    assert "диапазона" in schema.check_rows([[INT_MAX + 1, "a", True]])
+    assert "диапазона" in schema.check_rows([[INT_MIN - 1, "a", True]])
+
+
+def test_check_changes():
+    schema = compile_schema(COLUMNS)
+    assert schema.check_changes({"n": 5, "s": "x"}) is None
+    assert "ID" in schema.check_changes({"ID": 2})
+    assert "не существует" in schema.check_changes({"x": 1})
+    assert "диапазона" in schema.check_changes({"n": INT_MAX + 1})
+
+
+def test_out_of_range_values_never_reach_the_table(db, workdir):
+    db("create_table t n:int")
+    assert "диапазона" in db(f"insert into t values ({INT_MAX + 1})")
+    db("insert into t values (1)")
+    assert "диапазона" in db(f"update t set n = {INT_MAX + 1} where ID = 1")
+    (workdir / "rows.csv").write_text(f"n\n2\n{INT_MAX + 1}\n")
+    assert "диапазона" in db("import t rows.csv")
+    assert [r["n"] for r in db.store.get_table("t")] == [1]
@@ -0,0 +1,90 @@
+"""Режим сервера (server.py) и клиент с пулом соединений (client.py)."""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pytest
+
+from src.primitive_db.client import Client, CommandError
+from src.primitive_db.server import DatabaseServer
+from src.primitive_db.store import TableStore
+
+SOCKET_PATH = "db.sock"
+
+
+@contextmanager
+def running_server():
+    """Клиент сервера, запущенного в отдельном потоке.
+
+    Сервер подменяет sys.stdout, поэтому запускается в самом
+    тесте, а не в фикстуре: pytest восстанавливает свой
+    перехват вывода между подготовкой и телом теста.
+    """
+    store = TableStore(flush_policy="exit")
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(
+        DatabaseServer(store).serve(socket_path=SOCKET_PATH)
+    )
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+        # Обработчики соединений, которые клиент ещё не закрыл
+        pending = asyncio.all_tasks(loop)
+        for handler in pending:
+            handler.cancel()
+        if pending:
+            loop.run_until_complete(
+                asyncio.gather(*pending, return_exceptions=True)
+            )
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not os.path.exists(SOCKET_PATH) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    try:
+        with Client(socket_path=SOCKET_PATH, pool_size=4) as client:
+            yield client
+    finally:
+        loop.call_soon_threadsafe(task.cancel)
+        thread.join()
+        loop.close()
+        store.close()
+
+
+def test_commands_and_pipeline():
+    with running_server() as client:
+        client.execute("create_table t n:int")
+        outputs = client.pipeline(
+            [f"insert into t values ({n})" for n in range(5)]
+            + ["select from t where n >= 3"]
+        )
+    assert len(outputs) == 6
+    assert "ID=5" in outputs[4]
+    assert "| 4  | 3 |" in outputs[5]
+    assert "| 3  | 2 |" not in outputs[5]
+
+
+def test_session_commands_are_refused():
+    with running_server() as client, pytest.raises(CommandError):
+        client.execute("begin")
+
+
+def test_concurrent_writers():
+    with running_server() as client:
+        client.execute("create_table t n:int")
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(
+                executor.map(
+                    lambda n: client.execute(f"insert into t values ({n})"),
+                    range(40),
+                )
+            )
+        assert "Количество записей: 40" in client.execute("info t")
@@ -0,0 +1,46 @@
+"""Резидентное хранилище таблиц (store.py)."""
+
+import pytest
+
+from src.primitive_db.decorators import create_cacher
+from src.primitive_db.engine import execute_command
+from src.primitive_db.locking import FileLock, LockTimeoutError
+from src.primitive_db.store import TableStore
+from src.primitive_db.utils import read_table_log, table_lock_path
+
+
+def _run(store, cache_result, command):
+    with store.command():
+        execute_command(command, store, cache_result)
+
+
+def test_interval_policy_flushes_while_idle(capsys):
+    store = TableStore(flush_policy="interval", flush_interval_ms=100)
+    cache_result = create_cacher()
+    _run(store, cache_result, "create_table t n:int")
+    _run(store, cache_result, "insert into t values (1)")
+    _run(store, cache_result, "insert into t values (2)")
+    assert store.is_dirty("t")
+
+    # Пока REPL ждёт ввода, таймер сбрасывает изменения и снимает
+    # блокировку таблицы: её может взять другой процесс
+    with FileLock(table_lock_path("t"), timeout=5).exclusive():
+        assert not store.is_dirty("t")
+        assert len(read_table_log("t")) == 2
+    store.close()
+
+
+def test_flush_releases_only_the_flushed_tables(db):
+    db("create_table a n:int")
+    db("create_table b n:int")
+    store = TableStore(flush_policy="exit")
+    # Поток сервера взял таблицу a на запись, но ещё не изменил её
+    store.get_table("a", for_write=True)
+    table = store.get_table("b", for_write=True)
+    store.log_changes("b", [{"op": "insert", "record": table.insert({"n": 1})}])
+    store.flush(table_names=["b"])
+    with pytest.raises(LockTimeoutError):
+        FileLock(table_lock_path("a"), timeout=0).acquire()
+    with FileLock(table_lock_path("b"), timeout=0).exclusive():
+        pass
+    store.close()
@@ -0,0 +1,60 @@
+"""Транзакции begin/commit/rollback (store.py, engine.py)."""
+
+from src.primitive_db import store as store_module
+from src.primitive_db.utils import read_table_log
+
+
+def test_rollback_restores_rows_ids_and_indexes(db):
+    db("create_table t n:int s:str")
+    db('insert into t values (1, "a"), (2, "b")')
+    db("create_index t n")
+    db("create_index t s sorted")
+    assert "| 2  | 2 | b |" in db("select from t where n = 2")
+
+    db("begin")
+    db('insert into t values (3, "c"), (4, "d")')
+    db('update t set n = 20, s = "z" where ID = 2')
+    db("delete from t where ID = 1")
+    assert "Записи не найдены." in db("select from t where n = 2")
+    assert "Транзакция отменена." in db("rollback")
+    assert "Записи не найдены." in db("select from t where n = 20")
+    assert "| 2  | 2 | b |" in db("select from t where n = 2")
+    assert "| 1  | 1 | a |" in db('select from t where s < "b"')
+    assert "ID=3" in db('insert into t values (5, "e")')
+
+    db.reopen()
+    records = db.store.get_table("t").to_records()
+    assert [r["n"] for r in records] == [1, 2, 5]
+
+
+def test_commit_writes_the_log_once(db, monkeypatch):
+    db("create_table t n:int")
+    db("create_table u n:int")
+    writes = []
+    append = store_module.append_table_log
+    monkeypatch.setattr(
+        store_module,
+        "append_table_log",
+        lambda name, entries: writes.append(name) or append(name, entries),
+    )
+    db("begin")
+    for n in range(3):
+        db(f"insert into t values ({n})")
+    db("update t set n = 9 where ID = 1")
+    db("insert into u values (1)")
+    assert writes == []
+    assert read_table_log("t") == []
+
+    db("commit")
+    assert sorted(writes) == ["t", "u"]
+    assert len(read_table_log("t")) == 4
+    db.reopen()
+    assert [r["n"] for r in db.store.get_table("t").to_records()] == [9, 1, 2]
+
+
+def test_schema_commands_refused_in_transaction(db):
+    db("create_table t n:int")
+    db("begin")
+    assert "недоступна внутри транзакции" in db("create_table u n:int")
+    assert "u" not in db.store.metadata
+    db("rollback")
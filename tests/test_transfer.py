@@ -0,0 +1,116 @@
+"""Импорт, экспорт (transfer.py) и вставка нескольких строк."""
+
+import pytest
+
+from src.primitive_db import core
+
+
+def _values(db, table_name):
+    return [
+        {k: v for k, v in record.items() if k != "ID"}
+        for record in db.store.get_table(table_name).to_records()
+    ]
+
+
+def test_multi_row_insert_is_all_or_nothing(db):
+    db("create_table t n:int s:str")
+    assert "Ошибка" in db('insert into t values (1, "a"), ("x", "b")')
+    assert len(db.store.get_table("t")) == 0
+    db('insert into t values (1, "a, b"), (2, "c")')
+    assert _values(db, "t") == [{"n": 1, "s": "a, b"}, {"n": 2, "s": "c"}]
+
+
+@pytest.mark.parametrize(
+    ("filename", "content", "message"),
+    [
+        ("bad.csv", "n,s\n1,a\n2\n", "строка 3: ожидается 2 значений"),
+        ("bad.csv", "n,s,b\n1,a,true\n", "строка 1: неизвестный столбец"),
+        ("bad.csv", "n,s\n1,a\nx,b\n", "строка 3:"),
+        ("bad.jsonl", '{"n": 1, "s": "a"}\n\n{"n": 2\n', "строка 3: некорректный JSON"),
+        ("bad.jsonl", '{"n": 1, "s": "a"}\n[1, "a"]\n', "строка 2: ожидается объект"),
+        ("bad.jsonl", '{"n": 1}\n', 'строка 1: нет значения столбца "s"'),
+        ("bad.jsonl", '{"n": "1", "s": "a"}\n', "пачка со строки данных 1"),
+    ],
+)
+def test_bad_lines_are_reported(db, workdir, filename, content, message):
+    db("create_table t n:int s:str")
+    (workdir / filename).write_text(content, encoding="utf-8")
+    output = db(f"import t {filename}")
+    assert f"Ошибка импорта: {message}" in output
+    assert len(db.store.get_table("t")) == 0
+
+
+def test_import_ignores_ids_from_file(db, workdir):
+    db("create_table t n:int flag:bool")
+    db("insert into t values (0, false)")
+    (workdir / "rows.csv").write_text(
+        "flag,ID,n\n1,100,1\nfalse,200,2\nTRUE,300,3\n", encoding="utf-8"
+    )
+    assert "Импортировано записей в таблицу \"t\": 3." in db(
+        "import t rows.csv"
+    )
+    db.reopen()
+    records = db.store.get_table("t").to_records()
+    assert [(r["ID"], r["n"], r["flag"]) for r in records] == [
+        (1, 0, False),
+        (2, 1, True),
+        (3, 2, False),
+        (4, 3, True),
+    ]
+
+
+def test_import_keeps_batches_before_error(db, workdir, monkeypatch):
+    monkeypatch.setattr(
+        core.import_records.__wrapped__.__wrapped__, "__defaults__", (2,)
+    )
+    db("create_table t n:int")
+    (workdir / "rows.jsonl").write_text(
+        '{"n": 1}\n{"n": 2}\n{"n": 3}\n{"n": }\n', encoding="utf-8"
+    )
+    output = db("import t rows.jsonl")
+    assert "строка 4: некорректный JSON" in output
+    assert "Импортировано записей в таблицу \"t\": 2." in output
+    db.reopen()
+    assert _values(db, "t") == [{"n": 1}, {"n": 2}]
+
+
+ROWS = [
+    (0, "", "false"),
+    (-5, 'запятая, "кавычки"', "true"),
+    (123456789012, "ёлка", "false"),
+    (7, "x" * 50, "true"),
+]
+
+
+@pytest.mark.parametrize("file_type", ["csv", "jsonl"])
+def test_export_import_round_trip(db, workdir, file_type):
+    db("create_table src n:int s:str flag:bool")
+    db("create_table dst n:int s:str flag:bool")
+    table = db.store.get_table("src", for_write=True)
+    records = [
+        table.insert({"n": n, "s": s, "flag": flag == "true"})
+        for n, s, flag in ROWS
+    ]
+    db.store.log_changes(
+        "src", [{"op": "insert", "record": record} for record in records]
+    )
+    db("delete from src where ID = 4")
+
+    filename = f"out.{file_type}"
+    output = db(f"export src to {filename} format {file_type}")
+    assert f"Выгружено записей в файл {filename}: 3." in output
+    db(f"import dst {filename}")
+    assert _values(db, "dst") == _values(db, "src")
+    assert len(_values(db, "dst")) == 3
+
+
+@pytest.mark.parametrize("file_type", ["csv", "jsonl"])
+def test_export_with_filter(db, workdir, file_type):
+    db("create_table t n:int")
+    db("insert into t values (1), (2), (3), (4)")
+    db(f"export t where n >= 2 and n != 3 to out.{file_type} format {file_type}")
+    lines = (workdir / f"out.{file_type}").read_text().splitlines()
+    if file_type == "csv":
+        assert lines == ["ID,n", "2,2", "4,4"]
+    else:
+        assert lines == ['{"ID": 2, "n": 2}', '{"ID": 4, "n": 4}']